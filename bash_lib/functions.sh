@@ -1,75 +1,42 @@
 #!/bin/bash
 
-function list_files_from_find {
-    if [[ $opt_verbose = 1 ]]; then
-        verbose find ${directories[*]} $cmd_part_ignore -type f -and \( $cmd_part_include_files \) -and \( $opt_name_filter \) $cmd_size -print
+function retrieve_logs {
+    local output=$1
+    local output_opts=${@:2}
+
+    # A single python process retrieves the logs of all files. It keeps
+    # $parallelism worker processes alive instead of starting one
+    # interpreter per file. Every free worker pulls the next file, the
+    # largest first; the results keep the order of the files.
+    if [[ $opt_stdin_files = 1 ]]; then
+        # NUL-delimited, so paths may contain spaces and newlines.
+        python $retrieve_batch_py -i - -0 -o $output $output_opts ${parallelism:+-P $parallelism} $git_opts $retrieve_batch_opts
+    elif [[ ${#directories[@]} = 0 ]]; then
+        # Git mode without targets: the changed python files of the repository.
+        python $retrieve_batch_py -o $output $output_opts ${parallelism:+-P $parallelism} $git_opts $retrieve_batch_opts
+    else
+        # The retriever walks the directories itself, see FileWalker.
+        python $retrieve_batch_py "${directories[@]}" $walk_opts -o $output $output_opts ${parallelism:+-P $parallelism} $git_opts $retrieve_batch_opts
     fi
-    find ${directories[*]} $cmd_part_ignore -type f -and \( $cmd_part_include_files \) -and \( $opt_name_filter \) $cmd_size -print
-}
-
-function parallel_command {
-    python $1 -i $2 -o $3
-}
-
-function get_file_extension {
-    debug "Extracting file extension from $1"
-
-    filename=$(basename -- "$1")
-    debug "File name : $filename"
-
-    extension=$([[ "$filename" = *.* ]] && echo ".${filename##*.}" || echo '')
-    debug "Extracted extension: $extension"
-
-    echo $extension
 }
 
 function iterate_through_targets {
-    local all_files=$1
-    local all_files_arr=( $1 )
-    local retval=0
-    
-    N=$parallelism
-    i=0
-    c=0
-    for file in $all_files; do
-        file_extension=$(get_file_extension $file)
-        if [ -z "${file_extension}" ]; then
-            verbose "Cannot extract file extension from $file."
-            continue
-        fi
-
-        if [[ -z ${retrieve_scripts[${file_extension}]} ]]; then
-            verbose "File extension $file_extension is not supported."
-            continue
-        fi
-
-        c=$(( c + 1 ))
-        ((i=i%N)); ((i++==0)) && wait
-        
-        echo -ne "Files processed: $c / ${#all_files_arr[@]}\r"
-
-        retrieve_script=${retrieve_scripts[${file_extension}]}
-        output_file=$tmpfile.$c
-        parallel_command $retrieve_script $file $output_file & 
-    done
-    wait
+    # A columnar store directory, main.py memory-maps it instead of parsing CSV.
+    retrieve_logs $tmpfile".all" --output_format columnar
 }
 
-function merge_output_files {
-    rm $tmpfile".all" 2> /dev/null
-    retrieved_files=$(ls -a | grep -i $tmpfile.[1-9])
-    for file in $retrieved_files; do
-        (cat "${file}"; echo) | awk NF >> $tmpfile".all"
-        rm "$file"
-    done
+function stream_quality_check {
+    # Log messages are checked while the files are still being retrieved.
+    # The pipe between both processes bounds how far retrieval runs ahead.
+    retrieve_logs - | python $1 -i - --stream $check_quality_opts >&2
 }
 
 function check_quality {
     log_data_file=$tmpfile".all"
-    if [ -f $log_data_file ]; then
-        python $1 -i $log_data_file >&2
-        rm "$log_data_file"
+    if [ -e $log_data_file ]; then
+        python $1 -i $log_data_file $check_quality_opts >&2
     else
         echo "No log data found to analyze."
     fi
+    rm -rf "$log_data_file"
 }
@@ -27,6 +27,9 @@ function initialise_variables {
 
     export opt_debug=0
     export opt_verbose=0
+    export opt_stream=0
+    export opt_stdin_files=0
+    export git_opts=''
 
     export tmpfile=".retrieved-logs"
 
@@ -35,40 +38,31 @@ function initialise_variables {
     retrieve_py="$python_dir/retrieve_logs/retriever_py_ast.py"
     declare -gA retrieve_scripts=( [".py"]=$retrieve_py )
     export retrieve_scripts
+    retrieve_batch_py="$python_dir/retrieve_logs/retriever_batch.py"
+    export retrieve_batch_py
 
     # Define log quality checking script
     check_quality_py="$python_dir/log_quality/main.py"
     export check_quality_py
 
-    # Build filter for find call
-    cmd_part_include_files=""
-    for file_extension in ${!retrieve_scripts[@]}; do
-        if [ -z "${cmd_part_include_files}" ]; then
-            cmd_part_include_files="-iname *$file_extension"
-        else
-            cmd_part_include_files="$cmd_part_include_files -o -iname *$file_extension"
-        fi
-    done
-    export cmd_part_include_files
+    # Options of the file walk of the batch retriever. It skips version
+    # directories and the paths in .gitignore and .logqualityignore files.
+    export walk_opts="--exclude $tmpfile*"
 
-    # Ignore version directories
-    export cmd_part_ignore_scm="\
-        -o -iname .git\
-        -o -iname .svn\
-        -o -iname .hg\
-        -o -iname CVS"
-    
-    export parallelism=1
+    export parallelism=''  # default: as many workers as the cgroup has CPUs and memory for
 
-    export opt_name_filter=''
-    export cmd_size="-and ( -size -1024k )"  # find will ignore files > 1MB
+    # The largest files start first, so the walk of the directories
+    # completes before the first file is retrieved (dedupe needs that too).
+    # The results are still written in the order of the walk.
+    export retrieve_batch_opts='--largest_first'
+    export check_quality_opts=''
 
     export directories
 }
 
 function process_command_arguments {
     local OPTIND
-    while getopts ":dvfimN:P:" opt; do
+    while getopts ":dvfimstgzc:x:N:P:T:-:" opt; do
         case $opt in
             d)
                 warning "-d Enable debug mode."
@@ -85,19 +79,48 @@ function process_command_arguments {
             ;;
             i)
                 warning "-i Disable scm dir ignoring."
-                cmd_part_ignore_scm=''
+                walk_opts="$walk_opts --no_ignore_scm"
             ;;
             m)
-                warning "-m Disable max-size check. Default is to ignore files > 1MB."
-                cmd_size=" "
+                warning "-m Disable large-file mode. Default is to retrieve files > 1MB from their tokens."
+                retrieve_batch_opts="$retrieve_batch_opts --large_file_mb 0"
+            ;;
+            s)
+                warning "-s Enable stream mode. Logs are checked while files are retrieved."
+                opt_stream=1
+            ;;
+            t)
+                warning "-t Enable tiered retrieval. Astroid is only used for unresolved log calls."
+                retrieve_batch_opts="$retrieve_batch_opts --tiered"
+            ;;
+            g)
+                warning "-g Enable the symbol index. Imported loggers and message constants are resolved without inference."
+                retrieve_batch_opts="$retrieve_batch_opts --symbol_index"
+            ;;
+            z)
+                warning "-z Read the NUL-delimited list of files to check from stdin."
+                opt_stdin_files=1
+            ;;
+            c)
+                warning "-c Enable scan and prediction caches in: $OPTARG"
+                retrieve_batch_opts="$retrieve_batch_opts --cache_dir $OPTARG/scan"
+                check_quality_opts="$check_quality_opts --prediction_cache $OPTARG/predictions.sqlite"
+            ;;
+            x)
+                warning "-x Run level and language checks concurrently: $OPTARG"
+                if ! [[ $OPTARG = thread || $OPTARG = process ]]; then
+                    warning "error: Concurrency must be thread or process"
+                    return 103
+                fi
+                check_quality_opts="$check_quality_opts --concurrency $OPTARG"
+            ;;
+            T)
+                warning "-T Limit the inference time per file to $OPTARG seconds."
+                retrieve_batch_opts="$retrieve_batch_opts --file_timeout $OPTARG"
             ;;
             N)
                 warning "-N Enable name filter: $OPTARG"
-                if [ -z "$opt_name_filter" ]; then
-                    opt_name_filter="-name $OPTARG"
-                else
-                    opt_name_filter="$opt_name_filter -or -name $OPTARG"
-                fi
+                walk_opts="$walk_opts --name_filter $OPTARG"
             ;;
             P)
                 warning "-P Enable parallelism: $OPTARG"
@@ -109,6 +132,31 @@ function process_command_arguments {
                     parallelism=$OPTARG
                 fi
             ;;
+            -)
+                case $OPTARG in
+                    staged)
+                        warning "--staged Check the lines changed in the git index."
+                        git_opts="--staged"
+                    ;;
+                    changed-since=*)
+                        warning "--changed-since Check the lines changed since ${OPTARG#*=}."
+                        git_opts="--changed_since ${OPTARG#*=}"
+                    ;;
+                    changed-since)
+                        if [[ $OPTIND -gt $# ]]; then
+                            warning "Option --$OPTARG requires an argument."
+                            return 101
+                        fi
+                        warning "--changed-since Check the lines changed since ${!OPTIND}."
+                        git_opts="--changed_since ${!OPTIND}"
+                        OPTIND=$((OPTIND+1))
+                    ;;
+                    *)
+                        warning "Invalid option: --$OPTARG"
+                        return 100
+                    ;;
+                esac
+            ;;
             \?)
                 warning "Invalid option: -$OPTARG"
                 return 100
@@ -120,23 +168,15 @@ function process_command_arguments {
         esac
     done
 
-    if [ -z "$opt_name_filter" ]; then
-        opt_name_filter='-true'
-    fi
-
     shift $((OPTIND-1))
 
-    if [[ "$*" = "" ]]; then
+    if [[ "$*" = "" && -z "$git_opts" && $opt_stdin_files = 0 ]]; then
         warning "Not enough arguments."\
             "(target directory not found) => Exiting."
         return 102
     fi
 
     directories=( "$@" )
-    cmd_part_ignore="(\
-        -iname $tmpfile*\
-        $cmd_part_ignore_scm\ 
-        ) -prune -o "
     warning "Target directories: ${directories[*]}"
 
     return 0
@@ -0,0 +1,92 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from quality import LogQuality
+
+# Reads the columnar store directories of retrieve_logs/columnar_store.py,
+# which defines the format. Only the files a DataFrame needs are mapped,
+# and only the committed bytes of each.
+FORMAT_VERSION = 2
+META_FILE = "meta.json"
+_COLUMNS = {
+    "lines": ("lines.i32", np.int32),
+    "levels": ("levels.i8", np.int8),
+    "files": ("files.i32", np.int32),
+    "message_ends": ("message_ends.i64", np.int64),
+    "message_nulls": ("message_nulls.i8", np.int8),
+    "path_ends": ("path_ends.i64", np.int64),
+}
+_BLOBS = {
+    "messages": "messages.bin",
+    "paths": "paths.bin",
+}
+
+
+class ColumnarStoreError(Exception):
+    pass
+
+
+def is_columnar_store(path):
+    return os.path.isfile(os.path.join(path, META_FILE))
+
+
+def _read_meta(path):
+    try:
+        with open(os.path.join(path, META_FILE), "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ColumnarStoreError("Unable to read columnar store {}: {}".format(path, e))
+    if meta.get("version") != FORMAT_VERSION:
+        raise ColumnarStoreError("Columnar store {} has version {}, expected {}.".format(
+            path, meta.get("version"), FORMAT_VERSION))
+    return meta
+
+
+def _map_column(path, name, count):
+    file_name, dtype = _COLUMNS[name]
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(os.path.join(path, file_name), dtype=dtype, mode="r", shape=(count,))
+
+
+def _map_blob(path, name, size):
+    if size == 0:
+        return b""
+    return np.memmap(os.path.join(path, _BLOBS[name]), dtype=np.uint8, mode="r", shape=(size,))
+
+
+def _decode_strings(data, ends):
+    # data is any buffer, the memory map of a blob is decoded without a copy.
+    data = memoryview(data)
+    starts = np.concatenate(([0], ends[:-1])) if len(ends) else ends
+    text = str(data, "utf-8", "surrogateescape")
+    if len(text) == len(data):
+        # ASCII only, byte offsets are character offsets.
+        return [text[s:e] for s, e in zip(starts.tolist(), ends.tolist())]
+    return [str(data[s:e], "utf-8", "surrogateescape") for s, e in zip(starts.tolist(), ends.tolist())]
+
+
+def read_dataframe(path, names=LogQuality.HEADER):
+    """A DataFrame of the records in a columnar store, with the columns names.
+
+    The line numbers are the memory-mapped array itself and the levels and
+    files categoricals over the stored codes, only the messages are decoded.
+    Missing messages are NaN, as if the records were read from CSV.
+    """
+    meta = _read_meta(path)
+    rows = meta["rows"]
+    level_names = pd.Index(meta["levels"], dtype=object)
+    paths = pd.Index(_decode_strings(_map_blob(path, "paths", meta["path_bytes"]),
+                                     _map_column(path, "path_ends", meta["paths"])), dtype=object)
+    messages = pd.Series(_decode_strings(_map_blob(path, "messages", meta["message_bytes"]),
+                                         _map_column(path, "message_ends", rows)), dtype=object)
+    messages[_map_column(path, "message_nulls", rows).astype(bool)] = np.nan
+    return pd.DataFrame({
+        names[0]: pd.Series(_map_column(path, "lines", rows), copy=False),
+        names[1]: pd.Categorical.from_codes(_map_column(path, "levels", rows), categories=level_names),
+        names[2]: messages,
+        names[3]: pd.Categorical.from_codes(_map_column(path, "files", rows), categories=paths),
+    }, copy=False)
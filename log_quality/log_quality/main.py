@@ -1,7 +1,14 @@
+import multiprocessing
 import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 import pandas as pd
 from quality import *
 from report import *
+from stream import read_log_csv, stream_log_messages
+from prediction_cache import PredictionCache
+
+from columnar_reader import is_columnar_store, read_dataframe
 
 import sys
 
@@ -24,22 +31,170 @@ def _print_separator(title):
     eprint("")
 
 
-def main():
-    args = setup_command_line_arg()
+def _filter_log_messages(log_message_df):
+    # Messages that are empty or contain only "*" --> py_ast was not able to parse their content.
+    log_message_filtered_df = log_message_df[log_message_df[LogQuality.HEADER_CONTENT].str.len() > 1]
+    return log_message_filtered_df.reset_index(drop=True)
 
-    input_file = args.input
-    quality_module_level = args.quality_module_level
-    quality_class_level = args.quality_class_level
-    quality_module_ling = args.quality_module_ling
-    quality_class_ling = args.quality_class_ling
 
-    log_message_df = pd.read_csv(input_file, names=LogQuality.HEADER)
+def _read_log_messages(input_file):
+    if is_columnar_store(input_file):
+        # Memory-mapped, only the messages are decoded.
+        return read_dataframe(input_file)
+    return read_log_csv(input_file)
 
-    # Messages that are empty or contain only "*" --> py_ast was not able to parse their content.
-    log_message_filtered_df = log_message_df[log_message_df[LogQuality.HEADER_CONTENT].str.len() > 1]
-    log_message_filtered_df = log_message_filtered_df.reset_index(drop=True)
 
-    _print_summary(quality_module_level, quality_class_level, quality_module_ling, quality_class_ling)
+def _print_progress(model_name, done, total):
+    eprint("Model {}: {} / {} log messages predicted".format(model_name, done, total), end="\r")
+    if done == total:
+        eprint("")
+
+
+def _create_reports(args, prediction_cache):
+    model_options = {
+        "prediction_cache": prediction_cache,
+        "batch_size": args.batch_size,
+        "max_memory": args.max_memory * 1024 * 1024 if args.max_memory else None,
+        "progress": _print_progress if args.progress else None,
+    }
+    reports = {}
+    try:
+        reports["level"] = ReportDecoratorLevelText(
+            args.quality_module_level, args.quality_class_level, **model_options)
+    except Exception as e:
+        eprint("Failed to run log level quality checking.")
+        traceback.print_exc()
+        reports["level"] = None
+
+    try:
+        reports["language"] = ReportDecoratorLingText(
+            args.quality_module_ling, args.quality_class_ling, **model_options)
+    except Exception as e:
+        eprint("Failed to run log language quality checking.")
+        traceback.print_exc()
+        reports["language"] = None
+    return reports
+
+
+def _run_report(reports, quality_name, log_message_filtered_df):
+    report = reports[quality_name]
+    if report is None:
+        return ""
+    try:
+        return report(log_message_filtered_df)
+    except Exception as e:
+        eprint("Failed to run log {} quality checking.".format(quality_name))
+        traceback.print_exc()
+        return ""
+
+
+# Reports inherited by forked worker processes with --concurrency process.
+_forked_reports = {}
+
+
+def _run_report_forked(quality_name, log_message_filtered_df):
+    report = _forked_reports[quality_name]
+    rep = _run_report(_forked_reports, quality_name, log_message_filtered_df)
+    # Hand the counters back, the parent process keeps printing the statistics.
+    model = report.log_quality
+    cache = model.prediction_cache
+    cache_stats = (cache.hits, cache.misses) if cache is not None else None
+    return rep, (model.lines_predicted, model.unique_lines_predicted), cache_stats
+
+
+def _run_reports_concurrently(reports, log_message_filtered_df, concurrency):
+    """Run the level and language reports at the same time.
+
+    Threads suit models that release the GIL during inference, processes
+    those that do not. A failing report does not affect the other one.
+    """
+    quality_names = [n for n, r in reports.items() if r is not None]
+    results = {n: "" for n in reports}
+
+    if concurrency == "thread":
+        with ThreadPoolExecutor(max_workers=len(quality_names) or 1) as executor:
+            # Every report gets its own copy, the quality checks add columns.
+            futures = {n: executor.submit(_run_report, reports, n, log_message_filtered_df.copy())
+                for n in quality_names}
+            for quality_name, future in futures.items():
+                results[quality_name] = future.result()
+        return results
+
+    _forked_reports.update(reports)
+    cache_stats_before = {}
+    for quality_name in quality_names:
+        cache = reports[quality_name].log_quality.prediction_cache
+        if cache is not None:
+            cache_stats_before[quality_name] = (cache.hits, cache.misses)
+
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=len(quality_names) or 1, mp_context=context) as executor:
+        futures = {n: executor.submit(_run_report_forked, n, log_message_filtered_df)
+            for n in quality_names}
+        for quality_name, future in futures.items():
+            try:
+                rep, model_stats, cache_stats = future.result()
+            except Exception as e:
+                eprint("Failed to run log {} quality checking.".format(quality_name))
+                traceback.print_exc()
+                continue
+
+            results[quality_name] = rep
+            model = reports[quality_name].log_quality
+            model.lines_predicted, model.unique_lines_predicted = model_stats
+            if cache_stats is not None:
+                hits, misses = cache_stats_before[quality_name]
+                model.prediction_cache.hits += cache_stats[0] - hits
+                model.prediction_cache.misses += cache_stats[1] - misses
+    return results
+
+
+def _print_stats(reports, prediction_cache):
+    stats = [r.log_quality.get_stats() for r in (reports or {}).values() if r is not None]
+    if prediction_cache is not None:
+        stats.append(prediction_cache.get_stats())
+    if stats:
+        eprint("")
+        for s in stats:
+            eprint(s)
+
+
+def _stream_log_messages(args, reports):
+    """Collect the log messages batch by batch while the retriever is still running.
+
+    Model predictions for every batch are computed right away, so the reports
+    created afterwards on the full data only look them up.
+    """
+    batches = []
+    for batch in stream_log_messages(args.input, args.stream_batch_size, args.stream_queue_size):
+        batches.append(batch)
+        log_message_filtered_batch = _filter_log_messages(batch)
+        if len(log_message_filtered_batch) == 0:
+            continue
+        for quality_name, report in reports.items():
+            if report is None:
+                continue
+            try:
+                report.prefetch(log_message_filtered_batch)
+            except Exception as e:
+                eprint("Failed to run log {} quality checking.".format(quality_name))
+                traceback.print_exc()
+                reports[quality_name] = None
+
+    if len(batches) == 0:
+        return pd.DataFrame(columns=LogQuality.HEADER)
+    return pd.concat(batches, ignore_index=True)
+
+
+def _check_quality(args, prediction_cache):
+    if args.stream:
+        reports = _create_reports(args, prediction_cache)
+        log_message_df = _stream_log_messages(args, reports)
+    else:
+        reports = None
+        log_message_df = _read_log_messages(args.input)
+
+    log_message_filtered_df = _filter_log_messages(log_message_df)
 
     if len(log_message_df) > 0:
         r1 = ReportDecoratorResolveText()
@@ -49,21 +204,14 @@ def main():
         exit(0)
 
     if len(log_message_filtered_df) > 0:
-        try:
-            r2 = ReportDecoratorLevelText(quality_module_level, quality_class_level)
-            rep2 = r2(log_message_filtered_df)
-        except Exception as e:
-            eprint("Failed to run log level quality checking.")
-            traceback.print_exc()
-            rep2 = ""
-
-        try:
-            r3 = ReportDecoratorLingText(quality_module_ling, quality_class_ling)
-            rep3 = r3(log_message_filtered_df)
-        except Exception as e:
-            eprint("Failed to run log language quality checking.")
-            traceback.print_exc()
-            rep3 = ""
+        if reports is None:
+            reports = _create_reports(args, prediction_cache)
+        if args.concurrency == "none":
+            rep2 = _run_report(reports, "level", log_message_filtered_df)
+            rep3 = _run_report(reports, "language", log_message_filtered_df)
+        else:
+            results = _run_reports_concurrently(reports, log_message_filtered_df, args.concurrency)
+            rep2, rep3 = results["level"], results["language"]
     else:
         logging.warning("No log messages for quality analysis.")
         rep2 = rep3 = None
@@ -78,13 +226,36 @@ def main():
         _print_separator("Parsing & Resolve Report")
         eprint(rep1)
 
+    _print_stats(reports, prediction_cache)
+
+
+def main():
+    args = setup_command_line_arg()
+
+    quality_module_level = args.quality_module_level
+    quality_class_level = args.quality_class_level
+    quality_module_ling = args.quality_module_ling
+    quality_class_ling = args.quality_class_ling
+
+    _print_summary(quality_module_level, quality_class_level, quality_module_ling, quality_class_ling)
+
+    prediction_cache = None
+    if args.prediction_cache:
+        prediction_cache = PredictionCache(args.prediction_cache, args.prediction_cache_size)
+    try:
+        _check_quality(args, prediction_cache)
+    finally:
+        # Also when there is nothing to check.
+        if prediction_cache is not None:
+            prediction_cache.close()
+
     eprint("")
     eprint("")
     eprint("*****************************************************************")
     eprint("***** If you like our tool visit us at https://logsight.ai ******")
     eprint("*****************************************************************")
     eprint("")
-    
+
 
 if __name__ == "__main__":
     main()
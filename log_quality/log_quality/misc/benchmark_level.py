@@ -0,0 +1,109 @@
+"""Benchmark of the LogQualityLevel check on a large input.
+
+Compares the index array implementation of LogQualityLevel.__call__ with
+the DataFrame copies it replaces (_call_frames below) on the same rows, with
+a stand-in model so that only the labelling is measured, and runs it on the
+categorical levels of a columnar store. Reports the time and the peak of
+the memory traced by tracemalloc. Run from log_quality/log_quality:
+
+    python -m misc.benchmark_level [ROWS]
+"""
+import sys
+import time
+import tracemalloc
+import types
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from quality import LogQuality, LogQualityLevel
+
+ROWS = 1000000
+DISTINCT_MESSAGES = 20000
+LEVELS = ["info", "debug", "warning", "error", "exception", "fatal", "trace", "critical"]
+
+
+class StandInModel:
+    """Predicts from the length of the message, cheap and deterministic."""
+
+    def predict_batch(self, log_lines):
+        return [len(l) % 2 for l in log_lines]
+
+
+def _register_model():
+    module = types.ModuleType("benchmark_level_model")
+    module.StandInModel = StandInModel
+    sys.modules[module.__name__] = module
+    sys.modules[module.__name__ + "." + module.__name__] = module
+    return module.__name__
+
+
+def _call_frames(quality, log_lines_df):
+    # LogQualityLevel.__call__ before the index arrays.
+    mask = log_lines_df[LogQuality.HEADER_LEVEL].isin(quality.label2id)
+    filtered_invalid_level = log_lines_df[~mask]
+    filtered_valid_level = log_lines_df[mask]
+    predictions = quality._predict(filtered_valid_level[LogQuality.HEADER_CONTENT].tolist())
+    filtered_valid_level[LogQuality.HEADER_RESULT] = predictions
+    filtered_valid_level[LogQuality.HEADER_LEVEL] = \
+        filtered_valid_level[LogQuality.HEADER_LEVEL].apply(lambda x: quality.label2id[x])
+    mask = filtered_valid_level[LogQuality.HEADER_LEVEL] == predictions
+    return filtered_valid_level[mask], filtered_invalid_level, filtered_valid_level[~mask]
+
+
+def _get_log_lines(rows, categorical):
+    rng = np.random.default_rng(0)
+    messages = np.array(["Message {} of {}".format(i, "x" * (i % 50)) for i in range(DISTINCT_MESSAGES)],
+                        dtype=object)
+    levels = np.array(LEVELS, dtype=object)[rng.integers(0, len(LEVELS), rows)]
+    files = np.array(["/src/module_{}.py".format(i) for i in range(1000)], dtype=object)[rng.integers(0, 1000, rows)]
+    df = pd.DataFrame({
+        LogQuality.HEADER_LINE: rng.integers(1, 5000, rows).astype(np.int32),
+        LogQuality.HEADER_LEVEL: levels,
+        LogQuality.HEADER_CONTENT: messages[rng.integers(0, DISTINCT_MESSAGES, rows)],
+        LogQuality.HEADER_FILE: files,
+    })
+    if categorical:
+        # Like a columnar store loads them.
+        df[LogQuality.HEADER_LEVEL] = df[LogQuality.HEADER_LEVEL].astype("category")
+        df[LogQuality.HEADER_FILE] = df[LogQuality.HEADER_FILE].astype("category")
+    return df
+
+
+def _measure(function):
+    tracemalloc.start()
+    start = time.monotonic()
+    result = function()
+    elapsed = time.monotonic() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    quality = LogQualityLevel(_register_model(), "StandInModel")
+    warnings.simplefilter("ignore")
+
+    log_lines_df = _get_log_lines(rows, categorical=False)
+    frames, frames_time, frames_peak = _measure(lambda: _call_frames(quality, log_lines_df))
+    print("{} rows, object levels, frames:            {:6.2f}s {:7.1f} MB".format(
+        rows, frames_time, frames_peak / 1024 / 1024))
+    result, arrays_time, arrays_peak = _measure(lambda: quality(log_lines_df))
+    for frame, positions in zip(frames, result[:3]):
+        assert frame.index.tolist() == positions.tolist()
+    print("{} rows, object levels, index arrays:      {:6.2f}s {:7.1f} MB".format(
+        rows, arrays_time, arrays_peak / 1024 / 1024))
+
+    # The frames fail here, apply maps every category, also the invalid ones.
+    categorical_df = _get_log_lines(rows, categorical=True)
+    categorical_result, arrays_time, arrays_peak = _measure(lambda: quality(categorical_df))
+    for positions, categorical_positions in zip(result[:3], categorical_result[:3]):
+        assert positions.tolist() == categorical_positions.tolist()
+    print("{} rows, categorical levels, index arrays: {:6.2f}s {:7.1f} MB".format(
+        rows, arrays_time, arrays_peak / 1024 / 1024))
+
+
+if __name__ == "__main__":
+    main()
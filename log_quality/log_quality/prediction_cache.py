@@ -0,0 +1,141 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from importlib import import_module
+from importlib.metadata import version as distribution_version
+
+
+def get_model_version(model):
+    '''Best effort version of a quality model: a version attribute of the model,
+    its module's __version__ or the version of the installed distribution.'''
+    version = getattr(model, "version", None)
+    if version is None:
+        module_name = type(model).__module__
+        version = getattr(import_module(module_name), "__version__", None)
+        if version is None:
+            try:
+                version = distribution_version(module_name.split(".")[0])
+            except Exception:
+                version = None
+    return str(version or "unknown")
+
+
+def _to_json(value):
+    # Models commonly return numpy scalars and arrays.
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError("Object of type {} is not JSON serializable".format(type(value).__name__))
+
+
+class PredictionCache:
+    '''Disk-backed cache of model predictions, shared across runs.
+
+    Entries are keyed by the model (module, class and version) and the hash of
+    the normalized log message. The least recently used entries are evicted
+    once more than max_entries are stored. SQLite takes care of concurrent
+    access from several processes.
+    '''
+    DEFAULT_MAX_ENTRIES = 1000000
+    _QUERY_CHUNK_SIZE = 500
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        dir_path = os.path.dirname(os.path.abspath(path))
+        os.makedirs(dir_path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connect()
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS predictions "
+                "(key TEXT PRIMARY KEY, prediction TEXT NOT NULL, last_used REAL NOT NULL)")
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS predictions_last_used ON predictions (last_used)")
+
+    def _connect(self):
+        self._pid = os.getpid()
+        self._connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+
+    def _get_connection(self):
+        # An SQLite connection must not be used across fork. Forked processes
+        # running the quality checks open their own connection.
+        if self._pid != os.getpid():
+            self._connect()
+        return self._connection
+
+    @staticmethod
+    def get_scope(module_name, class_name, model):
+        return "{}:{}:{}".format(module_name, class_name, get_model_version(model))
+
+    @staticmethod
+    def normalize(log_line):
+        return unicodedata.normalize("NFC", log_line)
+
+    def _get_key(self, scope, log_line):
+        h = hashlib.sha256(scope.encode())
+        h.update(b"\0")
+        h.update(self.normalize(log_line).encode("utf-8", "surrogatepass"))
+        return h.hexdigest()
+
+    def get(self, scope, log_lines):
+        '''Return a dict with the cached predictions of log_lines.'''
+        keys = {self._get_key(scope, l): l for l in log_lines}
+        key_list = list(keys)
+        predictions = {}
+        with self._lock, self._get_connection() as connection:
+            for i in range(0, len(key_list), self._QUERY_CHUNK_SIZE):
+                chunk = key_list[i:i + self._QUERY_CHUNK_SIZE]
+                rows = connection.execute(
+                    "SELECT key, prediction FROM predictions WHERE key IN ({})".format(
+                        ",".join("?" * len(chunk))), chunk).fetchall()
+                for key, prediction in rows:
+                    predictions[keys[key]] = json.loads(prediction)
+                now = time.time()
+                connection.executemany(
+                    "UPDATE predictions SET last_used = ? WHERE key = ?",
+                    [(now, key) for key, _ in rows])
+
+        self.hits += len(predictions)
+        self.misses += len(keys) - len(predictions)
+        return predictions
+
+    def put(self, scope, predictions):
+        '''Store a dict mapping log lines to their predictions.'''
+        now = time.time()
+        rows = [
+            (self._get_key(scope, l), json.dumps(p, default=_to_json), now)
+            for l, p in predictions.items()
+        ]
+        with self._lock, self._get_connection() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO predictions (key, prediction, last_used) VALUES (?, ?, ?)", rows)
+
+    def evict(self):
+        '''Delete the least recently used entries above max_entries. Returns their number.'''
+        with self._lock, self._get_connection() as connection:
+            cursor = connection.execute(
+                "DELETE FROM predictions WHERE key IN ("
+                "SELECT key FROM predictions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,))
+        return cursor.rowcount
+
+    def close(self):
+        try:
+            self.evict()
+        except sqlite3.Error as e:
+            logging.warning("Unable to evict prediction cache entries: %s", e)
+        self._get_connection().close()
+
+    def get_stats(self):
+        total = self.hits + self.misses
+        ratio = self.hits / total if total else 0.0
+        return "Prediction cache: {} hits, {} misses ({:.1%} hit ratio).".format(
+            self.hits, self.misses, ratio)
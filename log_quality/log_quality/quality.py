@@ -1,6 +1,9 @@
 
+from collections import namedtuple
 from logging import log
+import sys
 import numpy as np
+import pandas as pd
 from utils import *
 
 QUALITY_TYPE_RESOLVE = "resolve"
@@ -26,6 +29,11 @@ class LogQuality:
     def __call__(self, log_lines_df):
         raise NotImplemented("Please implement _get_report_instance.")
 
+    def prefetch(self, log_lines_df):
+        '''Prepare the check for a batch of log lines before the full data set is
+        available. Checks without expensive preparation do nothing.'''
+        pass
+
 
 class LogQualityResolve(LogQuality):
     def __init__(self):
@@ -40,8 +48,16 @@ class LogQualityResolve(LogQuality):
         return log_lines_df[~mask], log_lines_df[mask]
 
 
+# bad_predictions are the predictions of the bad lines, labels the label id
+# of every checked line (-1 for invalid levels).
+LevelQualityResult = namedtuple("LevelQualityResult", ["good", "invalid", "bad", "labels", "bad_predictions"])
+
+
 class LogQualityModel(LogQuality):
-    def __init__(self, module_name, class_name, quality_type):
+    DEFAULT_BATCH_SIZE = 10000
+
+    def __init__(self, module_name, class_name, quality_type, prediction_cache=None,
+                 batch_size=DEFAULT_BATCH_SIZE, max_memory=None, progress=None):
         super().__init__()
         if quality_type not in QUALITY_TYPES:
             raise AttributeError("Invalid log quality type %s. Valid quality types are: ", \
@@ -53,57 +69,160 @@ class LogQualityModel(LogQuality):
             logging.error("Unable to import class %s from module %s.", module_name, class_name)
             raise e
 
-    def _predict(self, log_lines):
+        # Predictions made ahead of time by _prefetch, keyed by log line.
+        self._predictions = {}
+
+        self.name = "{}.{}".format(module_name, class_name)
+        self.lines_predicted = 0
+        self.unique_lines_predicted = 0
+
+        self.prediction_cache = prediction_cache
+        if prediction_cache is not None:
+            self._cache_scope = prediction_cache.get_scope(module_name, class_name, self.model)
+
+        # Log lines are handed to the model in chunks of at most batch_size lines
+        # and max_memory bytes. progress(model_name, done, total) is called after
+        # every chunk.
+        self.batch_size = batch_size
+        self.max_memory = max_memory
+        self.progress = progress
+
+    def _get_chunks(self, log_lines):
+        start = 0
+        chunk_memory = 0
+        for end, l in enumerate(log_lines):
+            line_memory = sys.getsizeof(l)
+            if end > start and (
+                (self.batch_size and end - start >= self.batch_size) or
+                (self.max_memory and chunk_memory + line_memory > self.max_memory)
+            ):
+                yield start, end
+                start = end
+                chunk_memory = 0
+            chunk_memory += line_memory
+        if start < len(log_lines):
+            yield start, len(log_lines)
+
+    def _predict_batch(self, log_lines):
+        """Stream log lines through the model chunk by chunk, the predictions keep their order."""
+        predictions = []
+        for start, end in self._get_chunks(log_lines):
+            predictions.extend(self.model.predict_batch(log_lines[start:end]))
+            if self.progress:
+                self.progress(self.name, end, len(log_lines))
+        return predictions
+
+    def _predict_missing(self, log_lines):
+        """Predict distinct log lines. Only lines unknown to the prediction cache go to the model."""
+        predictions = {}
+        if self.prediction_cache is not None:
+            predictions = self.prediction_cache.get(self._cache_scope, log_lines)
+            log_lines = [l for l in log_lines if l not in predictions]
+
         if len(log_lines) > 0:
-            predictions = self.model.predict_batch(log_lines)
-        else:
-            raise IndexError("No log lines to analyze.")
+            new_predictions = dict(zip(log_lines, self._predict_batch(log_lines)))
+            if self.prediction_cache is not None:
+                self.prediction_cache.put(self._cache_scope, new_predictions)
+            predictions.update(new_predictions)
         return predictions
 
+    def _prefetch(self, log_lines):
+        missing = [l for l in dict.fromkeys(log_lines) if l not in self._predictions]
+        if len(missing) > 0:
+            self._predictions.update(self._predict_missing(missing))
+
+    def _predict_unique(self, log_lines):
+        """Predict every distinct log line once.
+
+        After argument substitution many log lines share the same template, so
+        the model only sees the distinct ones. Returns the codes mapping each
+        log line to its distinct line and the predictions of the distinct lines.
+        """
+        if len(log_lines) == 0:
+            raise IndexError("No log lines to analyze.")
+        codes, unique_lines = pd.factorize(np.asarray(log_lines, dtype=object))
+        unique_lines = unique_lines.tolist()
+
+        if self._predictions or self.prediction_cache is not None:
+            self._prefetch(unique_lines)
+            unique_predictions = [self._predictions[l] for l in unique_lines]
+        else:
+            unique_predictions = self._predict_batch(unique_lines)
+
+        self.lines_predicted += len(log_lines)
+        self.unique_lines_predicted += len(unique_lines)
+        return codes, pd.Series(list(unique_predictions)).to_numpy()
+
+    def _predict(self, log_lines):
+        codes, unique_predictions = self._predict_unique(log_lines)
+        return unique_predictions[codes]
+
+    def get_stats(self):
+        ratio = 1 - self.unique_lines_predicted / self.lines_predicted if self.lines_predicted else 0.0
+        return "Model {}: {} log messages, {} distinct ({:.1%} deduplicated).".format(
+            self.name, self.lines_predicted, self.unique_lines_predicted, ratio)
+
 
 class LogQualityLevel(LogQualityModel):
-    def __init__(self, module_name, class_name):
-        super().__init__(module_name, class_name, QUALITY_TYPE_LEVEL)
+    def __init__(self, module_name, class_name, **model_options):
+        super().__init__(module_name, class_name, QUALITY_TYPE_LEVEL, **model_options)
 
         self.label2id = {
             "info": 0, "debug": 0, "trace": 0, 
             "warning": 1, "error":1, "exception": 1, "critical": 1
         }
 
-    def __call__(self, log_lines_df):
-        mask = log_lines_df[LogQuality.HEADER_LEVEL].isin(self.label2id)
+    def get_labels(self, log_lines_df):
+        """The label id of the level of every log line, -1 for invalid levels.
 
-        filtered_invalid_level = log_lines_df[~mask]
-        filtered_valid_level = log_lines_df[mask]
+        Only the distinct levels are looked up in label2id. Categorical level
+        columns, e.g. of a columnar store, are mapped through their codes.
+        """
+        levels = log_lines_df[LogQuality.HEADER_LEVEL]
+        if isinstance(levels.dtype, pd.CategoricalDtype):
+            codes, categories = levels.cat.codes.to_numpy(), levels.cat.categories
+        else:
+            codes, categories = pd.factorize(levels)
+        # The code of missing levels is -1, it picks the -1 appended last.
+        category_labels = np.array([self.label2id.get(c, -1) for c in categories] + [-1], dtype=np.int8)
+        return category_labels[codes]
 
-        log_lines = filtered_valid_level[LogQuality.HEADER_CONTENT].tolist()
-        predictions = self._predict(log_lines)
-        filtered_valid_level[LogQuality.HEADER_RESULT] = predictions
+    def prefetch(self, log_lines_df):
+        valid = np.flatnonzero(self.get_labels(log_lines_df) >= 0)
+        self._prefetch(log_lines_df[LogQuality.HEADER_CONTENT].to_numpy()[valid].tolist())
 
-        filtered_valid_level[LogQuality.HEADER_LEVEL] = \
-            filtered_valid_level[LogQuality.HEADER_LEVEL].apply(lambda x: self.label2id[x])
+    def __call__(self, log_lines_df):
+        labels = self.get_labels(log_lines_df)
+        valid = labels >= 0
+        invalid_level = np.flatnonzero(~valid)
+        valid_level = np.flatnonzero(valid)
 
-        mask = filtered_valid_level[LogQuality.HEADER_LEVEL] == predictions
+        log_lines = log_lines_df[LogQuality.HEADER_CONTENT].to_numpy()[valid_level]
+        predictions = self._predict(log_lines)
 
-        filtered_bad_level = filtered_valid_level[~mask]
-        good_logs = filtered_valid_level[mask]
+        mask = labels[valid_level] == predictions
 
-        # Returns triple. 
-        # First element are lines that passed the quality check
-        # Second element are lines that contain invalid log levels
-        # Third element are lines that contain bad log levels
-        return good_logs, filtered_invalid_level, filtered_bad_level
+        # Returns LevelQualityResult. The lines are positions in log_lines_df.
+        # good are lines that passed the quality check
+        # invalid are lines that contain invalid log levels
+        # bad are lines that contain bad log levels
+        return LevelQualityResult(valid_level[mask], invalid_level, valid_level[~mask],
+                                  labels, predictions[~mask])
 
 
 class LogQualityLing(LogQualityModel):
-    def __init__(self, module_name, class_name):
-        super().__init__(module_name, class_name, QUALITY_TYPE_LING)
+    def __init__(self, module_name, class_name, **model_options):
+        super().__init__(module_name, class_name, QUALITY_TYPE_LING, **model_options)
+
+    def prefetch(self, log_lines_df):
+        self._prefetch(log_lines_df[LogQuality.HEADER_CONTENT].tolist())
 
     def __call__(self, log_lines_df):
         log_lines = log_lines_df[LogQuality.HEADER_CONTENT].tolist()
-        predictions = self._predict(log_lines)
+        codes, unique_predictions = self._predict_unique(log_lines)
+        predictions = unique_predictions[codes]
 
-        overall_result = [r["prediction"] for r in predictions]
+        overall_result = np.array([r["prediction"] for r in unique_predictions])[codes]
 
         log_lines_df[LogQuality.HEADER_RESULT] = overall_result
         mask = log_lines_df[LogQuality.HEADER_RESULT] == 0
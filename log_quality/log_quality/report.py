@@ -4,6 +4,11 @@ from numpy import record
 from quality import *
 
 
+def _take(log_lines_df, column, positions):
+    # Only the reported lines are taken from the column, not the whole frame.
+    return log_lines_df[column].iloc[positions].tolist()
+
+
 class LogQualityReport:
     def __init__(self, log_quality: LogQuality):
         self.log_quality = log_quality
@@ -13,6 +18,9 @@ class LogQualityReport:
         result = self.log_quality(log_lines_df)
         return result
 
+    def prefetch(self, log_lines_df):
+        self.log_quality.prefetch(log_lines_df)
+
     def __call__(self, log_lines_df):
         raise NotImplemented("Please implement __call__.")
         
@@ -52,31 +60,27 @@ class ReportDecoratorResolveText(LogQualityReportText):
         
 
 class ReportDecoratorLevelText(LogQualityReportText):
-    def __init__(self, quality_module, quality_class):
-        super().__init__(LogQualityLevel(quality_module, quality_class))
+    def __init__(self, quality_module, quality_class, **model_options):
+        super().__init__(LogQualityLevel(quality_module, quality_class, **model_options))
 
 
-    def _process_invalid_level(self, invalid_level):
+    def _process_invalid_level(self, log_lines_df, invalid_level):
         self._report_elements.append("Invalid log level for following log messages:")
         self._report_elements.append("Valid log levels are: {}".format(
             ", ".join(self.log_quality.label2id.keys())))
         self._report_elements.append("")
 
-        for _, row in invalid_level.iterrows():
+        files = _take(log_lines_df, LogQuality.HEADER_FILE, invalid_level)
+        lines = _take(log_lines_df, LogQuality.HEADER_LINE, invalid_level)
+        levels = _take(log_lines_df, LogQuality.HEADER_LEVEL, invalid_level)
+        for file, line, level in zip(files, lines, levels):
             self._report_elements.append(
-                "File {}, line {}: Invalid log level {}".format(
-                    row[LogQuality.HEADER_FILE], 
-                    row[LogQuality.HEADER_LINE],
-                    row[LogQuality.HEADER_LEVEL]
-                )
+                "File {}, line {}: Invalid log level {}".format(file, line, level)
             )
         self._report_elements.append("")
         self._report_elements.append("")
 
-    def _get_level_recommendation(self, entry):
-        level = entry[LogQuality.HEADER_LEVEL]
-        prediction = entry[LogQuality.HEADER_RESULT]
-
+    def _get_level_recommendation(self, level, prediction):
         if level == 0 and prediction == 1:
             return "warning or error"
         if level == 1 and prediction == 0:
@@ -84,39 +88,40 @@ class ReportDecoratorLevelText(LogQualityReportText):
         else:
             return ""
 
-    def _process_bad_log_levels(self, bad_level):
+    def _process_bad_log_levels(self, log_lines_df, result):
         self._report_elements.append("Consider changing the log level of the following log messages:")
         self._report_elements.append("")
 
-        for _, row in bad_level.iterrows():
-            recommended_level = self._get_level_recommendation(row)
+        contents = _take(log_lines_df, LogQuality.HEADER_CONTENT, result.bad)
+        files = _take(log_lines_df, LogQuality.HEADER_FILE, result.bad)
+        lines = _take(log_lines_df, LogQuality.HEADER_LINE, result.bad)
+        levels = result.labels[result.bad]
+        for content, file, line, level, prediction in zip(contents, files, lines, levels, result.bad_predictions):
+            recommended_level = self._get_level_recommendation(level, prediction)
             if recommended_level:
                 self._report_elements.append(
                     "{} --> Consider to change log level to {}.".format(
-                        row[LogQuality.HEADER_CONTENT], recommended_level)
+                        content, recommended_level)
                 )
                 self._report_elements.append(
-                    "\t --> file: {}, line: {}".format(
-                        row[LogQuality.HEADER_FILE], 
-                        row[LogQuality.HEADER_LINE]
-                    )
+                    "\t --> file: {}, line: {}".format(file, line)
                 )
 
     def __call__(self, log_lines_df):
-        _, invalid_level, bad_level = self._run_quality_check(log_lines_df)
+        result = self._run_quality_check(log_lines_df)
 
-        if len(invalid_level) > 0:
-            self._process_invalid_level(invalid_level)
+        if len(result.invalid) > 0:
+            self._process_invalid_level(log_lines_df, result.invalid)
         
-        if len(bad_level) > 0:
-            self._process_bad_log_levels(bad_level)
+        if len(result.bad) > 0:
+            self._process_bad_log_levels(log_lines_df, result)
 
         return self.get_formatted_report()
 
 
 class ReportDecoratorLingText(LogQualityReportText):
-    def __init__(self, quality_module, quality_class):
-        super().__init__(LogQualityLing(quality_module, quality_class))
+    def __init__(self, quality_module, quality_class, **model_options):
+        super().__init__(LogQualityLing(quality_module, quality_class, **model_options))
 
     def _get_word_class_result(self, prediction):
         if prediction["root"] == 0:
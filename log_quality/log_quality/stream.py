@@ -0,0 +1,60 @@
+import queue
+import sys
+import threading
+
+import pandas as pd
+from quality import LogQuality
+
+_END_OF_STREAM = object()
+
+# Columns are typed up front. Inferring them per batch could give the same
+# column different types in different batches.
+_DTYPES = {
+    LogQuality.HEADER_LEVEL: str,
+    LogQuality.HEADER_CONTENT: str,
+    LogQuality.HEADER_FILE: str,
+}
+
+
+def read_log_csv(source, **kwargs):
+    """pd.read_csv of the CSV output of the retrievers, the same for a stream and a whole file."""
+    return pd.read_csv(source, names=LogQuality.HEADER, dtype=_DTYPES, **kwargs)
+
+
+def _read_batches(input_file, batch_size):
+    source = sys.stdin if input_file == "-" else input_file
+    try:
+        reader = read_log_csv(source, chunksize=batch_size)
+    except pd.errors.EmptyDataError:
+        return
+    with reader:
+        yield from reader
+
+
+def stream_log_messages(input_file, batch_size=1000, queue_size=8):
+    """Yield batches of retrieved log messages while the retriever is still writing them.
+
+    A background thread parses the input into DataFrames of at most batch_size
+    rows. It blocks once queue_size batches are waiting, which in turn blocks
+    the retriever writing to the pipe.
+    """
+    batches = queue.Queue(maxsize=queue_size)
+
+    def produce():
+        try:
+            for batch in _read_batches(input_file, batch_size):
+                batches.put(batch)
+        except Exception as e:
+            batches.put(e)
+        finally:
+            batches.put(_END_OF_STREAM)
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    while True:
+        batch = batches.get()
+        if batch is _END_OF_STREAM:
+            return
+        if isinstance(batch, Exception):
+            raise batch
+        yield batch
@@ -0,0 +1,53 @@
+import logging
+import sys
+import types
+
+import pandas as pd
+
+from log_quality.log_quality.quality import LogQuality
+
+MODEL_MODULE = "log_quality_test_model"
+
+
+def configure_logging():
+    logging.basicConfig(format='%(asctime)s %(message)s', level=logging.ERROR)
+
+
+class StandInLevelModel:
+    """Predicts the level from the length of the message, cheap and deterministic."""
+
+    def __init__(self):
+        # The log lines of every predict_batch call.
+        self.batches = []
+
+    def predict_batch(self, log_lines):
+        self.batches.append(list(log_lines))
+        return [len(l) % 2 for l in log_lines]
+
+
+class StandInLingModel(StandInLevelModel):
+    """Predicts bad language for messages of odd length."""
+
+    def predict_batch(self, log_lines):
+        self.batches.append(list(log_lines))
+        return [{"prediction": len(l) % 2, "root": 1, "obj": 0, "subj": 1} for l in log_lines]
+
+
+def register_models():
+    """Make the stand-in models importable by import_model, returns the module name."""
+    module = types.ModuleType(MODEL_MODULE)
+    module.StandInLevelModel = StandInLevelModel
+    module.StandInLingModel = StandInLingModel
+    sys.modules[MODEL_MODULE] = module
+    sys.modules[MODEL_MODULE + "." + MODEL_MODULE] = module
+    return MODEL_MODULE
+
+
+def get_log_lines(rows):
+    """A frame like the retrievers write, rows is a list of (level, message)."""
+    return pd.DataFrame({
+        LogQuality.HEADER_LINE: list(range(1, len(rows) + 1)),
+        LogQuality.HEADER_LEVEL: [level for level, _ in rows],
+        LogQuality.HEADER_CONTENT: [message for _, message in rows],
+        LogQuality.HEADER_FILE: ["/src/module_{}.py".format(i % 3) for i in range(len(rows))],
+    })
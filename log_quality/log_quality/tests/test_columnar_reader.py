@@ -0,0 +1,64 @@
+import unittest
+import csv
+import os
+import tempfile
+
+import numpy as np
+
+from log_quality.log_quality import main
+from log_quality.log_quality.columnar_reader import ColumnarStoreError, read_dataframe
+from log_quality.log_quality.quality import LogQuality
+from log_quality.retrieve_logs.columnar_store import ColumnarWriter
+from tests.helpers import *
+
+
+class TestColumnarReader(unittest.TestCase):
+
+    def setUp(self):
+        configure_logging()
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.store = os.path.join(self._tmp_dir.name, "store")
+        self.rows = [(1, "info", "Hello *", "/a.py"), (7, "error", "Failed ä", "/b.py"),
+                     (3, "info", None, "/a.py"), (4, "debug", 5, "/c ü.py")]
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_read_dataframe(self):
+        with ColumnarWriter(self.store) as writer:
+            writer.writerows(self.rows[:2])
+        with ColumnarWriter(self.store) as writer:
+            writer.writerows(self.rows[2:])
+
+        df = read_dataframe(self.store)
+        self.assertListEqual(df[LogQuality.HEADER_LINE].tolist(), [1, 7, 3, 4])
+        self.assertEqual(df[LogQuality.HEADER_LINE].dtype, np.int32)
+        self.assertListEqual(df[LogQuality.HEADER_LEVEL].tolist(), ["info", "error", "info", "debug"])
+        self.assertListEqual(df[LogQuality.HEADER_CONTENT].isna().tolist(), [False, False, True, False])
+        self.assertListEqual(df[LogQuality.HEADER_CONTENT].dropna().tolist(), ["Hello *", "Failed ä", "5"])
+        self.assertListEqual(df[LogQuality.HEADER_FILE].tolist(), ["/a.py", "/b.py", "/a.py", "/c ü.py"])
+        self.assertListEqual(list(df[LogQuality.HEADER_FILE].cat.categories), ["/a.py", "/b.py", "/c ü.py"])
+
+    def test_same_as_csv(self):
+        csv_file = os.path.join(self._tmp_dir.name, "logs.csv")
+        with open(csv_file, "w", newline="") as f:
+            csv.writer(f, quoting=csv.QUOTE_NONNUMERIC, lineterminator="\n").writerows(self.rows[:3])
+        with ColumnarWriter(self.store) as writer:
+            writer.writerows(self.rows[:3])
+
+        # The missing message is NaN either way, so the filters treat it the same.
+        expected = main._filter_log_messages(main._read_log_messages(csv_file))
+        result = main._filter_log_messages(main._read_log_messages(self.store))
+        self.assertListEqual(result.astype(object).values.tolist(), expected.astype(object).values.tolist())
+
+    def test_version(self):
+        with ColumnarWriter(self.store) as writer:
+            writer.writerows(self.rows[:1])
+        with open(os.path.join(self.store, "meta.json"), "r+") as f:
+            f.write(f.read().replace('"version": 2', '"version": 1'))
+        with self.assertRaises(ColumnarStoreError):
+            read_dataframe(self.store)
+
+
+if __name__ == '__main__':
+    unittest.main()
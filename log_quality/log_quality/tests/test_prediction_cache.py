@@ -0,0 +1,117 @@
+import unittest
+import os
+import sys
+import tempfile
+import unicodedata
+from unittest import mock
+
+import numpy as np
+
+from log_quality.log_quality import main
+from log_quality.log_quality.prediction_cache import PredictionCache
+from log_quality.log_quality.quality import LogQualityLevel
+from log_quality.log_quality.report import ReportDecoratorLevelText, ReportDecoratorLingText
+from log_quality.retrieve_logs.columnar_store import ColumnarWriter
+from tests.helpers import *
+
+
+class TestPredictionCache(unittest.TestCase):
+
+    def setUp(self):
+        configure_logging()
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp_dir.name, "cache", "predictions.sqlite")
+        self.module = register_models()
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_get_put(self):
+        cache = PredictionCache(self.path)
+        self.assertDictEqual(cache.get("scope", ["Started", "Done"]), {})
+        cache.put("scope", {"Started": np.int64(1), "Done": {"prediction": np.array([0, 1])}})
+
+        # Messages are normalized, the other scope has its own entries.
+        decomposed = unicodedata.normalize("NFD", "Café")
+        cache.put("scope", {decomposed: 0})
+        self.assertDictEqual(cache.get("scope", ["Started", "Done", "Café", "Other"]),
+                             {"Started": 1, "Done": {"prediction": [0, 1]}, "Café": 0})
+        self.assertDictEqual(cache.get("other scope", ["Started"]), {})
+        self.assertEqual((cache.hits, cache.misses), (3, 4))
+        self.assertEqual(cache.get_stats(), "Prediction cache: 3 hits, 4 misses (42.9% hit ratio).")
+
+        # Shared across runs.
+        cache.close()
+        self.assertDictEqual(PredictionCache(self.path).get("scope", ["Started"]), {"Started": 1})
+
+    def test_evict(self):
+        cache = PredictionCache(self.path, max_entries=2)
+        with mock.patch("log_quality.log_quality.prediction_cache.time") as time_mock:
+            for now, message in enumerate(["a", "b", "c"]):
+                time_mock.time.return_value = now
+                cache.put("scope", {message: 0})
+            # Reading "a" makes "b" the least recently used entry.
+            time_mock.time.return_value = 3
+            cache.get("scope", ["a"])
+        self.assertEqual(cache.evict(), 1)
+        self.assertListEqual(sorted(cache.get("scope", ["a", "b", "c"])), ["a", "c"])
+        self.assertEqual(cache.evict(), 0)
+
+        # close evicts too.
+        cache.put("scope", {"d": 0})
+        cache.close()
+        self.assertEqual(len(PredictionCache(self.path, max_entries=2).get("scope", ["a", "b", "c", "d"])), 2)
+
+    def test_model_round_trip(self):
+        df = get_log_lines([("info", "Started"), ("error", "Failed"), ("info", "Started"), ("bogus", "Odd")])
+        cache = PredictionCache(self.path)
+        first = LogQualityLevel(self.module, "StandInLevelModel", prediction_cache=cache)
+        first(df)
+        self.assertListEqual(first.model.batches, [["Started", "Failed"]])
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+        # Another run only asks the model for the lines the cache misses.
+        df = get_log_lines([("info", "Started"), ("error", "Failed"), ("warning", "New")])
+        second = LogQualityLevel(self.module, "StandInLevelModel", prediction_cache=cache)
+        result = second(df)
+        self.assertListEqual(second.model.batches, [["New"]])
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
+        expected = LogQualityLevel(self.module, "StandInLevelModel")(df)
+        for positions, expected_positions in zip(result, expected):
+            self.assertListEqual(positions.tolist(), expected_positions.tolist())
+
+    def test_forked_counters(self):
+        df = get_log_lines([("info", "Started"), ("error", "Failed"), ("info", "Started"), ("bogus", "Odd")])
+
+        def run(concurrency, cache):
+            reports = {
+                "level": ReportDecoratorLevelText(self.module, "StandInLevelModel", prediction_cache=cache),
+                "language": ReportDecoratorLingText(self.module, "StandInLingModel", prediction_cache=cache),
+            }
+            return main._run_reports_concurrently(reports, df, concurrency)
+
+        for concurrency in ["thread", "process"]:
+            with self.subTest(concurrency=concurrency):
+                cache = PredictionCache(os.path.join(self._tmp_dir.name, concurrency + ".sqlite"))
+                expected = run(concurrency, None)
+                # Level: the two lines with a valid level, language: all three distinct lines.
+                self.assertDictEqual(run(concurrency, cache), expected)
+                self.assertEqual((cache.hits, cache.misses), (0, 5))
+                self.assertDictEqual(run(concurrency, cache), expected)
+                self.assertEqual((cache.hits, cache.misses), (5, 5))
+                cache.close()
+
+    def test_closed_without_messages(self):
+        store = os.path.join(self._tmp_dir.name, "store")
+        ColumnarWriter(store).close()
+        argv = ["main.py", "-i", store, "--prediction_cache", self.path]
+        # main imports the cache module by its own name.
+        with mock.patch.object(sys, "argv", argv), mock.patch.object(main.PredictionCache, "close") as close:
+            with self.assertRaises(SystemExit) as e:
+                main.main()
+        self.assertEqual(e.exception.code, 0)
+        close.assert_called_once_with()
+
+
+if __name__ == '__main__':
+    unittest.main()
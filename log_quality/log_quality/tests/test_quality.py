@@ -0,0 +1,164 @@
+import unittest
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from log_quality.log_quality import main
+from log_quality.log_quality.quality import LogQuality, LogQualityLevel, LogQualityLing
+from log_quality.log_quality.report import ReportDecoratorLevelText, ReportDecoratorLingText
+from tests.helpers import *
+
+
+def _call_frames(quality, log_lines_df):
+    # LogQualityLevel.__call__ before the index arrays, on object levels.
+    mask = log_lines_df[LogQuality.HEADER_LEVEL].isin(quality.label2id)
+    filtered_invalid_level = log_lines_df[~mask]
+    filtered_valid_level = log_lines_df[mask].copy()
+    predictions = quality._predict(filtered_valid_level[LogQuality.HEADER_CONTENT].tolist())
+    filtered_valid_level[LogQuality.HEADER_RESULT] = predictions
+    filtered_valid_level[LogQuality.HEADER_LEVEL] = \
+        filtered_valid_level[LogQuality.HEADER_LEVEL].apply(lambda x: quality.label2id[x])
+    mask = filtered_valid_level[LogQuality.HEADER_LEVEL] == predictions
+    return filtered_valid_level[mask], filtered_invalid_level, filtered_valid_level[~mask]
+
+
+class TestLogQualityLevel(unittest.TestCase):
+
+    def setUp(self):
+        configure_logging()
+        self.module = register_models()
+        levels = ["info", "debug", "trace", "warning", "error", "exception", "critical", "fatal", "bogus", None]
+        messages = ["Started", "Done", "Failed to connect", "Retrying", "x", "Started"]
+        self.rows = [(levels[i % len(levels)], messages[i % len(messages)]) for i in range(40)]
+
+    def test_call_frames(self):
+        quality = LogQualityLevel(self.module, "StandInLevelModel")
+        df = get_log_lines(self.rows)
+        good, invalid, bad = _call_frames(quality, df)
+        self.assertGreater(len(invalid), 0)
+        self.assertGreater(len(bad), 0)
+
+        categorical_df = df.copy()
+        categorical_df[LogQuality.HEADER_LEVEL] = categorical_df[LogQuality.HEADER_LEVEL].astype("category")
+        for name, log_lines_df in [("object", df), ("categorical", categorical_df)]:
+            with self.subTest(levels=name):
+                result = quality(log_lines_df)
+                self.assertListEqual(result.good.tolist(), good.index.tolist())
+                self.assertListEqual(result.invalid.tolist(), invalid.index.tolist())
+                self.assertListEqual(result.bad.tolist(), bad.index.tolist())
+                self.assertListEqual(result.labels[result.bad].tolist(), bad[LogQuality.HEADER_LEVEL].tolist())
+                self.assertListEqual(result.labels[result.good].tolist(), good[LogQuality.HEADER_LEVEL].tolist())
+                self.assertTrue(np.all(result.labels[result.invalid] == -1))
+                self.assertListEqual(list(result.bad_predictions), bad[LogQuality.HEADER_RESULT].tolist())
+
+    def test_report(self):
+        df = get_log_lines([("info", "Started"), ("bogus", "Odd"), ("error", "Failed"), ("info", "Odd")])
+        df[LogQuality.HEADER_LEVEL] = df[LogQuality.HEADER_LEVEL].astype("category")
+        report = ReportDecoratorLevelText(self.module, "StandInLevelModel")
+        self.assertEqual(report(df), "\n".join([
+            "Invalid log level for following log messages:",
+            "Valid log levels are: info, debug, trace, warning, error, exception, critical",
+            "",
+            "File /src/module_1.py, line 2: Invalid log level bogus",
+            "",
+            "",
+            "Consider changing the log level of the following log messages:",
+            "",
+            "Started --> Consider to change log level to warning or error.",
+            "\t --> file: /src/module_0.py, line: 1",
+            "Failed --> Consider to change log level to debug or info.",
+            "\t --> file: /src/module_2.py, line: 3",
+            "Odd --> Consider to change log level to warning or error.",
+            "\t --> file: /src/module_0.py, line: 4",
+        ]))
+
+
+class TestLogQualityModel(unittest.TestCase):
+
+    def setUp(self):
+        configure_logging()
+        self.module = register_models()
+        self.log_lines = ["Started", "Done", "Started", "x", "Done", "Started"]
+
+    def test_predict_unique(self):
+        quality = LogQualityLevel(self.module, "StandInLevelModel")
+        self.assertListEqual(quality._predict(self.log_lines).tolist(), [len(l) % 2 for l in self.log_lines])
+        # Every distinct line once, the predictions are broadcast to its copies.
+        self.assertListEqual(quality.model.batches, [["Started", "Done", "x"]])
+        self.assertEqual((quality.lines_predicted, quality.unique_lines_predicted), (6, 3))
+        with self.assertRaises(IndexError):
+            quality._predict([])
+
+        ling = LogQualityLing(self.module, "StandInLingModel")
+        self.assertListEqual(list(ling._predict(self.log_lines)), StandInLingModel().predict_batch(self.log_lines))
+        self.assertListEqual(ling.model.batches, [["Started", "Done", "x"]])
+
+    def test_chunks(self):
+        distinct_lines = ["Line {:02d}".format(i) for i in range(10)]
+        log_lines = distinct_lines + distinct_lines[:4]
+        expected = LogQualityLevel(self.module, "StandInLevelModel", batch_size=None)._predict(log_lines).tolist()
+        line_memory = sys.getsizeof(distinct_lines[0])
+        test_cases = [
+            (None, None, [10]),
+            # The last chunk ends at the boundary.
+            (5, None, [5, 5]),
+            (3, None, [3, 3, 3, 1]),
+            (None, 3 * line_memory, [3, 3, 3, 1]),
+            (None, 3 * line_memory - 1, [2, 2, 2, 2, 2]),
+            # A line larger than max_memory is a chunk of its own.
+            (None, 1, [1] * 10),
+            (2, 3 * line_memory, [2, 2, 2, 2, 2]),
+        ]
+        for batch_size, max_memory, chunks in test_cases:
+            with self.subTest(batch_size=batch_size, max_memory=max_memory):
+                progress = []
+                quality = LogQualityLevel(self.module, "StandInLevelModel", batch_size=batch_size,
+                                          max_memory=max_memory, progress=lambda *args: progress.append(args))
+                self.assertListEqual(quality._predict(log_lines).tolist(), expected)
+                self.assertListEqual([len(b) for b in quality.model.batches], chunks)
+                self.assertListEqual([l for b in quality.model.batches for l in b], distinct_lines)
+                self.assertListEqual([done for _, done, _ in progress], np.cumsum(chunks).tolist())
+                self.assertTrue(all(total == 10 for _, _, total in progress))
+
+    def test_stream_prefetch(self):
+        rows = [("info", "Started"), ("error", "Failed"), ("info", "Started"), ("bogus", "Odd"),
+                # Nothing is left of this batch for the checks.
+                ("info", "*"), ("error", ""), ("info", "*"), ("debug", "*"),
+                ("warning", "Failed"), ("info", "Done"), ("info", "Started")]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_file = os.path.join(tmp_dir, "logs.csv")
+            get_log_lines(rows).to_csv(input_file, header=False, index=False)
+
+            def get_reports():
+                return {
+                    "level": ReportDecoratorLevelText(self.module, "StandInLevelModel"),
+                    "language": ReportDecoratorLingText(self.module, "StandInLingModel"),
+                }
+
+            expected_reports = get_reports()
+            expected_df = main._filter_log_messages(main._read_log_messages(input_file))
+            expected = {n: main._run_report(expected_reports, n, expected_df) for n in expected_reports}
+
+            reports = get_reports()
+            args = argparse.Namespace(input=input_file, stream_batch_size=4, stream_queue_size=1)
+            log_message_df = main._stream_log_messages(args, reports)
+            self.assertEqual(len(log_message_df), len(rows))
+            prefetched = {n: [l for b in r.log_quality.model.batches for l in b] for n, r in reports.items()}
+            # Lines seen in an earlier batch are not predicted again, invalid levels never.
+            self.assertListEqual(prefetched["level"], ["Started", "Failed", "Done"])
+            self.assertListEqual(prefetched["language"], ["Started", "Failed", "Odd", "Done"])
+
+            log_message_df = main._filter_log_messages(log_message_df)
+            for quality_name, report in reports.items():
+                with self.subTest(quality_name=quality_name):
+                    batches = list(report.log_quality.model.batches)
+                    self.assertEqual(main._run_report(reports, quality_name, log_message_df), expected[quality_name])
+                    # The report only looks the predictions up.
+                    self.assertListEqual(report.log_quality.model.batches, batches)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -64,10 +64,19 @@ def import_model(module_name, class_name, quality_type):
 def setup_command_line_arg():
     parser = argparse.ArgumentParser(description='Parse logs from source code.')
 
-    parser.add_argument('-i', '--input', type=str, required=True, help="input file path to read")
+    parser.add_argument('-i', '--input', type=str, required=True, help="input file path to read ('-' for stdin)")
     parser.add_argument('--quality_module_level', default="level_qulog_sm_rf", type=str, required=False, help="module for log level quality")
     parser.add_argument('--quality_class_level', default="LevelQulogSmRf", type=str, required=False, help="class name for log level quality")
     parser.add_argument('--quality_module_ling', default="ling_qulog_sm_rf", type=str, required=False, help="module for log linguistic quality")
     parser.add_argument('--quality_class_ling', default="LingQulogSmRf", type=str, required=False, help="class name for log linguistic quality")
+    parser.add_argument('--prediction_cache', default=None, type=str, required=False, help="path of the prediction cache database, shared across runs")
+    parser.add_argument('--prediction_cache_size', default=1000000, type=int, required=False, help="maximum number of cached predictions")
+    parser.add_argument('--batch-size', '--batch_size', dest="batch_size", default=10000, type=int, required=False, help="maximum number of log messages handed to a model at once (0 for no limit)")
+    parser.add_argument('--max-memory', '--max_memory', dest="max_memory", default=None, type=int, required=False, help="maximum size in MB of the log messages handed to a model at once")
+    parser.add_argument('--progress', action='store_true', help="print the progress of model inference")
+    parser.add_argument('--concurrency', default="none", choices=["none", "thread", "process"], required=False, help="run the level and linguistic checks concurrently in threads or processes")
+    parser.add_argument('--stream', action='store_true', help="check log messages batch by batch while they are still being retrieved")
+    parser.add_argument('--stream_batch_size', default=1000, type=int, required=False, help="number of log messages per batch in stream mode")
+    parser.add_argument('--stream_queue_size', default=8, type=int, required=False, help="maximum number of batches waiting to be checked in stream mode")
 
     return parser.parse_args()
\ No newline at end of file
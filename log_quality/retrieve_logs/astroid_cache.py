@@ -0,0 +1,188 @@
+import collections
+import logging as log
+import os
+
+import astroid
+
+
+class _LRUModuleCache(collections.OrderedDict):
+    """astroid.MANAGER.astroid_cache that keeps its modules in the order of last use."""
+
+    def __getitem__(self, modname):
+        module = super().__getitem__(modname)
+        self.move_to_end(modname)
+        return module
+
+    def pop(self, modname, *default):
+        # OrderedDict.pop of Python < 3.9 calls __getitem__ after removing the key.
+        if modname not in self:
+            if default:
+                return default[0]
+            raise KeyError(modname)
+        module = super().__getitem__(modname)
+        del self[modname]
+        return module
+
+
+def get_rss():
+    """Resident set size of the current process in bytes, or None if unknown."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class AstroidCachePolicy:
+    """Bounds the global astroid module cache of a worker process.
+
+    astroid.MANAGER caches every module it builds, the scanned files as well
+    as every module inference imports, for the lifetime of the process. The
+    policy keeps the cache in least recently used order and, after each
+    file, evicts modules beyond max_modules or max_bytes. Evicting goes down
+    to three quarters of the bounds, so it does not run after every file.
+    Pinned modules, e.g. logging, which every Logger inference needs, and
+    those added with pin are never evicted. Inference results cached by astroid may still reference
+    evicted trees, they are only freed along with the worker.
+
+    Bytes are the source size of the cached modules, a proxy for the size of
+    their trees. After recycle_files files or once the resident set size
+    exceeds recycle_rss bytes, after_file asks for the worker to be
+    recycled, i.e. replaced by a new process, see retrieve_files. A worker
+    that runs in the main process cannot be replaced, recycle clears its
+    astroid state instead. The memory freed this way stays with the process,
+    so the RSS limit is raised to the RSS left after the clear.
+    """
+    DEFAULT_PINNED = ("builtins", "logging")
+
+    def __init__(self, max_modules=None, max_bytes=None, pinned=DEFAULT_PINNED,
+                 recycle_files=None, recycle_rss=None):
+        self.max_modules = max_modules
+        self.max_bytes = max_bytes
+        self.pinned = tuple(pinned)
+        self._pinned_modules = set()
+        self.recycle_files = recycle_files
+        self.recycle_rss = recycle_rss
+
+        self._sizes = {}
+        self._files_since_recycle = 0
+        self._rss_limit = recycle_rss
+        self._recycle_requested = False
+        self.files = 0
+        self.evicted = 0
+        self.recycles = 0
+        self._installed = False
+
+    def install(self):
+        """Replace the module cache of astroid.MANAGER with one in LRU order."""
+        if self._installed:
+            return
+        cache = _LRUModuleCache(astroid.MANAGER.astroid_cache)
+        astroid.MANAGER.astroid_cache = cache
+        astroid.MANAGER.brain["astroid_cache"] = cache
+        self._installed = True
+
+    def uninstall(self):
+        if not self._installed:
+            return
+        cache = dict(astroid.MANAGER.astroid_cache)
+        astroid.MANAGER.astroid_cache = cache
+        astroid.MANAGER.brain["astroid_cache"] = cache
+        self._installed = False
+
+    def pin(self, modnames):
+        """Never evict the modules modnames, e.g. those of an AstroidWarmup."""
+        self._pinned_modules.update(modnames)
+
+    def is_pinned(self, modname):
+        return modname in self._pinned_modules or any(modname == p or modname.startswith(p + ".") for p in self.pinned)
+
+    def _get_size(self, modname, module):
+        size = self._sizes.get(modname)
+        if size is None:
+            size = 0
+            if module.file_bytes is not None:
+                size = len(module.file_bytes)
+            elif module.file and os.path.isfile(module.file):
+                size = os.path.getsize(module.file)
+            self._sizes[modname] = size
+        return size
+
+    def get_cache_size(self):
+        cache = astroid.MANAGER.astroid_cache
+        return sum(self._get_size(modname, module) for modname, module in cache.items())
+
+    def _is_over(self, modules, size, fraction=1.0):
+        return (
+            (self.max_modules is not None and modules > self.max_modules * fraction) or
+            (self.max_bytes is not None and size > self.max_bytes * fraction)
+        )
+
+    def evict(self):
+        """Evict the least recently used modules if the cache exceeds its bounds.
+
+        Returns the number of evicted modules.
+        """
+        cache = astroid.MANAGER.astroid_cache
+        size = self.get_cache_size()
+        if not self._is_over(len(cache), size):
+            return 0
+
+        evicted = 0
+        for modname in list(cache):
+            if not self._is_over(len(cache), size, 0.75):
+                break
+            if self.is_pinned(modname):
+                continue
+            size -= self._get_size(modname, cache.pop(modname))
+            self._sizes.pop(modname, None)
+            evicted += 1
+        self.evicted += evicted
+        return evicted
+
+    def recycle(self):
+        """Clear the astroid state of a worker that cannot be replaced."""
+        astroid.MANAGER.clear_cache()
+        self._sizes.clear()
+        self._files_since_recycle = 0
+        self._recycle_requested = False
+        if self.recycle_rss:
+            rss = get_rss()
+            if rss is not None:
+                self._rss_limit = max(self._rss_limit, rss)
+
+    def _is_recycle_due(self):
+        if self.recycle_files and self._files_since_recycle >= self.recycle_files:
+            log.debug("Recycling worker after %d files.", self._files_since_recycle)
+            return True
+        if self._rss_limit:
+            rss = get_rss()
+            if rss is not None and rss > self._rss_limit:
+                log.debug("Recycling worker at %d bytes RSS.", rss)
+                return True
+        return False
+
+    def after_file(self):
+        """Apply the policy after a file was retrieved.
+
+        Returns True once the worker is due to be recycled, only once until
+        it is recycled.
+        """
+        self.files += 1
+        self._files_since_recycle += 1
+        if not self._recycle_requested and self._is_recycle_due():
+            self._recycle_requested = True
+            self.recycles += 1
+            return True
+        self.evict()
+        return False
+
+    def get_stats(self):
+        return {
+            "files": self.files,
+            "modules": len(astroid.MANAGER.astroid_cache),
+            "bytes": self.get_cache_size(),
+            "evicted": self.evicted,
+            "recycles": self.recycles,
+            "rss": get_rss(),
+        }
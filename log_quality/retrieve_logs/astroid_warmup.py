@@ -0,0 +1,35 @@
+import logging as log
+
+import astroid
+
+
+class AstroidWarmup:
+    """Pre-built astroid trees of the modules every worker needs.
+
+    Inferring that a receiver is a logging.Logger makes astroid parse and
+    transform logging and the modules it imports, once in every worker
+    process. build puts the trees of modnames, and of every module they pull
+    in, into astroid.MANAGER.astroid_cache with ast_from_module_name, as
+    inference would. The main process builds them before it starts the
+    workers, so forked workers inherit the cache. Workers started otherwise
+    build it in their initializer.
+    """
+    DEFAULT_MODULES = (
+        "logging", "logging.handlers", "abc", "collections", "contextlib", "enum", "functools", "io", "os",
+        "threading", "traceback", "types",
+    )
+
+    def __init__(self, modnames=DEFAULT_MODULES):
+        self.modnames = tuple(modnames)
+
+    def build(self):
+        """Build the trees of modnames that are not cached yet.
+
+        Returns the names of the modules in the cache afterwards.
+        """
+        for modname in self.modnames:
+            try:
+                astroid.MANAGER.ast_from_module_name(modname)
+            except astroid.AstroidBuildingError as e:
+                log.info("Module %s is not added to the astroid warm-up: %s", modname, e)
+        return list(astroid.MANAGER.astroid_cache)
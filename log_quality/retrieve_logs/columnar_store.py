@@ -0,0 +1,251 @@
+import json
+import os
+
+import numpy as np
+
+# A columnar store is a directory with one file per column. Every column
+# file only grows, so retrievers append to it in place, and the committed
+# row counts in META_FILE are replaced atomically after each append. Bytes
+# a crashed writer left after the committed counts are cut off by the next
+# writer and never read.
+#
+#   lines.i32          line number of each record
+#   levels.i8          level of each record, an index into the levels of META_FILE
+#   files.i32          file of each record, an index into the path table
+#   message_ends.i64   end offset of each message in messages.bin
+#   message_nulls.i8   1 for each record without a message, which is stored empty
+#   messages.bin       the UTF-8 encoded messages, one contiguous blob
+#   path_ends.i64      end offset of each path in paths.bin
+#   paths.bin          the UTF-8 encoded absolute file paths
+#
+# log_quality/columnar_reader.py reads the stores into DataFrames, it has
+# to follow changes of the format.
+FORMAT_VERSION = 2
+META_FILE = "meta.json"
+_COLUMNS = {
+    "lines": ("lines.i32", np.int32),
+    "levels": ("levels.i8", np.int8),
+    "files": ("files.i32", np.int32),
+    "message_ends": ("message_ends.i64", np.int64),
+    "message_nulls": ("message_nulls.i8", np.int8),
+    "path_ends": ("path_ends.i64", np.int64),
+}
+_BLOBS = {
+    "messages": "messages.bin",
+    "paths": "paths.bin",
+}
+# The levels are stored as int8 codes, like pandas stores categories this few.
+MAX_LEVELS = 127
+
+
+class ColumnarStoreError(Exception):
+    pass
+
+
+def is_columnar_store(path):
+    return os.path.isfile(os.path.join(path, META_FILE))
+
+
+def _read_meta(path):
+    try:
+        with open(os.path.join(path, META_FILE), "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ColumnarStoreError("Unable to read columnar store {}: {}".format(path, e))
+    if meta.get("version") != FORMAT_VERSION:
+        raise ColumnarStoreError("Columnar store {} has version {}, expected {}.".format(
+            path, meta.get("version"), FORMAT_VERSION))
+    return meta
+
+
+def _committed_sizes(meta):
+    # Bytes of every file that belong to committed records.
+    rows, paths = meta["rows"], meta["paths"]
+    counts = {"lines": rows, "levels": rows, "files": rows, "message_ends": rows, "message_nulls": rows,
+              "path_ends": paths}
+    sizes = {name: counts[name] * np.dtype(dtype).itemsize for name, (_, dtype) in _COLUMNS.items()}
+    sizes["messages"] = meta["message_bytes"]
+    sizes["paths"] = meta["path_bytes"]
+    return sizes
+
+
+def _file_names():
+    names = {name: file_name for name, (file_name, _) in _COLUMNS.items()}
+    names.update(_BLOBS)
+    return names
+
+
+class ColumnarWriter:
+    """Appends records to a columnar store, creating it if missing.
+
+    writerows takes (line number, level, message, file) rows like a csv
+    writer, so it stands in for one in write_results. Messages that are no
+    strings are stored as their str(), missing ones as empty strings that
+    are marked in message_nulls.
+    """
+
+    def __init__(self, path, append=True):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        if append and is_columnar_store(path):
+            self._meta = _read_meta(path)
+        else:
+            self._meta = {"version": FORMAT_VERSION, "rows": 0, "paths": 0, "message_bytes": 0, "path_bytes": 0,
+                          "levels": []}
+        self._level_codes = {level: code for code, level in enumerate(self._meta["levels"])}
+        self._file_ids = {}
+        if self._meta["paths"]:
+            for file_id, file_path in enumerate(_decode_strings(*self._read_string_table("paths", "path_ends"))):
+                self._file_ids[file_path] = file_id
+        self._files = {}
+        for name, file_name in _file_names().items():
+            f = open(os.path.join(path, file_name), "ab")
+            f.truncate(_committed_sizes(self._meta)[name])
+            self._files[name] = f
+        self._commit()
+
+    def _read_string_table(self, blob, ends):
+        sizes = _committed_sizes(self._meta)
+        return (_map_blob(self.path, blob, sizes[blob]),
+                _map_column(self.path, ends, sizes[ends] // np.dtype(_COLUMNS[ends][1]).itemsize))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _get_level_code(self, level):
+        code = self._level_codes.get(level)
+        if code is None:
+            if len(self._level_codes) >= MAX_LEVELS:
+                raise ColumnarStoreError("More than {} distinct log levels.".format(MAX_LEVELS))
+            code = self._level_codes[level] = len(self._level_codes)
+            self._meta["levels"].append(level)
+        return code
+
+    def _get_file_id(self, file_path):
+        file_id = self._file_ids.get(file_path)
+        if file_id is None:
+            file_id = self._file_ids[file_path] = len(self._file_ids)
+            data = file_path.encode("utf-8", "surrogateescape")
+            self._meta["path_bytes"] += len(data)
+            self._files["paths"].write(data)
+            self._files["path_ends"].write(np.int64(self._meta["path_bytes"]).tobytes())
+        return file_id
+
+    def writerows(self, rows):
+        """Append the rows and commit them."""
+        lines, levels, files, message_ends, message_nulls, messages = [], [], [], [], [], []
+        message_bytes = self._meta["message_bytes"]
+        for line_number, level, message, file_path in rows:
+            data = ("" if message is None else str(message)).encode("utf-8", "surrogateescape")
+            message_bytes += len(data)
+            lines.append(line_number)
+            levels.append(self._get_level_code(level))
+            files.append(self._get_file_id(file_path))
+            message_ends.append(message_bytes)
+            message_nulls.append(message is None)
+            messages.append(data)
+        if not lines:
+            return
+        self._files["lines"].write(np.asarray(lines, dtype=np.int32).tobytes())
+        self._files["levels"].write(np.asarray(levels, dtype=np.int8).tobytes())
+        self._files["files"].write(np.asarray(files, dtype=np.int32).tobytes())
+        self._files["message_ends"].write(np.asarray(message_ends, dtype=np.int64).tobytes())
+        self._files["message_nulls"].write(np.asarray(message_nulls, dtype=np.int8).tobytes())
+        self._files["messages"].write(b"".join(messages))
+        self._meta["rows"] += len(lines)
+        self._meta["paths"] = len(self._file_ids)
+        self._meta["message_bytes"] = message_bytes
+        self._commit()
+
+    def _commit(self):
+        for f in self._files.values():
+            f.flush()
+        meta_path = os.path.join(self.path, META_FILE)
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(self._meta, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def close(self):
+        if not self._files:
+            return
+        self._commit()
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+
+def _decode_strings(data, ends):
+    # data is any buffer, the memory map of a blob is decoded without a copy.
+    data = memoryview(data)
+    starts = np.concatenate(([0], ends[:-1])) if len(ends) else ends
+    text = str(data, "utf-8", "surrogateescape")
+    if len(text) == len(data):
+        # ASCII only, byte offsets are character offsets.
+        return [text[s:e] for s, e in zip(starts.tolist(), ends.tolist())]
+    return [str(data[s:e], "utf-8", "surrogateescape") for s, e in zip(starts.tolist(), ends.tolist())]
+
+
+def _map_column(path, name, count):
+    file_name, dtype = _COLUMNS[name]
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(os.path.join(path, file_name), dtype=dtype, mode="r", shape=(count,))
+
+
+def _map_blob(path, name, size):
+    if size == 0:
+        return b""
+    return np.memmap(os.path.join(path, _BLOBS[name]), dtype=np.uint8, mode="r", shape=(size,))
+
+
+def read_columns(path):
+    """The committed columns of a columnar store as memory-mapped arrays.
+
+    Returns a dict with the lines, levels, files and message_nulls arrays and
+    the message_ends offsets, the memory-mapped messages blob and the levels
+    and paths tables as lists.
+    """
+    meta = _read_meta(path)
+    rows, paths = meta["rows"], meta["paths"]
+    return {
+        "lines": _map_column(path, "lines", rows),
+        "levels": _map_column(path, "levels", rows),
+        "files": _map_column(path, "files", rows),
+        "message_ends": _map_column(path, "message_ends", rows),
+        "message_nulls": _map_column(path, "message_nulls", rows),
+        "messages": _map_blob(path, "messages", meta["message_bytes"]),
+        "level_names": list(meta["levels"]),
+        "paths": _decode_strings(_map_blob(path, "paths", meta["path_bytes"]),
+                                 _map_column(path, "path_ends", paths)),
+    }
+
+
+def export_csv(path, output_file, output_header=False):
+    """Write the records of a columnar store in the combined CSV format of the retrievers."""
+    from utils import open_results
+
+    columns = read_columns(path)
+    messages = _decode_strings(columns["messages"], columns["message_ends"])
+    messages = [None if null else m for m, null in zip(messages, columns["message_nulls"].tolist())]
+    level_names, paths = columns["level_names"], columns["paths"]
+    with open_results(output_file, output_header) as writer:
+        writer.writerows(zip(columns["lines"].tolist(), (level_names[c] for c in columns["levels"].tolist()),
+                             messages, (paths[f] for f in columns["files"].tolist())))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Export a columnar store of retrieved logs as CSV.')
+    parser.add_argument('-i', '--input', type=str, required=True, help="columnar store directory to read")
+    parser.add_argument('-o', '--output', type=str, required=True, help="CSV file to write ('-' for stdout)")
+    parser.add_argument('--output_header', type=bool, default=False, help="add header line to output file (True / False)")
+    args = parser.parse_args()
+    export_csv(args.input, args.output, args.output_header)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import fnmatch
+import logging as log
+import os
+import re
+
+# Files with gitignore patterns. The tool-specific file excludes paths from
+# the check that are not ignored by git, e.g. tests or vendored modules.
+IGNORE_FILES = (".gitignore", ".logqualityignore")
+SCM_DIRS = frozenset({".git", ".svn", ".hg", "cvs"})
+# A directory with this file is a virtualenv.
+VIRTUALENV_MARKER = "pyvenv.cfg"
+
+
+def _translate(pattern):
+    """Regex of a gitignore glob. "*" and "?" do not match "/", "**" does."""
+    i, n = 0, len(pattern)
+    parts = []
+    while i < n:
+        c = pattern[i]
+        i += 1
+        if c == "*":
+            if pattern.startswith("*", i):
+                i += 1
+                if pattern.startswith("/", i):
+                    # "**/" matches no or any number of directories.
+                    i += 1
+                    parts.append("(?:.*/)?")
+                else:
+                    parts.append(".*")
+            else:
+                parts.append("[^/]*")
+        elif c == "?":
+            parts.append("[^/]")
+        elif c == "[":
+            # A "]" right after the "[" or its negation is a member.
+            start = i + 1 if pattern.startswith(("!", "^"), i) else i
+            end = pattern.find("]", start + 1)
+            if end < 0:
+                parts.append(re.escape(c))
+                continue
+            negate = start > i
+            chars = pattern[start:end].replace("\\", "\\\\").replace("[", "\\[")
+            i = end + 1
+            parts.append("[{}{}]".format("^" if negate else "", chars))
+        elif c == "\\" and i < n:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+        else:
+            parts.append(re.escape(c))
+    return "".join(parts)
+
+
+class IgnoreRule:
+    """A line of a gitignore file, matched against paths relative to base."""
+
+    def __init__(self, base, pattern):
+        self.base = base
+        self.negate = pattern.startswith("!")
+        if self.negate:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        # Patterns with a "/" other than at the end are relative to base,
+        # the others match a name in any directory below base.
+        self.anchored = "/" in pattern
+        self.regex = re.compile(_translate(pattern.lstrip("/")), re.DOTALL)
+
+    @classmethod
+    def parse(cls, base, lines):
+        rules = []
+        for line in lines:
+            line = line.rstrip("\n")
+            if not line.endswith("\\ "):
+                line = line.rstrip(" ")
+            # "\#" and "\!" start patterns with a literal "#" or "!".
+            if not line or line.startswith("#"):
+                continue
+            rules.append(cls(base, line))
+        return [r for r in rules if r.regex.pattern]
+
+    def matches(self, path, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+        relative = path[len(self.base) + 1:].replace(os.sep, "/")
+        if not self.anchored:
+            relative = relative.rsplit("/", 1)[-1]
+        return self.regex.fullmatch(relative) is not None
+
+
+def is_ignored(rules, path, is_dir):
+    """Whether the last rule matching the absolute path excludes it."""
+    for rule in reversed(rules):
+        if rule.matches(path, is_dir):
+            return not rule.negate
+    return False
+
+
+def read_ignore_rules(directory, ignore_files=IGNORE_FILES):
+    rules = []
+    for name in ignore_files:
+        try:
+            with open(os.path.join(directory, name), "r", errors="replace") as f:
+                rules.extend(IgnoreRule.parse(directory, f))
+        except OSError:
+            continue
+    return rules
+
+
+def _get_parent_rules(directory, ignore_files):
+    # The ignore files of the parents of a walked directory, up to the top
+    # of its git work tree, apply like git applies them.
+    parents = []
+    while not os.path.exists(os.path.join(directory, ".git")):
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            # Not in a work tree, only the ignore files below it count.
+            return []
+        directory = parent
+        parents.append(directory)
+    rules = []
+    for parent in reversed(parents):
+        rules.extend(read_ignore_rules(parent, ignore_files))
+    return rules
+
+
+class FileWalker:
+    """Lists the files to check below directories in a single os.scandir pass.
+
+    Directories excluded by the gitignore rules of IGNORE_FILES, version
+    control directories and virtualenvs are pruned without being listed.
+    Files pass if they have one of the extensions, match one of the name
+    patterns (shell globs, like find -name) and are not larger than
+    max_size bytes. walk yields their paths as it finds them.
+    """
+
+    def __init__(self, extensions=(".py",), name_patterns=None, max_size=None, exclude=(),
+                 ignore_files=IGNORE_FILES, ignore_scm=True, ignore_virtualenvs=True):
+        self.extensions = tuple(e.lower() for e in extensions)
+        self.name_patterns = list(name_patterns or [])
+        self.max_size = max_size
+        # Gitignore patterns that apply below every walked directory.
+        self.exclude = list(exclude)
+        self.ignore_files = tuple(ignore_files)
+        self.ignore_scm = ignore_scm
+        self.ignore_virtualenvs = ignore_virtualenvs
+        self.dirs_pruned = 0
+        # Files yielded by walk, also those a consumer drops, e.g. in git mode.
+        self.files_found = 0
+
+    def _accept_file(self, name, path):
+        # path is a DirEntry of the walk or a path given to walk.
+        if not name.lower().endswith(self.extensions):
+            return False
+        if self.name_patterns and not any(fnmatch.fnmatchcase(name, p) for p in self.name_patterns):
+            return False
+        if self.max_size is not None:
+            try:
+                size = path.stat().st_size if isinstance(path, os.DirEntry) else os.path.getsize(path)
+            except OSError:
+                return False
+            return size <= self.max_size
+        return True
+
+    def walk(self, paths):
+        """Yield the files to check below paths. Files in paths are checked themselves."""
+        for path in paths:
+            if os.path.isdir(path):
+                yield from self._walk_directory(path)
+            elif os.path.isfile(path):
+                if self._accept_file(os.path.basename(path), path):
+                    self.files_found += 1
+                    yield path
+            else:
+                log.error("File or directory does not exist: %s", path)
+
+    def _walk_directory(self, root):
+        absolute_root = os.path.abspath(root)
+        base_rules = _get_parent_rules(absolute_root, self.ignore_files) if self.ignore_files else []
+        base_rules += IgnoreRule.parse(absolute_root, self.exclude)
+        stack = [(root, absolute_root, base_rules)]
+        while stack:
+            directory, absolute_directory, rules = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError as e:
+                log.error("Unable to list directory %s: %s", directory, e)
+                continue
+            if self.ignore_virtualenvs and directory != root and any(e.name == VIRTUALENV_MARKER for e in entries):
+                self.dirs_pruned += 1
+                continue
+            if self.ignore_files and any(e.name in self.ignore_files for e in entries):
+                rules = rules + read_ignore_rules(absolute_directory, self.ignore_files)
+
+            subdirectories = []
+            for entry in entries:
+                absolute_path = os.path.join(absolute_directory, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    if (
+                        self.ignore_scm and entry.name.lower() in SCM_DIRS or
+                        is_ignored(rules, absolute_path, True)
+                    ):
+                        self.dirs_pruned += 1
+                    else:
+                        subdirectories.append((entry.path, absolute_path, rules))
+                elif (
+                    entry.is_file(follow_symlinks=False) and
+                    self._accept_file(entry.name, entry) and
+                    not is_ignored(rules, absolute_path, False)
+                ):
+                    self.files_found += 1
+                    yield entry.path
+            stack.extend(reversed(subdirectories))
@@ -0,0 +1,162 @@
+import functools
+import re
+
+# Conversion characters of the placeholder regexes of LogRetrieverPyAST.
+CONVERSION_CHARS = "diouxXeEfFgGcrs%a"
+
+_CONVERSION_REG = re.compile("[{}]".format(CONVERSION_CHARS))
+_PAREN_CONVERSION_REG = re.compile(r"\)[{}]".format(CONVERSION_CHARS))
+TEMPLATE_CACHE_SIZE = 4096
+
+
+class _NextIndex:
+    """Index of the next occurrence of a pattern at or after a position.
+
+    Positions must be queried in increasing order. The previous result is
+    reused while it is still ahead, so all queries together scan the string
+    once.
+    """
+    def __init__(self, value, find):
+        self._value = value
+        self._find = find
+        self._start = -1
+        self._index = -1
+
+    def __call__(self, pos):
+        if pos > self._index or self._start < 0:
+            self._start = pos
+            self._index = self._find(self._value, pos)
+        return self._index
+
+
+def _find_str(sub):
+    def find(value, pos):
+        index = value.find(sub, pos)
+        return len(value) if index < 0 else index
+    return find
+
+
+def _find_reg(reg):
+    def find(value, pos):
+        match = reg.search(value, pos)
+        return len(value) if match is None else match.start()
+    return find
+
+
+def _may_start(value, pos):
+    # (?<=[^\\]) or ^
+    return pos == 0 or value[pos - 1] != "\\"
+
+
+def tokenize_binop(value):
+    """Spans of the %-style placeholders, the matches of STRING_BINOP_VARABLE_REG.
+
+    Each alternative of the regex is decided with a constant number of
+    lookups of the next newline, conversion character or ")" followed by a
+    conversion character. Placeholders never span lines.
+    """
+    next_newline = _NextIndex(value, _find_str("\n"))
+    next_conversion = _NextIndex(value, _find_reg(_CONVERSION_REG))
+    next_paren_conversion = _NextIndex(value, _find_reg(_PAREN_CONVERSION_REG))
+
+    spans = []
+    pos = value.find("%")
+    while pos >= 0:
+        end = None
+        if _may_start(value, pos):
+            newline = next_newline(pos)
+            # %\(.*?\)[conv]
+            if value.startswith("(", pos + 1):
+                paren = next_paren_conversion(pos + 2)
+                if paren < newline:
+                    end = paren + 2
+            # %[conv]
+            if end is None and pos + 1 < len(value) and value[pos + 1] in CONVERSION_CHARS:
+                end = pos + 2
+            # %.*?.[conv]
+            if end is None:
+                conversion = next_conversion(pos + 2)
+                if conversion < newline:
+                    end = conversion + 1
+        if end is None:
+            pos = value.find("%", pos + 1)
+        else:
+            spans.append((pos, end))
+            pos = value.find("%", end)
+    return spans
+
+
+def tokenize_format(value):
+    """Spans of the str.format placeholders, the matches of STRING_FORMAT_VARABLE_REG."""
+    next_newline = _NextIndex(value, _find_str("\n"))
+    next_closing = _NextIndex(value, _find_str("}"))
+
+    spans = []
+    pos = value.find("{")
+    while pos >= 0:
+        end = None
+        # \{.*?\}
+        if _may_start(value, pos):
+            closing = next_closing(pos + 1)
+            if closing < next_newline(pos):
+                end = closing + 1
+        if end is None:
+            pos = value.find("{", pos + 1)
+        else:
+            spans.append((pos, end))
+            pos = value.find("{", end)
+    return spans
+
+
+class FormatTemplate:
+    """A format string split into the literal text around its placeholders."""
+
+    def __init__(self, literals, spans, start_char):
+        self.literals = literals
+        # Positions of the placeholders in the format string.
+        self.spans = spans
+        self._start_char = start_char
+
+    @property
+    def placeholders(self):
+        return len(self.literals) - 1
+
+    def is_opaque(self, arg):
+        """Whether substituting arg cannot change where later placeholders are found.
+
+        LogRetrieverPyAST._subst substitutes one placeholder at a time and
+        searches the result again. An argument could start a new placeholder
+        or, ending in a backslash, hide the next one. Backslashes are also
+        escapes in re.sub replacements.
+        """
+        return self._start_char not in arg and "\\" not in arg
+
+    def substitute(self, args, variable_token):
+        """Fill the placeholders with args, the ones left over with variable_token."""
+        parts = [self.literals[0]]
+        for i, literal in enumerate(self.literals[1:]):
+            parts.append(args[i] if i < len(args) else variable_token)
+            parts.append(literal)
+        return "".join(parts)
+
+
+def _split(value, spans):
+    literals = []
+    pos = 0
+    for start, end in spans:
+        literals.append(value[pos:start])
+        pos = end
+    literals.append(value[pos:])
+    return tuple(literals)
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_binop_template(value):
+    spans = tuple(tokenize_binop(value))
+    return FormatTemplate(_split(value, spans), spans, "%")
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_format_template(value):
+    spans = tuple(tokenize_format(value))
+    return FormatTemplate(_split(value, spans), spans, "{")
@@ -0,0 +1,90 @@
+import bisect
+import codecs
+import os
+import re
+import subprocess
+
+# Header of a hunk of a diff with -U0: the first line and the number of
+# lines on the new side. Pure deletions have a count of 0.
+_HUNK_REG = re.compile(rb"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+
+class GitError(Exception):
+    pass
+
+
+def _git(args, cwd=None):
+    try:
+        process = subprocess.run(["git", "-c", "core.quotepath=off"] + args, cwd=cwd,
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        raise GitError("Unable to run git: {}".format(e))
+    if process.returncode != 0:
+        raise GitError("git {} failed: {}".format(" ".join(args), process.stderr.decode(errors="replace").strip()))
+    return process.stdout
+
+
+def _unquote(path):
+    # git quotes paths with special characters C-style.
+    if path.startswith(b'"') and path.endswith(b'"'):
+        return codecs.escape_decode(path[1:-1])[0]
+    return path
+
+
+def parse_diff(diff, top_dir):
+    """{absolute path: [(first, last line)]} of the added and changed lines of a -U0 diff without prefixes."""
+    changed_lines = {}
+    ranges = None
+    for line in diff.splitlines():
+        if line.startswith(b"+++ "):
+            path = _unquote(line[4:].rstrip(b"\t"))
+            if path == b"/dev/null":
+                ranges = None
+                continue
+            ranges = changed_lines.setdefault(os.path.realpath(os.path.join(top_dir, os.fsdecode(path))), [])
+        elif line.startswith(b"@@") and ranges is not None:
+            match = _HUNK_REG.match(line)
+            if not match:
+                continue
+            first = int(match.group(1))
+            count = int(match.group(2)) if match.group(2) is not None else 1
+            if count > 0:
+                ranges.append((first, first + count - 1))
+    return changed_lines
+
+
+def get_changed_lines(changed_since=None, staged=False, cwd=None):
+    """The lines added or changed in the working tree since the revision
+    changed_since, or in the index if staged, by real file path.
+
+    Files that were only deleted or renamed without changes have no lines.
+    The files are retrieved from the working tree, so with staged, files
+    that also have unstaged changes raise a GitError: their lines in the
+    working tree are not those of the index.
+    """
+    if not staged and not changed_since:
+        raise ValueError("Either a revision or staged is required.")
+    top_dir = os.path.realpath(os.fsdecode(_git(["rev-parse", "--show-toplevel"], cwd).strip()))
+    args = ["diff", "--no-color", "--no-ext-diff", "--no-prefix", "-U0", "--diff-filter=ACMR"]
+    args += ["--cached"] if staged else [changed_since, "--"]
+    changed_lines = parse_diff(_git(args, top_dir), top_dir)
+    if staged:
+        unstaged = _git(["diff", "--no-ext-diff", "--name-only", "-z"], top_dir).split(b"\0")
+        unstaged = sorted(p for p in (os.path.realpath(os.path.join(top_dir, os.fsdecode(f)))
+                                      for f in unstaged if f) if p in changed_lines)
+        if unstaged:
+            raise GitError("Files with staged and unstaged changes, stage or stash them first: {}".format(
+                ", ".join(unstaged)))
+    return changed_lines
+
+
+def in_ranges(line_number, ranges):
+    """Whether line_number is in one of the sorted, disjoint (first, last) ranges."""
+    i = bisect.bisect_right(ranges, (line_number, float("inf"))) - 1
+    return i >= 0 and ranges[i][0] <= line_number <= ranges[i][1]
+
+
+def overlaps_ranges(first, last, ranges):
+    """Whether one of the lines first to last is in one of the sorted, disjoint (first, last) ranges."""
+    i = bisect.bisect_right(ranges, (last, float("inf"))) - 1
+    return i >= 0 and ranges[i][1] >= first
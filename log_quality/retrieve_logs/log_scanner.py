@@ -0,0 +1,100 @@
+import logging as log
+import re
+
+# Strings are matched with their escapes, so quotes, parentheses and "#"
+# inside them do not count. Prefixes (r, b, f, ...) do not change where a
+# string ends.
+_STRING_REG = r"""\"\"\"(?:\\.|[^\\])*?\"\"\"|'''(?:\\.|[^\\])*?'''|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'"""
+
+# The lookahead lets the regex engine skip to the next character that can
+# start a token, instead of trying every alternative at every position.
+_TOKEN_REG = re.compile(
+    r"""(?=["'#()\n])(?:(?P<string>{})|(?P<comment>#[^\n]*)|(?P<open>\()|(?P<close>\))|(?P<newline>\n))"""
+    .format(_STRING_REG),
+    re.DOTALL,
+)
+
+
+def _get_name_before(text, end):
+    start = end
+    while start > 0 and (text[start - 1].isalnum() or text[start - 1] == "_"):
+        start -= 1
+    return text[start:end]
+
+
+class LogScanner:
+    """Finds the complete log statements of a python source in a single pass.
+
+    A log statement starts at the line of a call "<name>(", e.g.
+    "log.debug(", of a name in call_names outside of strings and comments.
+    It ends with the first line at which its parentheses are balanced again,
+    like LogRetriever.get_log_line decides. The regex walks the buffer once, tracking string, comment and
+    parenthesis state, so the time is linear in its size, also for files
+    that are too large or too broken for astroid.
+
+    A statement is the concatenation of its stripped lines without comments.
+    Statements of more than multiline_max lines, with more closing than
+    opening parentheses or that are still open at the end of the buffer are
+    skipped.
+    """
+
+    def __init__(self, call_names, multiline_max=5):
+        self.call_names = frozenset(call_names)
+        self.multiline_max = multiline_max
+
+    def scan(self, text):
+        """Yield (line number, statement) of the log statements in text."""
+        line_number = 1
+        line_start = 0
+        depth = 0
+        # Of the statement being scanned: its start line, offset of that
+        # line, parenthesis depth before it and comment spans.
+        start_line = None
+        start_offset = 0
+        start_depth = 0
+        comments = []
+
+        for match in _TOKEN_REG.finditer(text):
+            kind = match.lastgroup
+            if kind == "open":
+                if start_line is None and _get_name_before(text, match.start()) in self.call_names:
+                    start_line, start_offset, start_depth = line_number, line_start, depth
+                    comments = []
+                depth += 1
+            elif kind == "close":
+                depth -= 1
+            elif kind == "comment":
+                if start_line is not None:
+                    comments.append(match.span())
+            elif kind == "string":
+                line_number += match.group().count("\n")
+            else:
+                if start_line is not None:
+                    end = match.start()
+                    if depth <= start_depth:
+                        if depth == start_depth:
+                            yield start_line, self._get_statement(text, start_offset, end, comments)
+                        else:
+                            log.info("Skipping log line %d: more closing than opening parentheses", start_line)
+                        start_line = None
+                    elif line_number - start_line + 1 >= self.multiline_max:
+                        log.info("Skipping log line %d: maximum number for multiline logs (%d) reached",
+                                 start_line, self.multiline_max)
+                        start_line = None
+                line_number += 1
+                line_start = match.end()
+
+        if start_line is not None:
+            if depth == start_depth:
+                yield start_line, self._get_statement(text, start_offset, len(text), comments)
+            else:
+                log.info("Skipping log line %d: log line incomplete but EOF reached", start_line)
+
+    @staticmethod
+    def _get_statement(text, start, end, comments):
+        parts = []
+        for comment_start, comment_end in comments:
+            parts.append(text[start:comment_start])
+            start = comment_end
+        parts.append(text[start:end])
+        return "".join(line.strip() for line in "".join(parts).split("\n"))
@@ -0,0 +1,104 @@
+"""Log messages as flat lists of literal strings and placeholders.
+
+The retrievers resolve a message expression to a list of segments and join
+it once, instead of concatenating strings while resolving. Placeholders
+stand for the parts of a message that are not known statically and are
+rendered as the variable token, so their positions in the message are
+available after joining.
+"""
+
+
+class Placeholder:
+    """A variable part of a log message."""
+    # An expression that could not be resolved.
+    UNRESOLVED = "unresolved"
+    # A placeholder of a format string without argument.
+    MISSING = "missing"
+    # An argument that resolved to the empty string.
+    EMPTY = "empty"
+
+    __slots__ = ("kind",)
+
+    def __init__(self, kind):
+        self.kind = kind
+
+    def __eq__(self, other):
+        if not isinstance(other, Placeholder):
+            return NotImplemented
+        return self.kind == other.kind
+
+    def __hash__(self):
+        return hash(self.kind)
+
+    def __repr__(self):
+        return "Placeholder({!r})".format(self.kind)
+
+
+def _get_text(segment, variable_token):
+    if isinstance(segment, str):
+        return segment
+    if isinstance(segment, Placeholder):
+        return variable_token
+    return str(segment)
+
+
+def join_segments(segments, variable_token):
+    return "".join([_get_text(s, variable_token) for s in segments])
+
+
+def get_placeholder_spans(segments, variable_token):
+    """Positions of the placeholders in the joined message."""
+    spans = []
+    pos = 0
+    for segment in segments:
+        end = pos + len(_get_text(segment, variable_token))
+        if isinstance(segment, Placeholder):
+            spans.append((pos, end))
+        pos = end
+    return spans
+
+
+def substitute_segments(segments, spans, args, variable_token):
+    """Replace the spans of the joined segments with the segment lists args.
+
+    Spans are the positions of the placeholders of a format string in the
+    joined text, in increasing order. Spans without argument become MISSING
+    placeholders. A placeholder of segments that a span cuts is kept as
+    literal text.
+    """
+    texts = [_get_text(s, variable_token) for s in segments]
+    result = []
+    index = 0
+    start = 0  # Position of segments[index] in the joined text.
+
+    def copy(region_start, region_end):
+        nonlocal index, start
+        # Segments that end before the region are not visited again.
+        while index < len(texts):
+            stop = start + len(texts[index])
+            if stop > region_start or (stop == region_start and not texts[index]):
+                break
+            index += 1
+            start = stop
+        i, pos = index, start
+        while i < len(texts) and (pos < region_end or (pos == region_end and not texts[i])):
+            stop = pos + len(texts[i])
+            if isinstance(segments[i], Placeholder) and region_start <= pos and stop <= region_end:
+                result.append(segments[i])
+            else:
+                text = texts[i][max(region_start, pos) - pos:min(region_end, stop) - pos]
+                if text:
+                    result.append(text)
+            i += 1
+            pos = stop
+
+    region_start = 0
+    for i, (span_start, span_end) in enumerate(spans):
+        copy(region_start, span_start)
+        if i < len(args):
+            result.extend(args[i])
+        else:
+            result.append(Placeholder(Placeholder.MISSING))
+        region_start = span_end
+    copy(region_start, sum(len(t) for t in texts))
+    return result
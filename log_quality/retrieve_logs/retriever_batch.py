@@ -0,0 +1,592 @@
+import functools
+import gc
+import hashlib
+import json
+import logging as log
+import os
+import re
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from utils import *
+from retriever_py_ast import LogRetrieverPyAST, get_ast, may_contain_logs
+from retriever_py_tiered import LogRetrieverPyTiered, get_stdlib_ast
+from retriever_py_tokens import LogRetrieverPyTokens
+from astroid_cache import AstroidCachePolicy
+from astroid_warmup import AstroidWarmup
+from scan_cache import ScanCache
+from symbol_index import SymbolIndex
+from git_changes import GitError, get_changed_lines, overlaps_ranges
+from file_walker import IGNORE_FILES, FileWalker
+
+# Symbol index of the scan and astroid cache policy of the worker process.
+# They are set once per worker instead of being sent along with every file.
+_symbol_index = None
+_astroid_cache_policy = None
+# Start of the worker: the modules of the astroid warm-up, the time it took and, once the first file is retrieved, its latency.
+_worker_start = None
+
+# "from . import ..." and the like, anywhere in a file.
+_RELATIVE_IMPORT = re.compile(rb"^[ \t]*from[ \t]+\.", re.MULTILINE)
+
+# Retrievers of the files, see retrieve_file.
+TIER_AST = "ast"
+TIER_TIERED = "tiered"
+TIER_TOKENS = "tokens"
+
+
+def _init_worker(symbol_index=None, astroid_cache_policy=None, astroid_warmup=None):
+    global _symbol_index, _astroid_cache_policy, _worker_start
+    _symbol_index = symbol_index
+    start = time.monotonic()
+    # Forked workers inherit the trees the main process built.
+    modules = astroid_warmup.build() if astroid_warmup else []
+    _worker_start = {"warm_modules": len(modules), "startup_time": time.monotonic() - start}
+    if _astroid_cache_policy is not None:
+        _astroid_cache_policy.uninstall()
+    _astroid_cache_policy = astroid_cache_policy
+    if astroid_cache_policy is not None:
+        astroid_cache_policy.pin(modules)
+        astroid_cache_policy.install()
+
+
+def _retrieve(input_file, tier=TIER_AST, options=None):
+    if tier == TIER_TOKENS:
+        lr = LogRetrieverPyTokens(file_path=input_file, symbol_index=_symbol_index, **(options or {}))
+        if not lr.walk_file(input_file):
+            log.error("Parsing of log messages failed. File: %s", input_file)
+        return lr
+    if tier == TIER_TIERED:
+        ast = get_stdlib_ast(input_file)
+        lr = LogRetrieverPyTiered(file_path=input_file, symbol_index=_symbol_index, **(options or {}))
+    else:
+        ast = get_ast(input_file)
+        lr = LogRetrieverPyAST(file_path=input_file, symbol_index=_symbol_index, **(options or {}))
+    if not ast:
+        log.error("AST parsing failed for python file: %s", input_file)
+        return None
+
+    try:
+        lr.walk(ast)
+    except Exception as e:
+        log.error("Parsing of log messages failed. File: %s", input_file)
+        log.exception(e)
+
+    return lr
+
+
+def get_tier(input_file, tiered=False, large_file_size=None):
+    """The retriever of a file: TIER_TOKENS for files larger than
+    large_file_size bytes, otherwise TIER_TIERED or TIER_AST."""
+    if large_file_size and os.path.getsize(input_file) > large_file_size:
+        return TIER_TOKENS
+    return TIER_TIERED if tiered else TIER_AST
+
+
+def retrieve_file(input_file, scan_cache=None, prefilter=True, tiered=False, options=None, large_file_size=None,
+                  end_lines=False):
+    """Retrieve the log messages of a single python file.
+
+    Runs inside a worker process, so a single interpreter (with astroid
+    already imported) processes many files. Returns the retrieved
+    messages and a dict with information about how they were obtained.
+    options holds keyword arguments of the retriever, e.g. inference budgets.
+    Files larger than large_file_size bytes are retrieved by the streaming
+    LogRetrieverPyTokens instead of building a tree of the whole file.
+    With end_lines, the info of retrieved messages has the last line of
+    every call as "end_line_numbers".
+    """
+    info = {}
+
+    if not file_exist(input_file):
+        log.error("File does not exist or is not a file: %s", input_file)
+        return input_file, [], [], [], info
+
+    if not is_python_file(input_file):
+        log.error("Only python files are supported. This is not a python file: %s", input_file)
+        return input_file, [], [], [], info
+
+    if prefilter and not may_contain_logs(input_file):
+        info["skipped"] = True
+        return input_file, [], [], [], info
+
+    if scan_cache:
+        with open(input_file, "rb") as f:
+            content = f.read()
+        cache_key = scan_cache.key(content, get_context_key(input_file, content, _symbol_index))
+        cached = scan_cache.get(cache_key)
+        if cached:
+            info["cached"] = True
+            if end_lines:
+                info["end_line_numbers"] = cached[3]
+            return (input_file,) + cached[:3] + (info,)
+
+    tier = get_tier(input_file, tiered, large_file_size)
+    start = time.monotonic()
+    lr = _retrieve(input_file, tier, options)
+    retrieve_time = time.monotonic() - start
+    if _astroid_cache_policy is not None:
+        if _astroid_cache_policy.after_file():
+            info["recycle"] = True
+        info["worker"] = os.getpid()
+        if "first_file_time" not in _worker_start:
+            _worker_start["first_file_time"] = retrieve_time
+            info["worker_start"] = _worker_start
+        info["astroid_cache"] = _astroid_cache_policy.get_stats()
+    if not lr:
+        return input_file, [], [], [], info
+    result = lr.line_numbers, lr.log_levels, lr.log_messages
+    info["tier"] = tier
+    info["nodes_visited"] = lr.nodes_visited
+    info["walk_time"] = lr.walk_time
+    if end_lines:
+        info["end_line_numbers"] = lr.end_line_numbers
+
+    if lr.budgets_exceeded:
+        # Degraded results depend on timing, they are not worth caching.
+        info["budgets_exceeded"] = sorted(lr.budgets_exceeded)
+    elif scan_cache:
+        scan_cache.put(cache_key, *result, lr.end_line_numbers)
+    return (input_file,) + result + (info,)
+
+
+def _get_size(input_file):
+    try:
+        return os.path.getsize(input_file)
+    except OSError:
+        return -1
+
+
+def order_largest_first(input_files):
+    """The files by descending size. Missing files come last, files of the same size keep their order."""
+    return sorted(input_files, key=_get_size, reverse=True)
+
+
+def get_context_key(input_file, content, symbol_index=None):
+    """What the results of a file depend on besides its content, as a string.
+
+    Relative imports are resolved in the package of the file, so the
+    directory of a file that has them is part of the key. With a
+    symbol_index, so are the loggers and constants the file imports from
+    the other scanned files.
+    """
+    context = {}
+    if _RELATIVE_IMPORT.search(content):
+        context["package"] = os.path.dirname(os.path.abspath(input_file))
+    if symbol_index:
+        loggers, constants = symbol_index.get_file_symbols(input_file)
+        context["symbols"] = [sorted(loggers), sorted(constants.items())]
+    return json.dumps(context, sort_keys=True)
+
+
+def _hash_file(input_file, symbol_index=None):
+    try:
+        with open(input_file, "rb") as f:
+            content = f.read()
+    except OSError:
+        return None
+    h = hashlib.sha256(content)
+    h.update(b"\0")
+    h.update(get_context_key(input_file, content, symbol_index).encode())
+    return h.digest()
+
+
+def find_duplicates(input_files, symbol_index=None):
+    """Split input_files by content.
+
+    Returns the files whose content did not occur before, in their order,
+    and {file: [later files with the same content]}. Only files that have
+    the size of another file are read and hashed. Files with the same
+    content are only duplicates if they also have the same context, see
+    get_context_key.
+    """
+    sizes = {}
+    for input_file in input_files:
+        try:
+            sizes[input_file] = os.path.getsize(input_file)
+        except OSError:
+            sizes[input_file] = None
+    size_counts = Counter(sizes.values())
+
+    unique = []
+    duplicates = {}
+    first_files = {}
+    for input_file in input_files:
+        size = sizes[input_file]
+        digest = _hash_file(input_file, symbol_index) if size is not None and size_counts[size] > 1 else None
+        if digest is None:
+            unique.append(input_file)
+        elif (size, digest) in first_files:
+            duplicates.setdefault(first_files[size, digest], []).append(input_file)
+        else:
+            first_files[size, digest] = input_file
+            unique.append(input_file)
+    return unique, duplicates
+
+
+def retrieve_files(input_files, parallelism=1, queue_size=None, scan_cache=None, prefilter=True,
+                   tiered=False, options=None, symbol_index=None, astroid_cache_policy=None,
+                   astroid_warmup=None, large_file_size=None, largest_first=False, dedupe=False,
+                   end_lines=False):
+    """Yield the retrieval result of every file, in the order of input_files.
+
+    With dedupe, a file with the content of an earlier file, e.g. a vendored
+    copy, is not retrieved again, unless its relative imports or imported
+    symbols differ, see find_duplicates. Its results follow the result of
+    the first file, with the info {"duplicate_of": first file}.
+
+    With largest_first and several workers, the files are handed to the
+    workers by descending size, so the slowest files do not start last. A
+    slow file then only occupies its own worker, the others keep pulling
+    files. The results are still yielded in the order of input_files: those
+    that finish before the results of earlier files wait for them.
+
+    At most queue_size files are being retrieved at any time (default: four
+    per worker). A slow consumer therefore stalls the workers instead of letting
+    finished results pile up in memory. symbol_index is a SymbolIndex of
+    the scanned files and astroid_cache_policy an AstroidCachePolicy; every
+    worker gets them once, the policy as its own copy. The trees of
+    astroid_warmup, an AstroidWarmup, are built before the workers start,
+    the policy never evicts them. A worker that the policy recycles is
+    replaced by a new process.
+    Files larger than large_file_size bytes are retrieved from their tokens.
+    end_lines adds the last lines of the calls to the info, see retrieve_file.
+    """
+    duplicates = {}
+    if dedupe:
+        input_files, duplicates = find_duplicates(input_files, symbol_index)
+    results = _retrieve_files(input_files, parallelism, queue_size, scan_cache, prefilter, tiered, options,
+                              symbol_index, astroid_cache_policy, astroid_warmup, large_file_size, largest_first,
+                              end_lines)
+    for result in results:
+        yield result
+        for duplicate in duplicates.get(result[0], ()):
+            info = {"duplicate_of": result[0]}
+            if "end_line_numbers" in result[4]:
+                info["end_line_numbers"] = result[4]["end_line_numbers"]
+            yield (duplicate,) + result[1:4] + (info,)
+
+
+def _retrieve_files(input_files, parallelism, queue_size, scan_cache, prefilter, tiered, options,
+                    symbol_index, astroid_cache_policy, astroid_warmup, large_file_size, largest_first, end_lines):
+    retrieve = functools.partial(retrieve_file, scan_cache=scan_cache, prefilter=prefilter, tiered=tiered,
+                                 options=options, large_file_size=large_file_size, end_lines=end_lines)
+    if astroid_warmup:
+        astroid_warmup.build()
+        # The trees live as long as the workers. Frozen, the collections
+        # of forked workers do not touch their pages.
+        gc.freeze()
+    if parallelism <= 1:
+        _init_worker(symbol_index, astroid_cache_policy, astroid_warmup)
+        try:
+            for result in map(retrieve, input_files):
+                if result[4].get("recycle"):
+                    astroid_cache_policy.recycle()
+                yield result
+        finally:
+            _init_worker()
+        return
+
+    queue_size = queue_size or 4 * parallelism
+    with _WorkerPool(parallelism, (symbol_index, astroid_cache_policy, astroid_warmup)) as executor:
+        if largest_first:
+            yield from _retrieve_largest_first(executor, retrieve, list(input_files), queue_size)
+            return
+        pending = deque()
+        for input_file in input_files:
+            if len(pending) >= queue_size:
+                yield executor.result(pending.popleft())
+            pending.append(executor.submit(retrieve, input_file))
+        while pending:
+            yield executor.result(pending.popleft())
+
+
+class _WorkerPool:
+    """Worker processes that are replaced once one of them is due to be recycled.
+
+    A ProcessPoolExecutor cannot replace a single worker, so the whole pool
+    is: the following files go to a new pool, the old one is shut down once
+    the results of the files it was given are taken. (shutdown(wait=False)
+    breaks the pending futures of Python 3.8.)
+    """
+
+    def __init__(self, parallelism, initargs):
+        self.parallelism = parallelism
+        self.initargs = initargs
+        self._old_executors = []
+        self._recycle = False
+        self._executor = self._start()
+        # Executor of every future whose result is not taken yet.
+        self._pending = {}
+
+    def _start(self):
+        return ProcessPoolExecutor(max_workers=self.parallelism, initializer=_init_worker, initargs=self.initargs)
+
+    def submit(self, fn, *args):
+        if self._recycle:
+            self._recycle = False
+            self._old_executors.append(self._executor)
+            self._executor = self._start()
+        future = self._executor.submit(fn, *args)
+        self._pending[future] = self._executor
+        return future
+
+    def result(self, future):
+        """The result of a future of submit, noting whether its worker is due to be recycled."""
+        executor = self._pending.pop(future)
+        result = future.result()
+        if executor is self._executor:
+            if result[4].get("recycle"):
+                self._recycle = True
+        elif all(e is not executor for e in self._pending.values()):
+            executor.shutdown()
+            self._old_executors.remove(executor)
+        return result
+
+    def shutdown(self, wait=True):
+        for executor in self._old_executors + [self._executor]:
+            executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        return False
+
+
+def _retrieve_largest_first(executor, retrieve, input_files, queue_size):
+    # Submitted by descending size, yielded by their index in input_files.
+    order = sorted(range(len(input_files)), key=lambda i: _get_size(input_files[i]), reverse=True)
+    pending = {}
+    finished = {}
+    next_index = 0
+
+    def collect():
+        nonlocal next_index
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            finished[pending.pop(future)] = executor.result(future)
+        while next_index in finished:
+            yield finished.pop(next_index)
+            next_index += 1
+
+    for i in order:
+        while len(pending) >= queue_size:
+            yield from collect()
+        pending[executor.submit(retrieve, input_files[i])] = i
+    while pending:
+        yield from collect()
+
+
+def _get_scan_cache(args):
+    if not args.cache_dir:
+        return None
+    config = {
+        "retriever_version": LogRetrieverPyAST.VERSION,
+        "logging_modules": sorted(LogRetrieverPyAST.DEFAULT_LOGGING_MODULES),
+        "tiered": args.tiered,
+        "large_file_mb": args.large_file_mb,
+        "logger_inference": args.logger_inference,
+        "logger_name_patterns": list(args.logger_name_pattern or LogRetrieverPyAST.DEFAULT_LOGGER_NAME_PATTERNS),
+    }
+    return ScanCache(args.cache_dir, args.cache_max_size * 1024 * 1024, config)
+
+
+def _get_retriever_options(args):
+    return {
+        "max_inferred_values": args.max_inferred_values,
+        "infer_timeout": args.infer_timeout,
+        "file_timeout": args.file_timeout,
+        "logger_inference": args.logger_inference,
+        "logger_name_patterns": args.logger_name_pattern or LogRetrieverPyAST.DEFAULT_LOGGER_NAME_PATTERNS,
+    }
+
+
+def _get_astroid_cache_policy(args):
+    megabyte = 1024 * 1024
+    return AstroidCachePolicy(
+        max_modules=args.astroid_cache_max_modules,
+        max_bytes=args.astroid_cache_max_mb * megabyte if args.astroid_cache_max_mb else None,
+        pinned=AstroidCachePolicy.DEFAULT_PINNED + tuple(LogRetrieverPyAST.DEFAULT_LOGGING_MODULES),
+        recycle_files=args.recycle_files,
+        recycle_rss=args.recycle_rss_mb * megabyte if args.recycle_rss_mb else None,
+    )
+
+
+def _get_astroid_warmup(args):
+    if not args.warm_cache:
+        return None
+    return AstroidWarmup(args.warm_module or AstroidWarmup.DEFAULT_MODULES)
+
+
+def _get_file_walker(args):
+    return FileWalker(
+        name_patterns=args.name_filter,
+        max_size=args.max_file_mb * 1024 * 1024 if args.max_file_mb else None,
+        exclude=args.exclude or (),
+        ignore_files=() if args.no_ignore_files else IGNORE_FILES,
+        ignore_scm=not args.no_ignore_scm,
+    )
+
+
+def _get_input_files(args, walker):
+    """The files to retrieve and, in git mode, {absolute path: changed line ranges}.
+
+    The files found by walker below args.paths are an iterator, which yields
+    them while the walk goes on. In git mode, the changed python files are
+    retrieved, or those of the input files that changed.
+    """
+    if args.paths:
+        input_files = walker.walk(args.paths)
+    else:
+        input_files = read_file_list(args.input, args.null) if args.input else None
+    if not args.changed_since and not args.staged:
+        return input_files, None
+    changed_lines = get_changed_lines(args.changed_since, args.staged)
+    if input_files is None:
+        return sorted(f for f in changed_lines if is_python_file(f)), changed_lines
+    changed_files = (f for f in input_files if os.path.realpath(f) in changed_lines)
+    return list(changed_files) if isinstance(input_files, list) else changed_files, changed_lines
+
+
+def _filter_changed_lines(input_file, line_numbers, end_line_numbers, log_levels, log_messages, changed_lines):
+    # A call is kept if one of its lines changed, e.g. only the message on
+    # the line after logging.info(.
+    ranges = changed_lines.get(os.path.realpath(input_file), [])
+    rows = [r[1:] for r in zip(end_line_numbers, line_numbers, log_levels, log_messages)
+            if overlaps_ranges(r[1], r[0], ranges)]
+    return tuple(list(c) for c in zip(*rows)) or ([], [], [])
+
+
+def main():
+    args = setup_batch_command_line_arg()
+
+    if not args.paths and not args.input and not args.changed_since and not args.staged:
+        log.error("Directories to walk, an input file list (-i) or a git mode (--changed_since, --staged) "
+                  "is required.")
+        sys.exit(2)
+    walker = _get_file_walker(args)
+    try:
+        input_files, changed_lines = _get_input_files(args, walker)
+    except GitError as e:
+        log.error(e)
+        sys.exit(1)
+    if not isinstance(input_files, list) and (not args.no_dedupe or args.largest_first or args.symbol_index):
+        # These need all files before the first one is retrieved: dedupe
+        # hashes only the files whose size another file has, so it knows
+        # every size first. Only with --no_dedupe and without
+        # --largest_first and --symbol_index the walk streams.
+        input_files = list(input_files)
+    file_count = len(input_files) if isinstance(input_files, list) else None
+    output_file = args.output
+    if args.output_format == "columnar" and output_file == "-":
+        log.error("A columnar store is a directory, it cannot be written to stdout.")
+        sys.exit(2)
+    parallelism = args.parallelism or get_default_parallelism(args.worker_memory_mb * 1024 * 1024)
+    if file_count is not None:
+        # Small change sets, e.g. of a pre-commit hook, do not start idle workers.
+        parallelism = max(1, min(parallelism, file_count))
+    sys.stderr.write("Workers: {}{}.\n".format(parallelism, "" if args.parallelism else " (default of the cgroup)"))
+    symbol_index = None
+    if args.symbol_index:
+        start = time.monotonic()
+        symbol_index = SymbolIndex.build([f for f in input_files if is_python_file(f)],
+                                         LogRetrieverPyAST.DEFAULT_LOGGING_MODULES,
+                                         LogRetrieverPyAST.DEFAULT_GET_LOGGER_ATTR)
+        sys.stderr.write("Symbol index: {} modules, {} loggers, {} constants in {:.1f}s.\n".format(
+            *symbol_index.get_stats(), time.monotonic() - start))
+    scan_cache = _get_scan_cache(args)
+    astroid_warmup = _get_astroid_warmup(args)
+    processed = 0
+    cache_hits = 0
+    skipped = 0
+    duplicates = 0
+    budgets_exceeded = []
+    nodes_visited = 0
+    walk_time = 0.0
+    astroid_cache_stats = {}
+    worker_starts = []
+    tiers = {}
+    large_files = []
+
+    with open_results(output_file, args.output_header, args.output_format) as writer:
+        results = retrieve_files(input_files, parallelism, args.queue_size, scan_cache,
+                                 not args.no_prefilter, args.tiered, _get_retriever_options(args), symbol_index,
+                                 _get_astroid_cache_policy(args), astroid_warmup,
+                                 int(args.large_file_mb * 1024 * 1024) or None, args.largest_first,
+                                 not args.no_dedupe, changed_lines is not None)
+        for c, (input_file, line_numbers, log_levels, log_messages, info) in enumerate(results, 1):
+            processed = c
+            sys.stderr.write("Files processed: {}{}\r".format(c, " / {}".format(file_count) if file_count else ""))
+            cache_hits += info.get("cached", False)
+            skipped += info.get("skipped", False)
+            duplicates += "duplicate_of" in info
+            nodes_visited += info.get("nodes_visited", 0)
+            walk_time += info.get("walk_time", 0.0)
+            if "tier" in info:
+                tiers[info["tier"]] = tiers.get(info["tier"], 0) + 1
+                if info["tier"] == TIER_TOKENS:
+                    large_files.append(input_file)
+            if "worker_start" in info:
+                worker_starts.append(info["worker_start"])
+            if "astroid_cache" in info:
+                astroid_cache_stats[info["worker"]] = info["astroid_cache"]
+            if "budgets_exceeded" in info:
+                budgets_exceeded.append((input_file, info["budgets_exceeded"]))
+            if changed_lines is not None:
+                line_numbers, log_levels, log_messages = _filter_changed_lines(
+                    input_file, line_numbers, info.get("end_line_numbers", line_numbers), log_levels, log_messages,
+                    changed_lines)
+            if line_numbers:
+                write_results(writer, input_file, line_numbers, log_levels, log_messages)
+                if output_file == "-":
+                    # Hand the records to the consumer as soon as the file is done.
+                    sys.stdout.flush()
+    sys.stderr.write("\n")
+
+    if args.paths:
+        sys.stderr.write("File walk: {} files found, {} directories pruned.\n".format(
+            walker.files_found, walker.dirs_pruned))
+    if not args.no_dedupe:
+        sys.stderr.write("Dedupe: {} of {} files skipped, they are copies of other files.\n".format(
+            duplicates, processed))
+    if not args.no_prefilter:
+        sys.stderr.write("Pre-filter: {} of {} files skipped, they contain no logging calls.\n".format(
+            skipped, processed))
+    sys.stderr.write("Walk: {} nodes visited in {:.1f}s ({:.0f} nodes/s).\n".format(
+        nodes_visited, walk_time, nodes_visited / walk_time if walk_time else 0.0))
+    sys.stderr.write("Tiers: {}.\n".format(", ".join(
+        "{} files by {}".format(count, tier) for tier, count in sorted(tiers.items())) or "no files retrieved"))
+    if large_files:
+        sys.stderr.write("Large files (> {} MB) retrieved from their tokens, messages with names are "
+                         "unresolved:\n".format(args.large_file_mb))
+        for input_file in large_files:
+            sys.stderr.write("    {}\n".format(input_file))
+    if worker_starts:
+        sys.stderr.write("Worker start: {:.0f} modules of the astroid warm-up ready in {:.2f}s, first file "
+                         "retrieved in {:.2f}s (mean of {} workers).\n".format(
+                             *(sum(s[k] for s in worker_starts) / len(worker_starts)
+                               for k in ("warm_modules", "startup_time", "first_file_time")),
+                             len(worker_starts)))
+    for worker, stats in sorted(astroid_cache_stats.items()):
+        rss = "{:.0f} MB".format(stats["rss"] / 1024 / 1024) if stats["rss"] is not None else "unknown"
+        sys.stderr.write("Astroid cache of worker {}: {} modules ({:.1f} MB source), {} evicted, {} recycles "
+                         "after {} files, RSS {}.\n".format(
+                             worker, stats["modules"], stats["bytes"] / 1024 / 1024, stats["evicted"],
+                             stats["recycles"], stats["files"], rss))
+    if budgets_exceeded:
+        sys.stderr.write("Inference budget exceeded in {} files, their messages are incomplete:\n".format(
+            len(budgets_exceeded)))
+        for input_file, budgets in budgets_exceeded:
+            sys.stderr.write("    {} ({})\n".format(input_file, ", ".join(budgets)))
+    if scan_cache:
+        evicted = scan_cache.evict()
+        sys.stderr.write("Scan cache: {} of {} files unchanged, {} entries evicted.\n".format(
+            cache_hits, processed, evicted))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import logging as log
 
 from utils import *
 from retriever import LogRetriever
+from log_scanner import LogScanner
 
 log.basicConfig(level=log.DEBUG)
 
@@ -24,11 +25,20 @@ class LogRetrieverPy(LogRetriever):
     def get_comment_regex(self):
         return self.reg_comment
 
-    def retrieve_log_lines(self, lines):
-        regex_elements = []
-        for key in self.log_level_aliases:
-            for value_element in self.log_level_aliases[key]:
-                regex_elements.append(self.reg_log_start.replace(self.placeholder, value_element))
-        regex_result = "|".join(regex_elements)
-        return self._retrieve_log_lines(lines, regex_result)
+    def get_log_call_names(self):
+        return [alias for aliases in self.log_level_aliases.values() for alias in aliases]
+
+    def get_log_start_regex(self):
+        return "|".join(self.reg_log_start.replace(self.placeholder, name) for name in self.get_log_call_names())
+
+    def retrieve_log_lines_regex(self, lines):
+        """Retrieve the log lines line by line with regexes, see LogRetriever.get_log_line."""
+        return self._retrieve_log_lines(lines, self.get_log_start_regex())
 
+    def scan_log_lines(self, text):
+        """(line number, log statement) of the log statements in a source buffer, see LogScanner."""
+        return list(LogScanner(self.get_log_call_names(), self.multiline_max).scan(text))
+
+    def retrieve_log_lines(self, lines):
+        text = "".join(line if line.endswith("\n") else line + "\n" for line in lines)
+        return [log_line for _, log_line in self.scan_log_lines(text)]
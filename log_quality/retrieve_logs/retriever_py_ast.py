@@ -1,16 +1,44 @@
+import contextlib
 import logging as log
+import mmap
+import os
 import re
+import signal
+import threading
+import time
 
 import astroid
 
 from utils import *
+from format_template import compile_binop_template, compile_format_template
+from message_segments import Placeholder, get_placeholder_spans, join_segments, substitute_segments
 
 
 class LogInstructionParseError(Exception):
     """Error raised whenever a log instruction cannot be parsed."""
 
 
+class InferenceBudgetExceeded(astroid.InferenceError):
+    """Error raised when an inference budget runs out.
+
+    It is an astroid.InferenceError, so whatever could not be inferred
+    degrades to the variable token.
+    """
+
+
+class _InferenceTimeout(BaseException):
+    # Raised from the SIGALRM handler. A BaseException is not swallowed by
+    # the "except Exception" handlers within astroid.
+    pass
+
+
+def _raise_inference_timeout(signum, frame):
+    raise _InferenceTimeout()
+
+
 class LogRetrieverPyAST:
+    # Bump whenever the retrieved output changes. This invalidates scan caches.
+    VERSION = 4
     DEFAULT_LOGGING_MODULES = { "logging", "oslo_log" }
     DEFAULT_GET_LOGGER_ATTR = { "getLogger" }
     DEFAULT_LOG_LEVEL_ALIASES = {
@@ -28,8 +56,30 @@ class LogRetrieverPyAST:
                                r'(?<=[^\\])%\(.*?\)[diouxXeEfFgGcrs%a]|'\
                                r'(?<=[^\\])%[diouxXeEfFgGcrs%a]|'\
                                r'(?<=[^\\])%.*?.[diouxXeEfFgGcrs%a]'
+    _TEMPLATE_COMPILERS = {
+        STRING_FORMAT_VARABLE_REG: compile_format_template,
+        STRING_BINOP_VARABLE_REG: compile_binop_template,
+    }
     
-    def __init__(self, logging_modules=DEFAULT_LOGGING_MODULES, variable_token="*", file_path=None):
+    LOGGER_METHOD_NAMES = frozenset(
+        {a for aliases in DEFAULT_LOG_LEVEL_ALIASES.values() for a in aliases} | {"log"})
+    # Which calls that are not syntactically log calls are inferred to be
+    # logging.Logger methods, see _may_be_logger_method.
+    LOGGER_INFERENCE_ALL = "all"
+    LOGGER_INFERENCE_GATED = "gated"
+    LOGGER_INFERENCE_NONE = "none"
+    LOGGER_INFERENCE_MODES = (LOGGER_INFERENCE_ALL, LOGGER_INFERENCE_GATED, LOGGER_INFERENCE_NONE)
+    # Receivers named e.g. LOG, logger, self._log or audit_logger.
+    DEFAULT_LOGGER_NAME_PATTERNS = (r"(?i)(?:^|_)log(?:ger)?(?:$|_)",)
+
+    BUDGET_VALUES = "values"
+    BUDGET_CALL_TIME = "call_time"
+    BUDGET_FILE_TIME = "file_time"
+
+    def __init__(self, logging_modules=DEFAULT_LOGGING_MODULES, variable_token="*", file_path=None,
+                 max_inferred_values=None, infer_timeout=None, file_timeout=None,
+                 logger_inference=LOGGER_INFERENCE_GATED, logger_name_patterns=DEFAULT_LOGGER_NAME_PATTERNS,
+                 symbol_index=None):
         self.file_path = file_path
         # The code being checked can just as easily "import logging as foo",
         # so it is necessary to process the imports and store in this field
@@ -48,11 +98,45 @@ class LogRetrieverPyAST:
 
         self.variable_token = variable_token
 
+        if logger_inference not in self.LOGGER_INFERENCE_MODES:
+            raise ValueError("Invalid logger inference: {}".format(logger_inference))
+        self.logger_inference = logger_inference
+        self._logger_name_regs = [re.compile(p) for p in logger_name_patterns]
+        self._bound_method_names = set()
+        # Of the module being walked: the (target name, value name) pairs of
+        # its assignments and the calls that wait for all of them, see
+        # _visit_deferred_calls.
+        self._assignments = []
+        self._deferred_calls = None
+
+        # Inference budgets: the number of values and seconds a single
+        # infer() call may take, and the seconds the whole file may take
+        # from the creation of the retriever. None is unlimited.
+        self.max_inferred_values = max_inferred_values
+        self.infer_timeout = infer_timeout
+        self._file_deadline = time.monotonic() + file_timeout if file_timeout else None
+        self.budgets_exceeded = set()
+
+        # Loggers and string constants the file imports from other scanned
+        # files, see SymbolIndex. They are used without inference.
+        self._indexed_constants = {}
+        if symbol_index is not None and file_path:
+            loggers, self._indexed_constants = symbol_index.get_file_symbols(file_path)
+            self._logging_module_aliases.update(loggers)
+
         self._assign_state = None
+        self._visitors = self._get_visitors()
+        self.nodes_visited = 0
+        self.walk_time = 0.0
 
         self.line_numbers = []
+        # The last line of every call, e.g. of a message continued on
+        # the next lines.
+        self.end_line_numbers = []
         self.log_levels = []
         self.log_messages = []
+        # The messages as segments, see message_segments.
+        self.log_segments = []
 
         self.result = {
             "log_message": [],
@@ -70,31 +154,99 @@ class LogRetrieverPyAST:
     def get_exception(self, msg, node):
         return LogInstructionParseError(self._get_message(msg, node))
 
-    def walk(self, astroid):
-        """call visit events of astroid checkers for the given node, recurse on
-        its children, then leave events.
+    def walk(self, node):
+        """call visit events for the given node and all its descendants, in
+        depth-first order.
+
+        An explicit stack of child iterators takes the place of recursion, so
+        deeply nested code does not hit the recursion limit. An exception
+        raised while visiting a node or listing its children skips the rest
+        of that subtree, like it did in the recursive walk.
         """
-        try:
-            # generate events for this node on each checker
-            self.visit(astroid)
-            # recurse on children
-            for child in astroid.get_children():
-                self.walk(child)
-        except Exception as e:
-            log.exception(e)
+        start = time.perf_counter()
+        stack = [iter((node,))]
+        while stack:
+            try:
+                node = next(stack[-1])
+            except StopIteration:
+                stack.pop()
+                continue
+            except Exception as e:
+                log.exception(e)
+                stack.pop()
+                continue
+
+            self.nodes_visited += 1
+            try:
+                self.visit(node)
+                stack.append(iter(self._get_children(node)))
+            except Exception as e:
+                log.exception(e)
+        if self._deferred_calls is not None:
+            self._visit_deferred_calls()
+        self.walk_time += time.perf_counter() - start
+
+    def _get_children(self, node):
+        return node.get_children()
+
+    def _get_visitors(self):
+        """Dispatch table of visit, mapping node types to their handlers."""
+        return {
+            astroid.Import: self._visit_import_node,
+            astroid.ImportFrom: self._visit_importfrom_node,
+            astroid.Call: self._visit_call_node,
+            astroid.AssignName: self._visit_assignname_node,
+            astroid.Assign: self._visit_assign_node,
+            astroid.AnnAssign: self._visit_assign_node,
+            astroid.NamedExpr: self._visit_assign_node,
+            astroid.Module: self._visit_module_node,
+        }
 
     def visit(self, node):
-        if isinstance(node, astroid.Import):
-            self.visit_import(node)
-            self._assign_state = None
-        elif isinstance(node, astroid.ImportFrom):
-            self.visit_importfrom(node)
-            self._assign_state = None
-        elif isinstance(node, astroid.Call):
-            self.visit_call(node)
-            self._assign_state = None
-        elif isinstance(node, astroid.AssignName):
-            self._assign_state = node.name
+        node_type = type(node)
+        if node_type not in self._visitors:
+            # Types missing from the table are handled like their closest base.
+            self._visitors[node_type] = next(
+                (self._visitors[t] for t in node_type.__mro__[1:] if self._visitors.get(t)), None)
+        visitor = self._visitors[node_type]
+        if visitor is not None:
+            visitor(node)
+
+    def _visit_import_node(self, node):
+        self.visit_import(node)
+        self._assign_state = None
+
+    def _visit_importfrom_node(self, node):
+        self.visit_importfrom(node)
+        self._assign_state = None
+
+    def _visit_call_node(self, node):
+        self.visit_call(node)
+        self._assign_state = None
+
+    def _visit_assignname_node(self, node):
+        self._assign_state = node.name
+
+    def _visit_assign_node(self, node):
+        value, _ = self._get_gate_names(node.value)
+        if value is None:
+            return
+        targets = node.targets if isinstance(node, astroid.Assign) else [node.target]
+        for target in targets:
+            if isinstance(target, astroid.AssignName):
+                self._assignments.append((target.name, value))
+            elif isinstance(target, astroid.AssignAttr):
+                self._assignments.append((target.attrname, value))
+
+    def _visit_module_node(self, node):
+        self._bound_method_names = set()
+        self._assignments = []
+        self._deferred_calls = []
+
+    def get_walk_stats(self):
+        nodes_per_second = self.nodes_visited / self.walk_time if self.walk_time else 0.0
+        return "{} nodes visited in {:.2f}s ({:.0f} nodes/s).".format(
+            self.nodes_visited, self.walk_time, nodes_per_second)
 
     def visit_import(self, node):
         """Check if logging module is imported. Check potential aliases."""
@@ -140,7 +292,7 @@ class LogRetrieverPyAST:
         
         def is_logger_class():
             try:
-                for inferred in node.func.infer():
+                for inferred in self._infer(node.func):
                     if isinstance(inferred, astroid.BoundMethod):
                         parent = inferred._proxied.parent
                         if isinstance(parent, astroid.ClassDef) and (
@@ -170,6 +322,10 @@ class LogRetrieverPyAST:
         if not name and check_logging_name(node.func):
             name = node.func.name
         if not name:
+            gate_names = self._get_gate_names(node.func)
+            if not self._may_be_logger_method(*gate_names):
+                self._defer_call(LogRetrieverPyAST.visit_call, node, gate_names[0])
+                return
             result, name = is_logger_class()
             if not result:
                 return
@@ -184,12 +340,96 @@ class LogRetrieverPyAST:
 
         args = node.args[1:]
         if len(args) > 0:
-            log_message = self._resolve_logging_args(log_message, args)
+            log_message = self._resolve_logging_args(log_message, args, node)
 
-        self.log_messages.append(log_message)
+        self._add_log_message(log_message, level, line_number, node.tolineno)
+
+    def _add_log_message(self, segments, level, line_number, end_line_number=None):
+        # Joined before the empty strings are dropped: they mark a
+        # concatenation, which is a string even of one constant, e.g. f"{5}".
+        self.log_messages.append(self._join_segments(segments))
+        self.log_segments.append([s for s in segments if s != ""])
         self.log_levels.append(level)
         self.line_numbers.append(line_number)
+        self.end_line_numbers.append(end_line_number or line_number)
+
+
+    def _may_be_logger_method(self, name, receiver_name):
+        """Cheap check whether a call is worth inferring to be a logging.Logger method.
 
+        Depending on logger_inference, all calls, no calls or only calls
+        passing the gate are inferred. The gate passes calls of methods named
+        like a log method (e.g. self.log.info), of names assigned from one
+        (e.g. w in w = LOG.warn), and of any method of a receiver matching the
+        logger name patterns.
+        """
+        if self.logger_inference == self.LOGGER_INFERENCE_ALL:
+            return True
+        if self.logger_inference == self.LOGGER_INFERENCE_NONE:
+            return False
+        if name in self.LOGGER_METHOD_NAMES or name in self._bound_method_names:
+            return True
+        return receiver_name is not None and any(r.search(receiver_name) for r in self._logger_name_regs)
+
+    @staticmethod
+    def _get_gate_names(func):
+        """The called name and the name of its receiver, e.g. (info, log) for self.log.info."""
+        if isinstance(func, astroid.Attribute):
+            if isinstance(func.expr, astroid.Name):
+                return func.attrname, func.expr.name
+            if isinstance(func.expr, astroid.Attribute):
+                return func.attrname, func.expr.attrname
+            return func.attrname, None
+        if isinstance(func, astroid.Name):
+            return func.name, None
+        return None, None
+
+    def _defer_call(self, visit_call, node, name):
+        # The gate failed, but an assignment later in the module may bind
+        # name to a log method, e.g. self.report = LOG.warning in __init__.
+        if (
+            self._deferred_calls is not None and name is not None and
+            self.logger_inference == self.LOGGER_INFERENCE_GATED
+        ):
+            self._deferred_calls.append((len(self.line_numbers), visit_call, node, name))
+
+    def _visit_deferred_calls(self):
+        """Visit the deferred calls whose name turned out to be a bound method
+        name, once the walk collected all assignments of the module.
+
+        Their records are inserted where the walk would have added them.
+        """
+        deferred, self._deferred_calls = self._deferred_calls, None
+        self._bound_method_names = self._resolve_bound_method_names(self._assignments)
+        offset = 0
+        for index, visit_call, node, name in deferred:
+            if name not in self._bound_method_names:
+                continue
+            count = len(self.line_numbers)
+            self._assign_state = None
+            try:
+                visit_call(self, node)
+            except Exception as e:
+                log.exception(e)
+            added = len(self.line_numbers) - count
+            for records in (self.line_numbers, self.end_line_numbers, self.log_levels, self.log_messages,
+                            self.log_segments):
+                records[index + offset:index + offset] = records[count:]
+                del records[count + added:]
+            offset += added
+
+    def _resolve_bound_method_names(self, assignments):
+        """Names assigned from an attribute named like a log method, e.g. w in
+        w = LOG.warn, or from another such name, e.g. self.report in self.report = w.
+
+        assignments is a list of (target name, value name) pairs.
+        """
+        names = set()
+        while True:
+            found = {t for t, v in assignments if v in self.LOGGER_METHOD_NAMES or v in names}
+            if found <= names:
+                return names
+            names |= found
 
     def _parse_log_instruction(self, node, name):
         if name == "log":
@@ -210,85 +450,143 @@ class LogRetrieverPyAST:
             raise self.get_exception("Unable to parse log message.", node)
         level = self.alias_to_level[level]
 
-        log_message_node = node.args[format_pos]
-        log_message = self._parse_log_message(log_message_node)
-        if log_message:
-            log_message = log_message.value
-        else:
-            log.info(self._get_message("Unsable to parse log message", node))
-            log_message = self.variable_token
+        log_message = self._resolve_message(node.args[format_pos])
         line_number = node.lineno  
 
         return (log_message, level, line_number)
 
+    # Kinds of message expressions, see _get_message_parts.
+    _PART_CONST = "const"
+    _PART_CONCAT = "concat"
+    _PART_FORMAT = "format"
+    _PART_UNRESOLVED = "unresolved"
+    _PART_INFER = "infer"
 
-    def _parse_log_message(self, node):
-        if not node:
-            return None
+    def _resolve_message(self, node):
+        """Resolve a message expression to a flat list of segments.
+
+        Segments are strings and Placeholders, see message_segments. An
+        expression that is a single constant which is not a string, e.g.
+        LOG.info(5), resolves to a list with just that value.
+
+        The expression is evaluated with an explicit stack. Operands of a
+        concatenation append to the list of the concatenation itself, so
+        only format strings are joined before the message is complete.
+        """
+        segments = []
+        # Entries are (node, segments to append to, nodes inferred to reach
+        # node) or format operations waiting for their operand and arguments.
+        stack = [(node, segments, None)]
+        while stack:
+            entry = stack.pop()
+            if entry[0] is self._PART_FORMAT:
+                _, reg, operand, args, out, format_node = entry
+                out.extend(self._format_segments(reg, operand, args, format_node))
+                continue
+            node, out, inferred_from = entry
+            part = self._get_message_parts(node)
+            kind = part[0]
+            if kind == self._PART_CONST:
+                out.append(part[1])
+            elif kind == self._PART_CONCAT:
+                # Concatenations are strings, even of a single constant.
+                out.append("")
+                stack.extend((n, out, None) for n in reversed(part[1]))
+            elif kind == self._PART_FORMAT:
+                _, reg, operand_node, arg_nodes = part
+                operand = []
+                args = [[] for _ in arg_nodes]
+                stack.append((self._PART_FORMAT, reg, operand, args, out, node))
+                stack.extend((n, a, None) for n, a in reversed(list(zip(arg_nodes, args))))
+                stack.append((operand_node, operand, None))
+            elif kind == self._PART_UNRESOLVED:
+                if part[1]:
+                    log.info(self._get_message(part[1], node))
+                out.append(Placeholder(Placeholder.UNRESOLVED))
+            else:
+                inferred_from = inferred_from or set()
+                # Values such as lists or instances infer to themselves.
+                inferred = None if id(node) in inferred_from else self._infer_message_node(node)
+                if inferred:
+                    inferred_from.add(id(node))
+                    stack.append((inferred, out, inferred_from))
+                else:
+                    log.info(self._get_message("Unable to parse.", node))
+                    out.append(Placeholder(Placeholder.UNRESOLVED))
+        return segments
+
+    def _get_message_parts(self, node):
+        """The kind of a message expression and what it is made of.
+
+        (_PART_CONST, value), (_PART_CONCAT, nodes),
+        (_PART_FORMAT, placeholder regex, format string node, argument nodes),
+        (_PART_UNRESOLVED, log message or None) or (_PART_INFER,).
+        """
+        if node is None:
+            return self._PART_UNRESOLVED, None
         if isinstance(node, astroid.Const):
-            return node
+            return self._PART_CONST, node.value
         if isinstance(node, astroid.FormattedValue):
-            return self._parse_log_message(node.value)
+            return self._PART_CONCAT, [node.value]
         if (
             isinstance(node, astroid.Call) and 
             isinstance(node.func, astroid.Attribute) and
             node.func.attrname == "format"
         ):
-            node = self._parse_format_attr(node.func, node.args)
-            node = self._parse_log_message(node)
-        elif isinstance(node, astroid.JoinedStr):
-            node = self._parse_joinedstr(node)
-            node = self._parse_log_message(node)
-        elif isinstance(node, astroid.BinOp) and node.op == '%':
-            if isinstance(node.right, astroid.Tuple):
-                node = self._parse_binop_format(node.left, node.right.elts)
-            else:
-                node = self._parse_binop_format(node.left, [node.right])
-            node = self._parse_log_message(node)
-        elif isinstance(node, astroid.BinOp) and node.op == '+':
-            left = self._parse_log_message(node.left)
-            if left:
-                left = left.value
-            else:
-                left = self.variable_token
-            right = self._parse_log_message(node.right)
-            if right:
-                right = right.value
-            else:
-                right = self.variable_token
-            value = str(left) + str(right)
-            new_node = astroid.Const(lineno=node.lineno, col_offset=node.col_offset, 
-                    parent=node.parent, value=value)
-            node = self._parse_log_message(new_node)
-        elif (
-            isinstance(node, astroid.Dict) or 
-            isinstance(node, astroid.FunctionDef) or
-            isinstance(node, astroid.ClassDef)
-        ):
-            log.info(self._get_message("Cannot parse.", node))
-            return astroid.Const(lineno=node.lineno, col_offset=node.col_offset, 
-                    parent=node.parent, value=self.variable_token)
-        elif isinstance(node, astroid.FunctionDef):
-            log.info(self._get_message("Cannot parse function definition.", node))
-            return astroid.Const(lineno=node.lineno, col_offset=node.col_offset, 
-                    parent=node.parent, value=self.variable_token)
-        else:
-            #print(node.repr_tree(), node.lineno)
-            inferred = self._safe_infer(node)
-            #print(inferred.repr_tree())
-            if inferred:
-                node = self._clone_node(node, inferred)
-            else:
-                log.info(self._get_message("Unable to parse.", node))
-                node = astroid.Const(lineno=node.lineno, col_offset=node.col_offset, 
-                            parent=node.parent, value=self.variable_token)
-            node = self._parse_log_message(node)
-        return node
-
-    def _infer_or_const(self, node):
-        
-        return node
-
+            return self._PART_FORMAT, self.STRING_FORMAT_VARABLE_REG, node.func.expr, node.args
+        if isinstance(node, astroid.JoinedStr):
+            return self._PART_CONCAT, [
+                v.value if isinstance(v, astroid.FormattedValue) else v for v in node.values]
+        if isinstance(node, astroid.BinOp) and node.op == '%':
+            elts = node.right.elts if isinstance(node.right, astroid.Tuple) else [node.right]
+            return self._PART_FORMAT, self.STRING_BINOP_VARABLE_REG, node.left, elts
+        if isinstance(node, astroid.BinOp) and node.op == '+':
+            return self._PART_CONCAT, [node.left, node.right]
+        if isinstance(node, (astroid.Dict, astroid.FunctionDef, astroid.ClassDef)):
+            return self._PART_UNRESOLVED, "Cannot parse."
+        if isinstance(node, astroid.Name) and node.name in self._indexed_constants:
+            return self._PART_CONST, self._indexed_constants[node.name]
+        return (self._PART_INFER,)
+
+    def _infer_message_node(self, node):
+        return self._safe_infer(node)
+
+    def _format_message(self, reg, operand, arg_nodes, node):
+        """Substitute the resolved arg_nodes into the segments operand."""
+        args = [self._resolve_message(a) for a in arg_nodes]
+        return self._format_segments(reg, operand, args, node)
+
+    def _format_segments(self, reg, operand, args, node):
+        if self._is_constant(operand):
+            raise self.get_exception("Unable to format constant {!r}.".format(operand[0]), node)
+        text = join_segments(operand, self.variable_token)
+        arg_texts = []
+        for i, arg in enumerate(args):
+            arg_text = join_segments(arg, self.variable_token)
+            if arg_text == "":
+                args[i] = [Placeholder(Placeholder.EMPTY)]
+                arg_text = self.variable_token
+            arg_texts.append(arg_text)
+
+        template = self._TEMPLATE_COMPILERS[reg](text)
+        if "\\" in self.variable_token or not all(template.is_opaque(a) for a in arg_texts):
+            # Substituting one argument at a time may differ, see
+            # FormatTemplate.is_opaque. Placeholders are lost here.
+            return ["", self._subst_regex(reg, arg_texts, text)]
+        return substitute_segments(operand, template.spans, args, self.variable_token)
+
+    @staticmethod
+    def _is_constant(segments):
+        return len(segments) == 1 and not isinstance(segments[0], (str, Placeholder))
+
+    def _join_segments(self, segments):
+        if self._is_constant(segments):
+            return segments[0]
+        return join_segments(segments, self.variable_token)
+
+    def get_placeholder_spans(self):
+        """Positions of the placeholders in each retrieved message."""
+        return [get_placeholder_spans(s, self.variable_token) for s in self.log_segments]
 
     def _infer_log_level(self, arg):
         """Infer log level when e.g. logging.log(<level>, msg...) statement is given."""
@@ -310,63 +608,25 @@ class LogRetrieverPyAST:
         return level
 
 
-    def _clone_node(self, node, new_node):
-        new_node.lineno = node.lineno
-        new_node.col_offset = node.col_offset
-        new_node.parent = node.parent
-        return new_node
-
-
-    def _parse_joinedstr(self, arg):
-        all_values = []
-        for v in arg.values:
-            v = self._parse_log_message(v)
-            if v:
-                all_values.append(v)
-            else:
-                all_values.append(astroid.Const(lineno=arg.lineno, col_offset=arg.col_offset, 
-                        parent=arg.parent, value=self.variable_token))
-        value = "".join([v.value for v in all_values])
-        new_node = astroid.Const(lineno=arg.lineno, col_offset=arg.col_offset, 
-                parent=arg.parent, value=value)
-        return new_node
-
-
-    def _parse_arg_list(self, arg_list):
-        all_args = []
-        for a in arg_list:
-            a = self._parse_log_message(a)
-            if a and a.value != '':
-                all_args.append(a.value)
-            else:
-                all_args.append(self.variable_token)
-        return all_args
-
-
-    def _parse_format_attr(self, attr, args):
-        expr = self._parse_log_message(attr.expr)
-        if not expr:
-            return None
-
-        parsed_args = self._parse_arg_list(args)
-        value = self._subst(self.STRING_FORMAT_VARABLE_REG, parsed_args, expr.value)
-
-        return astroid.Const(lineno=attr.lineno, col_offset=attr.col_offset, 
-                    parent=attr.parent, value=value)
-
-
-    def _parse_binop_format(self, string_f, args):
-        expr = self._parse_log_message(string_f)
-        if not expr:
-            return None
-            
-        all_args = self._parse_arg_list(args)
-        value = self._subst(self.STRING_BINOP_VARABLE_REG, all_args, expr.value)
-        
-        return astroid.Const(lineno=string_f.lineno, col_offset=string_f.col_offset, 
-                    parent=string_f.parent, value=value)
-
     def _subst(self, reg, args, value):
+        """Substitute the placeholders matching reg with args, the ones left over
+        with the variable token.
+
+        Format strings are split at their placeholders once (and cached), so
+        substitution is a single join. If an argument or the variable token
+        could change the outcome of substituting one placeholder at a time,
+        the regex is used instead.
+        """
+        compile_template = self._TEMPLATE_COMPILERS.get(reg)
+        if compile_template is None or not isinstance(value, str):
+            return self._subst_regex(reg, args, value)
+        args = [str(a) for a in args]
+        template = compile_template(value)
+        if "\\" in self.variable_token or not all(template.is_opaque(a) for a in args):
+            return self._subst_regex(reg, args, value)
+        return template.substitute(args, self.variable_token)
+
+    def _subst_regex(self, reg, args, value):
         for a in args:
             value = re.sub(reg, str(a), value, count=1)
         value = re.sub(reg, self.variable_token, value)
@@ -376,7 +636,7 @@ class LogRetrieverPyAST:
     def _safe_infer(self, node, context=None):
         inferred_types = set()
         try:
-            infer_gen = node.infer(context=context)
+            infer_gen = self._infer(node, context=context)
             value = next(infer_gen)
         except astroid.InferenceError:
             return None
@@ -401,39 +661,127 @@ class LogRetrieverPyAST:
             return None
         return value if len(inferred_types) <= 1 else None
 
+    def _infer(self, node, context=None):
+        """node.infer() within the inference budgets.
+
+        Raises InferenceBudgetExceeded once a budget runs out. Where SIGALRM
+        is available (main thread on Unix), a timer interrupts a single long
+        inference step. Otherwise the time is only checked between values.
+        """
+        deadline = self._file_deadline
+        if self.infer_timeout:
+            call_deadline = time.monotonic() + self.infer_timeout
+            deadline = call_deadline if deadline is None else min(deadline, call_deadline)
+
+        infer_gen = node.infer(context=context)
+        if deadline is None and not self.max_inferred_values:
+            return infer_gen
+        return self._infer_within_budgets(infer_gen, deadline, node)
+
+    def _infer_within_budgets(self, infer_gen, deadline, node):
+        count = 0
+        while True:
+            self._check_deadline(deadline, node)
+            try:
+                with self._alarm(deadline):
+                    value = next(infer_gen)
+            except StopIteration:
+                return
+            except _InferenceTimeout:
+                self._check_deadline(deadline, node, timed_out=True)
+            count += 1
+            if self.max_inferred_values and count > self.max_inferred_values:
+                self._exceed_budget(self.BUDGET_VALUES, node)
+            yield value
+
+    def _check_deadline(self, deadline, node, timed_out=False):
+        if deadline is None or (not timed_out and time.monotonic() < deadline):
+            return
+        if self._file_deadline is not None and deadline >= self._file_deadline:
+            self._exceed_budget(self.BUDGET_FILE_TIME, node)
+        self._exceed_budget(self.BUDGET_CALL_TIME, node)
+
+    def _exceed_budget(self, budget, node):
+        msg = self._get_message("Inference budget exceeded: {}.".format(budget), node)
+        if budget not in self.budgets_exceeded:
+            log.info(msg)
+        self.budgets_exceeded.add(budget)
+        raise InferenceBudgetExceeded(msg)
+
+    @contextlib.contextmanager
+    def _alarm(self, deadline):
+        if (
+            deadline is None or
+            not hasattr(signal, "setitimer") or
+            threading.current_thread() is not threading.main_thread()
+        ):
+            yield
+            return
+        previous = signal.signal(signal.SIGALRM, _raise_inference_timeout)
+        try:
+            signal.setitimer(signal.ITIMER_REAL, max(deadline - time.monotonic(), 1e-3))
+            yield
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            if previous is not None:
+                signal.signal(signal.SIGALRM, previous)
+
     def _get_python_type_of_node(self, node):
         pytype = getattr(node, "pytype", None)
         if callable(pytype):
             return pytype()
         return None
    
-    def _resolve_logging_args(self, log_message, args):
+    def _resolve_logging_args(self, log_message, args, node):
         if len(args) == 1 and isinstance(args[0], astroid.Call):
-            #print(node.repr_tree(), node.lineno)
             inferred = self._safe_infer(args[0])
-            #print(inferred.repr_tree())
-            if inferred:
-                arg = self._clone_node(args[0], inferred)
-            else:
+            if not inferred:
                 log.info(self._get_message("Unable to parse parameter.", args[0]))
-                arg = astroid.Const(lineno=args[0].lineno, col_offset=args[0].col_offset, 
-                            parent=args[0].parent, value=self.variable_token)
-            args = [arg]
+            args = [inferred or None]
         if len(args) == 1 and isinstance(args[0], astroid.Dict):
-            new_args = []
-            for a in args[0].items:
-                new_args.append(a[1])
-        else:
-            new_args = args
-        parsed_args = self._parse_arg_list(new_args)
-        log_message = self._subst(self.STRING_BINOP_VARABLE_REG, parsed_args, log_message)
-        
-        return log_message
+            args = [value for _, value in args[0].items]
+        return self._format_message(self.STRING_BINOP_VARABLE_REG, log_message, args, node)
 
     def logs_found(self):
         return len(self.log_messages) > 0
         
 
+def _get_log_token_regex():
+    names = {a for aliases in LogRetrieverPyAST.DEFAULT_LOG_LEVEL_ALIASES.values() for a in aliases}
+    names.add("log")
+    tokens = sorted(LogRetrieverPyAST.DEFAULT_LOGGING_MODULES | LogRetrieverPyAST.DEFAULT_GET_LOGGER_ATTR)
+    names = "|".join(sorted(names))
+    return re.compile(
+        r"|".join(re.escape(t) for t in tokens).encode() +
+        r"|\.\s*(?:{0})\b|\b(?:{0})\s*\(".format(names).encode()
+    )
+
+LOG_TOKEN_REG = _get_log_token_regex()
+# Byte order marks of encodings the token search does not understand.
+_WIDE_ENCODING_BOMS = (b"\xff\xfe", b"\xfe\xff")
+
+
+def may_contain_logs(filepath):
+    """Cheap check of the raw file content before building the AST.
+
+    Returns False only if the file neither mentions a logging module or
+    getLogger, nor accesses an attribute named like a log method (e.g.
+    ".info"), nor calls a function named like one (e.g. "info("). Such a file
+    cannot contain a log instruction the retriever finds. Any doubt
+    (unreadable file, unknown encoding) returns True.
+    """
+    try:
+        with open(filepath, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return False
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                if content[:2] in _WIDE_ENCODING_BOMS:
+                    return True
+                return LOG_TOKEN_REG.search(content) is not None
+    except (OSError, ValueError):
+        return True
+
+
 def get_ast(filepath):
     MANAGER = astroid.MANAGER
     try:
@@ -458,6 +806,10 @@ def main():
         log.error("Only python files are supported. This is not a python file: %s", input_file)
         exit()
 
+    if not may_contain_logs(input_file):
+        log.info("No logging calls found, skipping file: %s", input_file)
+        exit()
+
     ast = get_ast(input_file)
     if not ast:
         log.error("AST parsing failed for python file: %s", input_file)
@@ -469,6 +821,7 @@ def main():
     except Exception as e:
         log.error("Parsing of log messages failed. File: %s", input_file)
         log.exception(e)
+    log.info(lr.get_walk_stats())
 
     if lr.logs_found():
         store_results(output_file, input_file, lr.line_numbers, lr.log_levels, lr.log_messages, output_header)
@@ -0,0 +1,403 @@
+import ast
+import logging as log
+
+import astroid
+
+from utils import *
+from retriever_py_ast import LogRetrieverPyAST, get_ast, may_contain_logs
+
+
+class _Unresolved(Exception):
+    """Raised by the fast path when a node can only be resolved by inference."""
+
+
+class LogRetrieverPyTiered(LogRetrieverPyAST):
+    """Log retriever that walks the stdlib ast and uses astroid only where needed.
+
+    Imports, logger aliases and log calls whose message, level and arguments
+    are literals are handled on the stdlib tree, which is much cheaper to
+    build than the astroid tree. Call sites with names that need inference
+    are handed to LogRetrieverPyAST.visit_call on the matching node of an
+    astroid tree, which is only built for such files.
+
+    The walk emits the events of LogRetrieverPyAST.walk in the same order,
+    so the getLogger alias detection behaves the same. Calls that are not
+    syntactically log calls pass the same inference gate before the astroid
+    tree is built for them.
+    """
+    def __init__(self, logging_modules=LogRetrieverPyAST.DEFAULT_LOGGING_MODULES, variable_token="*",
+                 file_path=None, max_inferred_values=None, infer_timeout=None, file_timeout=None,
+                 logger_inference=LogRetrieverPyAST.LOGGER_INFERENCE_GATED,
+                 logger_name_patterns=LogRetrieverPyAST.DEFAULT_LOGGER_NAME_PATTERNS, symbol_index=None,
+                 source=None):
+        super().__init__(logging_modules, variable_token, file_path,
+                         max_inferred_values, infer_timeout, file_timeout,
+                         logger_inference, logger_name_patterns, symbol_index)
+        # Source of the walked tree, if it was not read from file_path.
+        self._source = source
+        self._astroid_calls = None
+        self.inferred_calls = 0
+
+        self._children = {
+            ast.FunctionDef: self._function_children,
+            ast.AsyncFunctionDef: self._function_children,
+            ast.ClassDef: self._class_children,
+            ast.arguments: self._arguments_children,
+            ast.ExceptHandler: self._except_handler_children,
+            ast.Dict: self._dict_children,
+            ast.Import: self._no_children,
+            ast.ImportFrom: self._no_children,
+        }
+        # Patterns exist from Python 3.10 on.
+        for name, children in [("MatchAs", self._match_as_children), ("MatchStar", self._match_as_children),
+                               ("MatchMapping", self._match_mapping_children)]:
+            if hasattr(ast, name):
+                self._children[getattr(ast, name)] = children
+
+    def _get_children(self, node):
+        # Children in the order of astroid's get_children.
+        return self._children.get(type(node), ast.iter_child_nodes)(node)
+
+    def _get_visitors(self):
+        # The events of astroid.AssignName are emitted by the parent of the
+        # name where it is not an ast.Name (arguments, except handlers, patterns).
+        return {
+            ast.Import: self._visit_import_node,
+            ast.ImportFrom: self._visit_importfrom_node,
+            ast.Call: self._visit_call_node,
+            ast.Name: self._visit_name_node,
+            ast.Assign: self._visit_assign_node,
+            ast.AnnAssign: self._visit_assign_node,
+            ast.NamedExpr: self._visit_assign_node,
+            ast.Module: self._visit_module_node,
+        }
+
+    def _visit_name_node(self, node):
+        if isinstance(node.ctx, ast.Store):
+            self._assign_state = node.id
+
+    def _visit_assign_node(self, node):
+        value, _ = self._get_stdlib_gate_names(node.value)
+        if value is None:
+            return
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+        for target in targets:
+            if isinstance(target, ast.Name):
+                self._assignments.append((target.id, value))
+            elif isinstance(target, ast.Attribute):
+                self._assignments.append((target.attr, value))
+
+    def visit_import(self, node):
+        for alias in node.names:
+            if alias.name in self._logging_modules:
+                self._logging_module_aliases.add(alias.asname or alias.name)
+
+    def visit_importfrom(self, node):
+        if (node.module or "") in self._logging_modules:
+            for alias in node.names:
+                if alias.name in self.alias_to_level and alias.asname:
+                    self.log_level_aliases.add(alias.asname)
+                    self.alias_to_level[alias.asname] = self.alias_to_level[alias.name]
+                elif alias.name == self.log_method and alias.asname:
+                    self.log_method_aliases.add(alias.asname)
+
+    def visit_call(self, node):
+        """Checks calls to logging methods, see LogRetrieverPyAST.visit_call."""
+        func = node.func
+        if (
+            self._assign_state and
+            self._check_logging_attr(func) and
+            func.attr in self._get_logging_attr
+        ):
+            self._logging_module_aliases.add(self._assign_state)
+            return
+
+        name = None
+        if self._check_logging_attr(func):
+            name = func.attr
+        if not name and self._check_logging_name(func):
+            name = func.id
+        if not name:
+            gate_names = self._get_stdlib_gate_names(func)
+            if self._may_be_logger_method(*gate_names):
+                self._visit_call_astroid(node)
+            else:
+                self._defer_call(LogRetrieverPyTiered.visit_call, node, gate_names[0])
+            return
+
+        try:
+            try:
+                (log_message, level, line_number) = self._parse_literal_instruction(node, name)
+            except _Unresolved:
+                raise
+            except Exception as e:
+                log.info("Skipping line {}".format(node.lineno))
+                if log.root.level <= log.DEBUG: # Only print if debug is enabled
+                    log.exception(e)
+                return
+
+            args = node.args[1:]
+            if len(args) > 0:
+                log_message = self._resolve_literal_args(log_message, args, node)
+        except _Unresolved:
+            self._visit_call_astroid(node)
+            return
+
+        self._add_log_message(log_message, level, line_number, node.end_lineno)
+
+    def _check_logging_attr(self, node):
+        if not isinstance(node, ast.Attribute):
+            return False
+        if isinstance(node.value, ast.Attribute):
+            return self._check_logging_attr(node.value)
+        elif isinstance(node.value, ast.Name):
+            return (
+                node.value.id in self._logging_module_aliases or
+                node.value.id in self.log_method_aliases
+            )
+        return False
+
+    def _check_logging_name(self, node):
+        return (
+            isinstance(node, ast.Name) and
+            (
+                node.id in self.log_method_aliases or
+                node.id in self.log_level_aliases
+            )
+        )
+
+    @staticmethod
+    def _get_stdlib_gate_names(func):
+        if isinstance(func, ast.Attribute):
+            if isinstance(func.value, ast.Name):
+                return func.attr, func.value.id
+            if isinstance(func.value, ast.Attribute):
+                return func.attr, func.value.attr
+            return func.attr, None
+        if isinstance(func, ast.Name):
+            return func.id, None
+        return None, None
+
+    def _visit_call_astroid(self, node):
+        astroid_node = self._get_astroid_call(node)
+        if astroid_node is None:
+            log.error(self._get_message("No astroid node found for call.", node))
+            return
+        self.inferred_calls += 1
+        LogRetrieverPyAST.visit_call(self, astroid_node)
+
+    def _get_astroid_call(self, node):
+        if self._astroid_calls is None:
+            self._astroid_calls = {}
+            if self._source is not None:
+                module = astroid.parse(self._source, path=self.file_path)
+            else:
+                module = get_ast(self.file_path)
+            if not module:
+                log.error("AST parsing failed for python file: %s", self.file_path)
+                return None
+            for call in module.nodes_of_class(astroid.Call):
+                self._astroid_calls[self._get_position(call)] = call
+        return self._astroid_calls.get(self._get_position(node))
+
+    @staticmethod
+    def _get_position(node):
+        # Nested calls such as a.b().c() start at the same position, they
+        # differ in the number of calls on their left. astroid < 2.7 has no
+        # end positions to tell them apart.
+        calls = 0
+        left = node.func
+        while True:
+            if isinstance(left, (ast.Call, astroid.Call)):
+                calls += 1
+                left = left.func
+            elif isinstance(left, (ast.Attribute, ast.Subscript, astroid.Subscript)):
+                left = left.value
+            elif isinstance(left, astroid.Attribute):
+                left = left.expr
+            else:
+                return node.lineno, node.col_offset, calls
+
+    # The _parse_literal* methods mirror _parse_log_instruction and
+    # _resolve_logging_args step by step, but raise _Unresolved wherever
+    # those would infer. Messages are resolved by _resolve_message on the
+    # stdlib nodes, see _get_message_parts.
+
+    def _parse_literal_instruction(self, node, name):
+        if name == "log":
+            format_pos = 1
+            level = self._parse_literal_level(node.args[0])
+        elif name in self.log_level_aliases:
+            format_pos = 0
+            level = name
+        else:
+            raise self.get_exception("Unable to parse log message.", node)
+        level = self.alias_to_level[level]
+
+        log_message = self._resolve_message(node.args[format_pos])
+        return (log_message, level, node.lineno)
+
+    def _parse_literal_level(self, arg):
+        if isinstance(arg, (ast.Name, ast.Call)):
+            raise _Unresolved()
+        elif isinstance(arg, ast.Constant):
+            level = log.getLevelName(arg.value)
+        elif isinstance(arg, ast.Attribute):
+            level = arg.attr
+        else:
+            raise self.get_exception("Unable to retrieve log level.", arg)
+        level = level.lower()
+        if level not in self.log_level_aliases:
+            raise self.get_exception("Invalid log level: .".format(level), arg)
+        return level
+
+    def _get_message_parts(self, node):
+        # Calls handed to LogRetrieverPyAST.visit_call resolve astroid nodes.
+        if not isinstance(node, ast.AST):
+            return super()._get_message_parts(node)
+        if isinstance(node, ast.Constant):
+            return self._PART_CONST, node.value
+        if isinstance(node, ast.FormattedValue):
+            return self._PART_CONCAT, [node.value]
+        if (
+            isinstance(node, ast.Call) and
+            isinstance(node.func, ast.Attribute) and
+            node.func.attr == "format"
+        ):
+            return self._PART_FORMAT, self.STRING_FORMAT_VARABLE_REG, node.func.value, node.args
+        if isinstance(node, ast.JoinedStr):
+            return self._PART_CONCAT, [
+                v.value if isinstance(v, ast.FormattedValue) else v for v in node.values]
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Mod):
+            elts = node.right.elts if isinstance(node.right, ast.Tuple) else [node.right]
+            return self._PART_FORMAT, self.STRING_BINOP_VARABLE_REG, node.left, elts
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            return self._PART_CONCAT, [node.left, node.right]
+        if isinstance(node, ast.Dict):
+            return self._PART_UNRESOLVED, "Cannot parse."
+        if isinstance(node, ast.Name) and node.id in self._indexed_constants:
+            return self._PART_CONST, self._indexed_constants[node.id]
+        return (self._PART_INFER,)
+
+    def _infer_message_node(self, node):
+        if not isinstance(node, ast.AST):
+            return super()._infer_message_node(node)
+        raise _Unresolved()
+
+    def _resolve_literal_args(self, log_message, args, node):
+        if len(args) == 1 and isinstance(args[0], ast.Call):
+            raise _Unresolved()
+        if len(args) == 1 and isinstance(args[0], ast.Dict):
+            args = args[0].values
+        return self._format_message(self.STRING_BINOP_VARABLE_REG, log_message, args, node)
+
+    # Children in the order of astroid's get_children, where it differs from
+    # the order of the stdlib fields. Names that are astroid.AssignName nodes
+    # set the assign state when the walk reaches them.
+
+    def _no_children(self, node):
+        return ()
+
+    def _function_children(self, node):
+        yield from node.decorator_list
+        yield node.args
+        if node.returns is not None:
+            yield node.returns
+        yield from node.body
+
+    def _class_children(self, node):
+        yield from node.decorator_list
+        yield from node.bases
+        yield from node.keywords
+        yield from node.body
+
+    def _arguments_children(self, node):
+        def annotations(args):
+            return [a.annotation for a in args if a.annotation is not None]
+
+        # Arguments are astroid.AssignName nodes without children.
+        for arg in node.posonlyargs:
+            self._assign_state = arg.arg
+        yield from annotations(node.posonlyargs)
+        for arg in node.args:
+            self._assign_state = arg.arg
+        yield from node.defaults
+        for arg in node.kwonlyargs:
+            self._assign_state = arg.arg
+        yield from (d for d in node.kw_defaults if d is not None)
+        yield from annotations(node.args)
+        yield from annotations([a for a in (node.vararg, node.kwarg) if a is not None])
+        yield from annotations(node.kwonlyargs)
+
+    def _except_handler_children(self, node):
+        if node.type is not None:
+            yield node.type
+        if node.name is not None:
+            self._assign_state = node.name
+        yield from node.body
+
+    def _dict_children(self, node):
+        for key, value in zip(node.keys, node.values):
+            if key is not None:
+                yield key
+            yield value
+
+    def _match_as_children(self, node):
+        if getattr(node, "pattern", None) is not None:
+            yield node.pattern
+        if node.name is not None:
+            self._assign_state = node.name
+
+    def _match_mapping_children(self, node):
+        yield from node.keys
+        yield from node.patterns
+        if node.rest is not None:
+            self._assign_state = node.rest
+
+
+def get_stdlib_ast(filepath):
+    try:
+        with open(filepath, "rb") as f:
+            return ast.parse(f.read(), filename=filepath)
+    except Exception:  # pylint: disable=broad-except
+        return None
+
+
+def main():
+    args = setup_command_line_arg()
+
+    input_file = args.input
+    output_file = args.output
+    output_header = args.output_header
+
+    if not file_exist(input_file):
+        log.error("File does not exist or is not a file: %s", input_file)
+        exit()
+
+    if not is_python_file(input_file):
+        log.error("Only python files are supported. This is not a python file: %s", input_file)
+        exit()
+
+    if not may_contain_logs(input_file):
+        log.info("No logging calls found, skipping file: %s", input_file)
+        exit()
+
+    tree = get_stdlib_ast(input_file)
+    if not tree:
+        log.error("AST parsing failed for python file: %s", input_file)
+        exit()
+
+    lr = LogRetrieverPyTiered(file_path=input_file)
+    try:
+        lr.walk(tree)
+    except Exception as e:
+        log.error("Parsing of log messages failed. File: %s", input_file)
+        log.exception(e)
+    log.info(lr.get_walk_stats())
+
+    if lr.logs_found():
+        store_results(output_file, input_file, lr.line_numbers, lr.log_levels, lr.log_messages, output_header)
+
+
+if __name__ == "__main__":
+    main()
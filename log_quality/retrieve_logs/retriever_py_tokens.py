@@ -0,0 +1,214 @@
+import ast
+import logging as log
+import time
+import tokenize
+
+from utils import *
+from retriever_py_ast import may_contain_logs
+from retriever_py_tiered import LogRetrieverPyTiered, _Unresolved
+
+_SKIPPED_TOKENS = {tokenize.ENCODING, tokenize.COMMENT, tokenize.NL, tokenize.INDENT, tokenize.DEDENT}
+_BRACKETS = {")": "(", "]": "[", "}": "{"}
+
+
+class LogRetrieverPyTokens(LogRetrieverPyTiered):
+    """Log retriever for large files that streams tokens instead of building a tree.
+
+    The file is read with tokenize one logical line at a time, so memory is
+    bounded by the longest statement, not by the size of the file. Logical
+    lines of more than MAX_STATEMENT_TOKENS tokens, e.g. huge data literals
+    of generated modules, are skipped.
+
+    Imports and getLogger assignments are detected per statement. Every call
+    of a log method is parsed on its own with the stdlib ast and handled
+    like a literal call of LogRetrieverPyTiered. There is no inference:
+    names in messages and arguments are unresolved placeholders, and calls
+    that are not syntactically log calls only count if their receiver
+    matches the logger name patterns, e.g. self.logger.info(...).
+    """
+    MAX_STATEMENT_TOKENS = 100000
+
+    def walk_file(self, filepath):
+        """Retrieve the log messages of a file. Returns False if it cannot be tokenized."""
+        start = time.perf_counter()
+        try:
+            with open(filepath, "rb") as f:
+                for tokens in self._iter_statements(tokenize.tokenize(f.readline)):
+                    self.nodes_visited += len(tokens)
+                    try:
+                        self._visit_statement(tokens)
+                    except Exception as e:
+                        log.exception(e)
+        except (OSError, SyntaxError, tokenize.TokenError) as e:
+            # Statements before the error are kept.
+            log.error("Tokenizing failed for python file: %s: %s", filepath, e)
+            return False
+        finally:
+            self.walk_time += time.perf_counter() - start
+        return True
+
+    def _iter_statements(self, tokens):
+        # The tokens of the simple statements, split at NEWLINE and ";".
+        statement = []
+        too_long = False
+        for token in tokens:
+            if token.type in _SKIPPED_TOKENS:
+                continue
+            if token.type in (tokenize.NEWLINE, tokenize.ENDMARKER) or token.string == ";":
+                if statement and not too_long:
+                    yield statement
+                elif too_long:
+                    log.info("Skipping statement of more than %d tokens - %s:%d",
+                             self.MAX_STATEMENT_TOKENS, self.file_path, statement[0].start[0])
+                statement = []
+                too_long = False
+            elif len(statement) < self.MAX_STATEMENT_TOKENS:
+                statement.append(token)
+            else:
+                too_long = True
+
+    def _visit_statement(self, tokens):
+        first = tokens[0]
+        if first.type == tokenize.NAME and first.string in ("import", "from"):
+            node = self._parse_tokens(tokens, "exec")
+            if node is not None and node.body:
+                self.visit(node.body[0])
+            return
+
+        self._assign_state = None
+        if len(tokens) > 2 and first.type == tokenize.NAME and tokens[1].string == "=":
+            self._assign_state = first.string
+
+        names = self.LOGGER_METHOD_NAMES | self.log_level_aliases | self.log_method_aliases | self._get_logging_attr
+        matching = self._match_brackets(tokens)
+        for i, token in enumerate(tokens[:-1]):
+            if token.type != tokenize.NAME or token.string not in names or tokens[i + 1].string != "(":
+                continue
+            if i > 0 and tokens[i - 1].type == tokenize.NAME and tokens[i - 1].string in ("def", "class"):
+                # The header of a definition, e.g. def warning(self, msg):, not a call.
+                continue
+            close = matching.get(i + 1)
+            if close is None:
+                continue
+            node = self._parse_tokens(tokens[self._get_call_start(tokens, i, matching):close + 1], "eval")
+            if isinstance(node, ast.Expression) and isinstance(node.body, ast.Call):
+                # The statement is parsed from one line, its end is that of the tokens.
+                node.body.end_lineno = tokens[close].end[0]
+                self._visit_call_node(node.body)
+
+    @staticmethod
+    def _match_brackets(tokens):
+        """{index of an opening or closing bracket: index of its counterpart}"""
+        matching = {}
+        stack = []
+        for i, token in enumerate(tokens):
+            if token.type != tokenize.OP:
+                continue
+            if token.string in "([{":
+                stack.append(i)
+            elif token.string in _BRACKETS and stack and tokens[stack[-1]].string == _BRACKETS[token.string]:
+                j = stack.pop()
+                matching[i] = j
+                matching[j] = i
+        return matching
+
+    @staticmethod
+    def _get_call_start(tokens, i, matching):
+        # The start of the receiver of tokens[i], e.g. of self.log or of
+        # logging.getLogger(__name__) in ....getLogger(__name__).info(.
+        start = i
+        while start >= 2 and tokens[start - 1].string == ".":
+            k = start - 2
+            while k >= 0 and tokens[k].string in _BRACKETS and k in matching:
+                k = matching[k] - 1
+            if k < 0 or tokens[k].type != tokenize.NAME:
+                # A parenthesized expression, e.g. (a or b).info(.
+                return k + 1
+            start = k
+        return start
+
+    def _parse_tokens(self, tokens, mode):
+        source = tokenize.untokenize((t.type, t.string) for t in tokens)
+        try:
+            node = ast.parse(source, filename=self.file_path or "<unknown>", mode=mode)
+        except (SyntaxError, ValueError) as e:
+            log.info("Unable to parse statement - %s:%d: %s", self.file_path, tokens[0].start[0], e)
+            return None
+        ast.increment_lineno(node, tokens[0].start[0] - 1)
+        return node
+
+    def _infer_message_node(self, node):
+        if not isinstance(node, ast.AST):
+            return super()._infer_message_node(node)
+        # Unresolved placeholder.
+        return None
+
+    def _resolve_literal_args(self, log_message, args, node):
+        if len(args) == 1 and isinstance(args[0], ast.Dict):
+            args = args[0].values
+        return self._format_message(self.STRING_BINOP_VARABLE_REG, log_message, args, node)
+
+    def _visit_call_astroid(self, node):
+        # There is no tree to infer on. Calls with a level that is not a
+        # literal are skipped, other calls are log calls if their receiver
+        # is a logger by its name or by a getLogger call.
+        name, receiver_name = self._get_stdlib_gate_names(node.func)
+        if (
+            name not in self.log_level_aliases and name not in self.log_method_aliases or
+            self._check_logging_attr(node.func) or self._check_logging_name(node.func) or
+            not self._is_logger_receiver(node.func.value, receiver_name)
+        ):
+            log.info(self._get_message("Skipping call that needs inference.", node))
+            return
+        try:
+            (log_message, level, line_number) = self._parse_literal_instruction(node, name)
+            args = node.args[1:]
+            if len(args) > 0:
+                log_message = self._resolve_literal_args(log_message, args, node)
+        except (_Unresolved, Exception) as e:
+            log.info("Skipping line {}".format(node.lineno))
+            if log.root.level <= log.DEBUG: # Only print if debug is enabled
+                log.exception(e)
+            return
+        self._add_log_message(log_message, level, line_number, node.end_lineno)
+
+    def _is_logger_receiver(self, node, receiver_name):
+        # logging.getLogger(...).info(...) or e.g. self.logger.info(...)
+        if (
+            isinstance(node, ast.Call) and
+            self._check_logging_attr(node.func) and
+            node.func.attr in self._get_logging_attr
+        ):
+            return True
+        return receiver_name is not None and any(r.search(receiver_name) for r in self._logger_name_regs)
+
+
+def main():
+    args = setup_command_line_arg()
+
+    input_file = args.input
+    output_file = args.output
+    output_header = args.output_header
+
+    if not file_exist(input_file):
+        log.error("File does not exist or is not a file: %s", input_file)
+        exit()
+
+    if not is_python_file(input_file):
+        log.error("Only python files are supported. This is not a python file: %s", input_file)
+        exit()
+
+    if not may_contain_logs(input_file):
+        log.info("No logging calls found, skipping file: %s", input_file)
+        exit()
+
+    lr = LogRetrieverPyTokens(file_path=input_file)
+    lr.walk_file(input_file)
+    log.info(lr.get_walk_stats())
+
+    if lr.logs_found():
+        store_results(output_file, input_file, lr.line_numbers, lr.log_levels, lr.log_messages, output_header)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import logging as log
+import os
+import tempfile
+
+
+class ScanCache:
+    """On-disk cache of retrieved log messages keyed by file content.
+
+    The key is a hash of the file content together with the retriever
+    configuration (including its version), so editing a file or upgrading the
+    retriever never returns stale results. The context of the file, e.g. the
+    package its relative imports are resolved in, is part of the key too. Entries are written to a temporary
+    file and renamed into place, which lets several worker processes share one
+    cache directory.
+    """
+    ENTRY_SUFFIX = ".json"
+    TMP_SUFFIX = ".tmp"
+    DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+    def __init__(self, cache_dir, max_size=DEFAULT_MAX_SIZE, config=None):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._config = json.dumps(config or {}, sort_keys=True).encode()
+
+    def key(self, content, context=""):
+        h = hashlib.sha256(self._config)
+        h.update(b"\0")
+        h.update(context.encode())
+        h.update(b"\0")
+        h.update(content)
+        return h.hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + self.ENTRY_SUFFIX)
+
+    def get(self, key):
+        path = self._get_path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if "end_line_numbers" not in entry:
+            # Written before the end lines were cached.
+            return None
+
+        try:
+            # The modification time is the last access time used by evict.
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["line_numbers"], entry["log_levels"], entry["log_messages"], entry["end_line_numbers"]
+
+    def put(self, key, line_numbers, log_levels, log_messages, end_line_numbers=None):
+        """Cache the results of a file. Results with messages that JSON does not
+        restore as they are, e.g. bytes or tuple constants, are not cached.
+        end_line_numbers default to the line numbers."""
+        path = self._get_path(key)
+        if not all(m is None or isinstance(m, (str, int, float)) for m in log_messages):
+            log.debug("Not caching %s, it has messages that are no strings or numbers.", path)
+            return
+        try:
+            data = json.dumps({"line_numbers": line_numbers, "log_levels": log_levels, "log_messages": log_messages,
+                               "end_line_numbers": line_numbers if end_line_numbers is None else end_line_numbers})
+        except (TypeError, ValueError) as e:
+            log.debug("Not caching %s: %s", path, e)
+            return
+
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=self.TMP_SUFFIX)
+            with os.fdopen(fd, "w") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning("Unable to write scan cache entry %s: %s", path, e)
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits into max_size.
+
+        Returns the number of removed entries. Entries removed concurrently by
+        another process are skipped.
+        """
+        entries = []
+        total_size = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(self.ENTRY_SUFFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+            total_size -= size
+        return removed
@@ -0,0 +1,193 @@
+import ast
+import collections
+import logging as log
+import os
+
+# Nodes binding the name in their name or rest attribute. The patterns
+# exist from Python 3.10 on.
+_NAME_BINDING_NODES = tuple(getattr(ast, n) for n in ("ExceptHandler", "MatchAs", "MatchStar") if hasattr(ast, n))
+_REST_BINDING_NODES = tuple(getattr(ast, n) for n in ("MatchMapping",) if hasattr(ast, n))
+
+
+def get_module_name(filepath):
+    """Dotted module name of a python file and whether it is a package.
+
+    The package is found by walking up the directories that contain an
+    __init__.py, like astroid does for files that are not on sys.path.
+    """
+    directory, file_name = os.path.split(os.path.abspath(filepath))
+    name = os.path.splitext(file_name)[0]
+    is_package = name == "__init__"
+    parts = [] if is_package else [name]
+    while os.path.isfile(os.path.join(directory, "__init__.py")):
+        directory, package = os.path.split(directory)
+        parts.insert(0, package)
+    return ".".join(parts), is_package
+
+
+def resolve_import(module_name, is_package, modname, level):
+    """Absolute name of the module imported by "from <level dots><modname> import ..."."""
+    if not level:
+        return modname
+    parts = module_name.split(".") if module_name else []
+    if not is_package:
+        parts = parts[:-1]
+    if level - 1 >= len(parts):
+        # Beyond the top level package.
+        return None
+    parts = parts[:len(parts) - (level - 1)]
+    if modname:
+        parts.append(modname)
+    return ".".join(parts) or None
+
+
+class SymbolIndex:
+    """Loggers and string constants defined at module level in the scanned files.
+
+    The index is built once per scan from the stdlib ast of every input file,
+    before the retrievers run, and is only read afterwards. A retriever gets
+    the names a file imports from other input files with get_file_symbols, so
+    "from app.log import LOG" makes LOG a logger and "from app.messages
+    import DB_ERR" resolves DB_ERR without astroid inference across modules.
+
+    Only names that are bound exactly once in a module are indexed. Anything
+    else is left to inference.
+    """
+    LOGGER = "logger"
+    CONSTANT = "constant"
+    # A name imported from another module, followed by lookup.
+    IMPORT = "import"
+    MAX_IMPORT_DEPTH = 16
+
+    def __init__(self, logging_modules, get_logger_attrs, log_method="log"):
+        self._logging_modules = set(logging_modules)
+        self._get_logger_attrs = set(get_logger_attrs)
+        self._log_method = log_method
+        # Module name -> {name: (kind, value)}. Modules that are found in
+        # several files are not indexed.
+        self._modules = {}
+        self._duplicate_modules = set()
+        # Absolute file path -> {local name: (module, name)} of the imports.
+        self._files = {}
+
+    @classmethod
+    def build(cls, files, logging_modules, get_logger_attrs, log_method="log"):
+        index = cls(logging_modules, get_logger_attrs, log_method)
+        for filepath in files:
+            try:
+                with open(filepath, "rb") as f:
+                    tree = ast.parse(f.read(), filename=filepath)
+            except (OSError, SyntaxError, ValueError) as e:
+                log.info("Unable to index symbols of %s: %s", filepath, e)
+                continue
+            index.add_module(filepath, tree)
+        return index
+
+    def add_module(self, filepath, tree):
+        module_name, is_package = get_module_name(filepath)
+        bindings = self._count_bindings(tree)
+        symbols = {}
+        imports = {}
+        receivers = {self._log_method}
+        has_star_import = False
+        for stmt in tree.body:
+            if isinstance(stmt, ast.Import):
+                for alias in stmt.names:
+                    if alias.name in self._logging_modules:
+                        receivers.add(alias.asname or alias.name)
+            elif isinstance(stmt, ast.ImportFrom):
+                modname = resolve_import(module_name, is_package, stmt.module, stmt.level)
+                for alias in stmt.names:
+                    if alias.name == "*":
+                        has_star_import = True
+                        continue
+                    if stmt.module in self._logging_modules and alias.name == self._log_method:
+                        receivers.add(alias.asname or alias.name)
+                    name = alias.asname or alias.name
+                    if modname and bindings[name] == 1:
+                        imports[name] = (modname, alias.name)
+                        symbols[name] = (self.IMPORT, (modname, alias.name))
+            elif isinstance(stmt, (ast.Assign, ast.AnnAssign)):
+                targets = stmt.targets if isinstance(stmt, ast.Assign) else [stmt.target]
+                if len(targets) != 1 or not isinstance(targets[0], ast.Name):
+                    continue
+                name = targets[0].id
+                if bindings[name] != 1 or stmt.value is None:
+                    continue
+                if isinstance(stmt.value, ast.Constant) and isinstance(stmt.value.value, str):
+                    symbols[name] = (self.CONSTANT, stmt.value.value)
+                elif self._is_get_logger_call(stmt.value, receivers):
+                    symbols[name] = (self.LOGGER, None)
+
+        if module_name in self._modules or module_name in self._duplicate_modules:
+            self._modules.pop(module_name, None)
+            self._duplicate_modules.add(module_name)
+        elif module_name:
+            self._modules[module_name] = symbols
+        # A later star import may rebind any name.
+        self._files[os.path.abspath(filepath)] = {} if has_star_import else imports
+
+    def _is_get_logger_call(self, node, receivers):
+        # <receiver>.getLogger(...) or <receiver>.<attr>...getLogger(...), as
+        # LogRetrieverPyAST.visit_call detects logger aliases.
+        if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Attribute):
+            return False
+        if node.func.attr not in self._get_logger_attrs:
+            return False
+        expr = node.func.value
+        while isinstance(expr, ast.Attribute):
+            expr = expr.value
+        return isinstance(expr, ast.Name) and expr.id in receivers
+
+    @staticmethod
+    def _count_bindings(tree):
+        bindings = collections.Counter()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+                bindings[node.id] += 1
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                bindings[node.name] += 1
+            elif isinstance(node, ast.arg):
+                bindings[node.arg] += 1
+            elif isinstance(node, ast.alias):
+                bindings[(node.asname or node.name).split(".")[0]] += 1
+            elif isinstance(node, _NAME_BINDING_NODES) and node.name:
+                bindings[node.name] += 1
+            elif isinstance(node, _REST_BINDING_NODES) and node.rest:
+                bindings[node.rest] += 1
+        return bindings
+
+    def lookup(self, module_name, name):
+        """(kind, value) of a module level name, following imports, or None."""
+        for _ in range(self.MAX_IMPORT_DEPTH):
+            symbol = self._modules.get(module_name, {}).get(name)
+            if symbol is None or symbol[0] != self.IMPORT:
+                return symbol
+            module_name, name = symbol[1]
+        return None
+
+    def get_file_symbols(self, filepath):
+        """Names of the loggers and {name: value} of the string constants a file imports.
+
+        They depend on the path of the file, not only on its content:
+        relative imports are resolved in its package. Caches of results key
+        by them, see retriever_batch.get_context_key.
+        """
+        imports = self._files.get(os.path.abspath(filepath), {})
+        loggers = set()
+        constants = {}
+        for local_name, (module_name, name) in imports.items():
+            symbol = self.lookup(module_name, name)
+            if symbol is None:
+                continue
+            kind, value = symbol
+            if kind == self.LOGGER:
+                loggers.add(local_name)
+            elif kind == self.CONSTANT:
+                constants[local_name] = value
+        return loggers, constants
+
+    def get_stats(self):
+        counts = collections.Counter(
+            kind for symbols in self._modules.values() for kind, _ in symbols.values())
+        return len(self._modules), counts[self.LOGGER], counts[self.CONSTANT]
@@ -0,0 +1,38 @@
+"""Micro-benchmark of the placeholder substitution of LogRetrieverPyAST.
+
+Compares the compiled templates of _subst with the regex substitution
+_subst_regex it replaces. Run from log_quality/retrieve_logs:
+
+    python -m tests.misc.benchmark_subst
+"""
+import timeit
+
+from retriever_py_ast import LogRetrieverPyAST
+
+CASES = [
+    ("short %-style", LogRetrieverPyAST.STRING_BINOP_VARABLE_REG,
+     "Connection to %s:%d failed", ["host", 80]),
+    ("many %-style", LogRetrieverPyAST.STRING_BINOP_VARABLE_REG,
+     " ".join(["%s"] * 50), list(range(40))),
+    ("long %-style", LogRetrieverPyAST.STRING_BINOP_VARABLE_REG,
+     "x" * 5000 + " %s " * 5 + "y" * 5000, ["a", "b"]),
+    ("short str.format", LogRetrieverPyAST.STRING_FORMAT_VARABLE_REG,
+     "Loaded {} items from {name}", [3, "cache"]),
+    ("many str.format", LogRetrieverPyAST.STRING_FORMAT_VARABLE_REG,
+     " ".join(["{}"] * 50), list(range(40))),
+]
+
+
+def main():
+    lr = LogRetrieverPyAST()
+    for name, reg, value, args in CASES:
+        assert lr._subst(reg, args, value) == lr._subst_regex(reg, args, value)
+        number = 2000
+        regex_time = timeit.timeit(lambda: lr._subst_regex(reg, args, value), number=number)
+        template_time = timeit.timeit(lambda: lr._subst(reg, args, value), number=number)
+        print("{:<18} regex {:8.2f} us  template {:8.2f} us  ({:.1f}x)".format(
+            name, regex_time / number * 1e6, template_time / number * 1e6, regex_time / template_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Benchmark of the worker startup with and without the astroid warm-up.
+
+Every run starts a new pool of workers. It measures the time the main
+process spends on the warm-up and the latency of the first file of the
+workers. Run from log_quality/retrieve_logs:
+
+    python -m tests.misc.benchmark_warm_cache [FILE ...]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RUNS = 5
+PARALLELISM = 2
+DEFAULT_FILES = [os.path.join(os.path.dirname(__file__), "..", "test_files", "py_hard.py")]
+
+RUN = """
+import json, sys, time
+from astroid_cache import AstroidCachePolicy
+from astroid_warmup import AstroidWarmup
+from retriever_batch import retrieve_files
+start = time.monotonic()
+warmup = None
+if sys.argv[1] == "warm":
+    warmup = AstroidWarmup()
+    warmup.build()
+warmup_time = time.monotonic() - start
+files = sys.argv[3:] * int(sys.argv[2])
+results = list(retrieve_files(files, int(sys.argv[2]), astroid_cache_policy=AstroidCachePolicy(),
+                              astroid_warmup=warmup))
+first = [r[4]["worker_start"]["first_file_time"] for r in results if "worker_start" in r[4]]
+print(json.dumps([warmup_time, sum(first) / len(first), time.monotonic() - start]))
+"""
+
+
+def run(name, files):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.getcwd(), os.environ.get("PYTHONPATH", "")]))
+    output = subprocess.check_output([sys.executable, "-c", RUN, name, str(PARALLELISM), *files], env=env)
+    return json.loads(output)
+
+
+def main():
+    files = sys.argv[1:] or DEFAULT_FILES
+    for name in ["cold", "warm"]:
+        results = [run(name, files) for _ in range(RUNS)]
+        warmup, first, total = (statistics.median(r[i] for r in results) for i in range(3))
+        print("{}: warm-up {:6.3f}s  first file {:6.3f}s  {} files {:6.3f}s".format(
+            name, warmup, first, PARALLELISM * len(files), total))
+
+
+if __name__ == "__main__":
+    main()
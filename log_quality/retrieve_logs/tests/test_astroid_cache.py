@@ -0,0 +1,137 @@
+import unittest
+import os
+
+import astroid
+
+from log_quality.retrieve_logs.astroid_cache import AstroidCachePolicy, get_rss
+from log_quality.retrieve_logs.retriever_batch import retrieve_files
+from tests.helpers import *
+
+base_path = os.path.dirname(__file__)
+test_file_path = os.path.join(base_path, "test_files")
+
+
+class TestAstroidCachePolicy(unittest.TestCase):
+
+    def setUp(self):
+        configure_logging()
+        self.policy = None
+
+    def tearDown(self):
+        if self.policy:
+            self.policy.uninstall()
+
+    def install(self, **kwargs):
+        self.policy = AstroidCachePolicy(**kwargs)
+        self.policy.install()
+        return self.policy
+
+    def load(self, *modnames):
+        for modname in modnames:
+            astroid.MANAGER.ast_from_module_name(modname)
+
+    def test_install(self):
+        cache = astroid.MANAGER.astroid_cache
+        modnames = list(cache)
+        policy = self.install()
+        self.assertIsNot(astroid.MANAGER.astroid_cache, cache)
+        self.assertListEqual(list(astroid.MANAGER.astroid_cache), modnames)
+        policy.uninstall()
+        self.assertIs(type(astroid.MANAGER.astroid_cache), dict)
+        self.assertListEqual(list(astroid.MANAGER.astroid_cache), modnames)
+
+    def test_evict_least_recently_used(self):
+        self.load("logging", "json", "csv", "textwrap")
+        policy = self.install(max_modules=len(astroid.MANAGER.astroid_cache) - 1)
+        # Used again, so it is not the least recently used.
+        self.load("json")
+        policy.after_file()
+
+        cache = astroid.MANAGER.astroid_cache
+        self.assertLessEqual(len(cache), policy.max_modules * 0.75)
+        self.assertIn("json", cache)
+        self.assertIn("logging", cache)
+        self.assertIn("builtins", cache)
+        self.assertEqual(policy.evicted, policy.get_stats()["evicted"])
+        self.assertGreater(policy.evicted, 0)
+
+        # Evicted modules are built again when needed.
+        self.assertEqual(astroid.MANAGER.ast_from_module_name("csv").name, "csv")
+
+    def test_evict_by_bytes(self):
+        self.load("json", "csv")
+        policy = self.install(max_bytes=1)
+        policy.after_file()
+        self.assertNotIn("json", astroid.MANAGER.astroid_cache)
+        self.assertNotIn("csv", astroid.MANAGER.astroid_cache)
+        self.assertIn("builtins", astroid.MANAGER.astroid_cache)
+
+    def test_is_pinned(self):
+        policy = AstroidCachePolicy(pinned=("logging",))
+        self.assertTrue(policy.is_pinned("logging"))
+        self.assertTrue(policy.is_pinned("logging.handlers"))
+        self.assertFalse(policy.is_pinned("logging_utils"))
+
+    def test_recycle_files(self):
+        self.load("json", "csv")
+        policy = self.install(recycle_files=2)
+        self.assertFalse(policy.after_file())
+        self.assertTrue(policy.after_file())
+        # Asked once, the worker is replaced or clears its state with recycle.
+        self.assertFalse(policy.after_file())
+        self.assertIn("csv", astroid.MANAGER.astroid_cache)
+        self.assertEqual(policy.get_stats()["recycles"], 1)
+
+        policy.recycle()
+        self.assertNotIn("csv", astroid.MANAGER.astroid_cache)
+        self.assertIn("builtins", astroid.MANAGER.astroid_cache)
+        self.assertFalse(policy.after_file())
+        self.assertTrue(policy.after_file())
+
+    def test_recycle_rss(self):
+        rss = get_rss()
+        if rss is None:
+            self.skipTest("RSS is unknown on this platform.")
+        self.load("csv")
+        policy = self.install(recycle_rss=1)
+        self.assertTrue(policy.after_file())
+        policy.recycle()
+        self.assertNotIn("csv", astroid.MANAGER.astroid_cache)
+        # The RSS left by the clear is the new limit.
+        self.assertGreaterEqual(policy._rss_limit, rss)
+        self.assertEqual(policy.recycles, 1)
+
+    def test_retrieve_files(self):
+        files = [os.path.join(test_file_path, f) for f in ["py_simple.py", "py_hard.py"]]
+        expected = [r[:4] for r in retrieve_files(files)]
+        policy = AstroidCachePolicy(max_modules=1)
+        for parallelism in [1, 2]:
+            with self.subTest(parallelism=parallelism):
+                result = list(retrieve_files(files, parallelism, astroid_cache_policy=policy))
+                self.assertListEqual([r[:4] for r in result], expected)
+                stats = [r[4]["astroid_cache"] for r in result]
+                self.assertGreater(stats[-1]["evicted"], 0)
+                self.assertIn("worker", result[0][4])
+        # The cache is restored when the files are retrieved in process.
+        self.assertIs(type(astroid.MANAGER.astroid_cache), dict)
+
+    def test_retrieve_files_recycle(self):
+        files = [os.path.join(test_file_path, f) for f in ["py_simple.py", "py_hard.py"]] * 6
+        expected = [r[:4] for r in retrieve_files(files)]
+        policy = AstroidCachePolicy(recycle_files=2)
+        for parallelism in [1, 2]:
+            with self.subTest(parallelism=parallelism):
+                result = list(retrieve_files(files, parallelism, queue_size=1, astroid_cache_policy=policy))
+                self.assertListEqual([r[:4] for r in result], expected)
+                workers = {r[4]["worker"] for r in result}
+                if parallelism == 1:
+                    self.assertListEqual([bool(r[4].get("recycle")) for r in result], [False, True] * 6)
+                    self.assertEqual(len(workers), 1)
+                    self.assertEqual(result[-1][4]["astroid_cache"]["recycles"], 6)
+                else:
+                    # A new pool once a worker retrieved two files, i.e. after at most three files.
+                    self.assertGreaterEqual(len(workers), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
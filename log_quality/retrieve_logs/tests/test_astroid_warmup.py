@@ -0,0 +1,49 @@
+import unittest
+import os
+
+import astroid
+
+from log_quality.retrieve_logs.astroid_cache import AstroidCachePolicy
+from log_quality.retrieve_logs.astroid_warmup import AstroidWarmup
+from log_quality.retrieve_logs.retriever_batch import retrieve_files
+from tests.helpers import *
+
+base_path = os.path.dirname(__file__)
+test_file_path = os.path.join(base_path, "test_files")
+
+
+class TestAstroidWarmup(unittest.TestCase):
+
+    def setUp(self):
+        configure_logging()
+
+    def tearDown(self):
+        astroid.MANAGER.clear_cache()
+
+    def test_build(self):
+        astroid.MANAGER.clear_cache()
+        modules = AstroidWarmup(["logging", "json", "does_not_exist"]).build()
+        self.assertIn("logging", modules)
+        self.assertIn("json", modules)
+        self.assertNotIn("does_not_exist", modules)
+        self.assertListEqual(sorted(modules), sorted(astroid.MANAGER.astroid_cache))
+
+    def test_retrieve_files(self):
+        files = [os.path.join(test_file_path, f) for f in ["py_simple.py", "py_hard.py"]]
+        expected = [r[:4] for r in retrieve_files(files)]
+        warmup = AstroidWarmup(["logging", "json"])
+        for parallelism in [1, 2]:
+            with self.subTest(parallelism=parallelism):
+                policy = AstroidCachePolicy(max_modules=1)
+                result = list(retrieve_files(files, parallelism, astroid_cache_policy=policy, astroid_warmup=warmup))
+                self.assertListEqual([r[:4] for r in result], expected)
+                worker_start = result[0][4]["worker_start"]
+                self.assertGreater(worker_start["warm_modules"], 0)
+                self.assertIn("first_file_time", worker_start)
+                # Pinned, the modules of the warm-up are not evicted.
+                self.assertGreaterEqual(result[-1][4]["astroid_cache"]["modules"], worker_start["warm_modules"])
+        self.assertIn("json", astroid.MANAGER.astroid_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
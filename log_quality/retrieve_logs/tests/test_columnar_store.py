@@ -0,0 +1,78 @@
+import unittest
+import os
+import tempfile
+
+import numpy as np
+
+from log_quality.retrieve_logs.columnar_store import ColumnarWriter, _decode_strings, export_csv, read_columns
+from log_quality.retrieve_logs.utils import open_results, write_results
+from tests.helpers import *
+
+
+class TestColumnarStore(unittest.TestCase):
+
+    def setUp(self):
+        configure_logging()
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.store = os.path.join(self._tmp_dir.name, "store")
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_write_read(self):
+        with ColumnarWriter(self.store) as writer:
+            writer.writerows([(1, "info", "Hello *", "/a.py"), (7, "error", "Failed ä", "/b.py")])
+            writer.writerows([])
+        with ColumnarWriter(self.store) as writer:
+            writer.writerows([(3, "info", None, "/a.py"), (4, "debug", 5, "/c ü.py")])
+
+        columns = read_columns(self.store)
+        self.assertIsInstance(columns["lines"], np.memmap)
+        self.assertListEqual(columns["lines"].tolist(), [1, 7, 3, 4])
+        self.assertListEqual(columns["levels"].tolist(), [0, 1, 0, 2])
+        self.assertListEqual(columns["level_names"], ["info", "error", "debug"])
+        self.assertListEqual(_decode_strings(columns["messages"], columns["message_ends"]),
+                             ["Hello *", "Failed ä", "", "5"])
+        # The missing message is stored empty and marked.
+        self.assertListEqual(columns["message_nulls"].tolist(), [0, 0, 1, 0])
+        self.assertListEqual(columns["files"].tolist(), [0, 1, 0, 2])
+        self.assertListEqual(columns["paths"], ["/a.py", "/b.py", "/c ü.py"])
+
+    def read_rows(self):
+        columns = read_columns(self.store)
+        messages = _decode_strings(columns["messages"], columns["message_ends"])
+        return [[line, columns["level_names"][level], message, columns["paths"][file]] for line, level, message, file
+                in zip(columns["lines"].tolist(), columns["levels"].tolist(), messages, columns["files"].tolist())]
+
+    def test_uncommitted_bytes(self):
+        with ColumnarWriter(self.store) as writer:
+            writer.writerows([(1, "info", "a", "/a.py")])
+        # A writer that crashed before its commit.
+        for name in ["lines.i32", "messages.bin", "paths.bin"]:
+            with open(os.path.join(self.store, name), "ab") as f:
+                f.write(b"garbage")
+        self.assertEqual(len(self.read_rows()), 1)
+        with ColumnarWriter(self.store) as writer:
+            writer.writerows([(2, "info", "b", "/b.py")])
+        self.assertListEqual(self.read_rows(), [[1, "info", "a", "/a.py"], [2, "info", "b", "/b.py"]])
+
+    def test_empty_store(self):
+        with open_results(self.store, output_format="columnar"):
+            pass
+        self.assertEqual(len(self.read_rows()), 0)
+
+    def test_export_csv(self):
+        rows = [(3, "info", "Hello, \"quoted\" *", "a.py"), (5, "info", None, "a.py"), (9, "warning", "Done", "b.py")]
+        expected = os.path.join(self._tmp_dir.name, "expected.csv")
+        exported = os.path.join(self._tmp_dir.name, "exported.csv")
+        for output_file, output_format in [(expected, "csv"), (self.store, "columnar")]:
+            with open_results(output_file, output_format=output_format) as writer:
+                for line_number, level, message, input_file in rows:
+                    write_results(writer, input_file, [line_number], [level], [message])
+        export_csv(self.store, exported)
+        with open(expected) as f1, open(exported) as f2:
+            self.assertEqual(f1.read(), f2.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import os
+import tempfile
+
+from log_quality.retrieve_logs.file_walker import FileWalker, IgnoreRule, is_ignored
+from tests.helpers import *
+
+
+class TestFileWalker(unittest.TestCase):
+
+    def setUp(self):
+        configure_logging()
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self._tmp_dir.name
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def write(self, path, content=""):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+
+    def walk(self, walker=None, paths=None):
+        walker = walker or FileWalker()
+        found = walker.walk(paths or [self.root])
+        return sorted(os.path.relpath(p, self.root) for p in found)
+
+    def test_ignore_rules(self):
+        rules = IgnoreRule.parse("/top", [
+            "# comment", "", "*.pyc", "build/", "/docs", "src/**/gen_*.py", "!keep.pyc", "\\!bang", "a[0-9].py"])
+        test_cases = [
+            ("/top/x/y.pyc", False, True),
+            ("/top/x/keep.pyc", False, False),
+            ("/top/x/build", True, True),
+            ("/top/x/build", False, False),
+            ("/top/docs", True, True),
+            ("/top/x/docs", True, False),
+            ("/top/src/gen_a.py", False, True),
+            ("/top/src/a/b/gen_a.py", False, True),
+            ("/top/other/gen_a.py", False, False),
+            ("/top/!bang", False, True),
+            ("/top/bang", False, False),
+            ("/top/a1.py", False, True),
+            ("/top/ab.py", False, False),
+        ]
+        for path, is_dir, expected in test_cases:
+            with self.subTest(path=path, is_dir=is_dir):
+                self.assertEqual(is_ignored(rules, path, is_dir), expected)
+
+    def test_walk(self):
+        for path in ["a.py", "b.txt", "C.PY", "pkg/mod.py", "pkg/gen/out.py", "pkg/test_mod.py",
+                     "node_modules/x/y.py", ".git/hooks/h.py", "venv/lib/site.py"]:
+            self.write(path)
+        self.write("venv/pyvenv.cfg")
+        self.write(".gitignore", "node_modules/\ngen/\n")
+        self.write("pkg/.logqualityignore", "test_*.py\n")
+
+        walker = FileWalker()
+        self.assertListEqual(self.walk(walker), ["C.PY", "a.py", "pkg/mod.py"])
+        self.assertEqual(walker.dirs_pruned, 4)
+        self.assertEqual(walker.files_found, 3)
+        self.assertListEqual(self.walk(FileWalker(ignore_files=(), ignore_scm=False, ignore_virtualenvs=False)), [
+            ".git/hooks/h.py", "C.PY", "a.py", "node_modules/x/y.py", "pkg/gen/out.py", "pkg/mod.py",
+            "pkg/test_mod.py", "venv/lib/site.py"])
+
+    def test_walk_filters(self):
+        self.write("a.py", "x" * 10)
+        self.write("big.py", "x" * 1000)
+        self.write("pkg/b.py")
+        self.assertListEqual(self.walk(FileWalker(name_patterns=["a*", "b*"])), ["a.py", "big.py", "pkg/b.py"])
+        self.assertListEqual(self.walk(FileWalker(max_size=100)), ["a.py", "pkg/b.py"])
+        self.assertListEqual(self.walk(FileWalker(exclude=["/pkg"])), ["a.py", "big.py"])
+        # Files given to walk are checked themselves.
+        paths = [os.path.join(self.root, "a.py"), os.path.join(self.root, "missing.py")]
+        self.assertListEqual(self.walk(FileWalker(), paths), ["a.py"])
+
+    def test_walk_parent_ignore_files(self):
+        os.makedirs(os.path.join(self.root, ".git"))
+        self.write(".gitignore", "/src/skip/\n*_pb2.py\n")
+        for path in ["src/a.py", "src/a_pb2.py", "src/skip/b.py"]:
+            self.write(path)
+        self.assertListEqual(self.walk(paths=[os.path.join(self.root, "src")]), ["src/a.py"])
+
+    def test_walk_streams(self):
+        self.write("a.py")
+        self.write("pkg/b.py")
+        found = FileWalker().walk([self.root])
+        self.assertEqual(next(found), os.path.join(self.root, "a.py"))
+        # Files created while walking are found, the walk is lazy.
+        self.write("pkg/c.py")
+        self.assertListEqual(list(found), [os.path.join(self.root, "pkg", f) for f in ["b.py", "c.py"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import random
+import re
+
+from log_quality.retrieve_logs.format_template import (
+    compile_binop_template, compile_format_template, tokenize_binop, tokenize_format)
+from log_quality.retrieve_logs.retriever_py_ast import LogRetrieverPyAST
+from tests.helpers import *
+
+# Characters that take part in placeholders, plus some that do not.
+ALPHABET = "%%%{{}}()\\\n sdrxa1.-"
+
+
+class TestFormatTemplate(unittest.TestCase):
+
+    def setUp(self):
+        configure_logging()
+        self.random = random.Random(0)
+
+    def random_string(self, max_length=12, alphabet=ALPHABET):
+        return "".join(self.random.choice(alphabet) for _ in range(self.random.randint(0, max_length)))
+
+    def test_tokenize_binop(self):
+        test_cases = {
+            "Warning %s %d": [(8, 10), (11, 13)],
+            "%(name)s and %5.2f": [(0, 8), (13, 18)],
+            # "c" is a conversion character too.
+            "%(count)05d": [(0, 3)],
+            "100%": [],
+            "100% done": [(3, 6)],
+            "\\%s %%": [(4, 6)],
+            "%\ns %s": [(4, 6)],
+        }
+        for value, expected in test_cases.items():
+            with self.subTest(value=value):
+                self.assertListEqual(tokenize_binop(value), expected)
+
+    def test_tokenize_format(self):
+        test_cases = {
+            "{} {name} {0:>5}": [(0, 2), (3, 9), (10, 16)],
+            "\\{} {": [],
+            "{\n}{}": [(3, 5)],
+        }
+        for value, expected in test_cases.items():
+            with self.subTest(value=value):
+                self.assertListEqual(tokenize_format(value), expected)
+
+    def test_tokenize_matches_regex(self):
+        test_cases = [
+            (tokenize_binop, LogRetrieverPyAST.STRING_BINOP_VARABLE_REG),
+            (tokenize_format, LogRetrieverPyAST.STRING_FORMAT_VARABLE_REG),
+        ]
+        for tokenize, reg in test_cases:
+            for _ in range(20000):
+                value = self.random_string()
+                expected = [m.span() for m in re.finditer(reg, value)]
+                self.assertListEqual(tokenize(value), expected, value)
+
+    def test_compile_template(self):
+        template = compile_binop_template("Warning %s %d!")
+        self.assertTupleEqual(template.literals, ("Warning ", " ", "!"))
+        self.assertIs(compile_binop_template("Warning %s %d!"), template)
+        self.assertEqual(template.substitute(["W"], "*"), "Warning W *!")
+
+        template = compile_format_template("{}{}")
+        self.assertEqual(template.substitute(["A", "B", "C"], "*"), "AB")
+
+    def test_subst_matches_regex(self):
+        lr = LogRetrieverPyAST()
+        regs = [LogRetrieverPyAST.STRING_BINOP_VARABLE_REG, LogRetrieverPyAST.STRING_FORMAT_VARABLE_REG]
+        for _ in range(20000):
+            reg = self.random.choice(regs)
+            value = self.random_string()
+            args = [self.random_string(4, ALPHABET.replace("\\", "") + "wWx")
+                    for _ in range(self.random.randint(0, 4))]
+            self.assertEqual(lr._subst(reg, args, value), lr._subst_regex(reg, args, value), (value, args))
+
+    def test_subst_opaque_args(self):
+        lr = LogRetrieverPyAST()
+        reg = LogRetrieverPyAST.STRING_BINOP_VARABLE_REG
+        for _ in range(20000):
+            value = self.random_string(30)
+            args = [self.random_string(4, "sdx1 {}()\n") for _ in range(self.random.randint(0, 4))]
+            template = compile_binop_template(value)
+            self.assertTrue(all(template.is_opaque(a) for a in args))
+            self.assertEqual(template.substitute(args, "*"), lr._subst_regex(reg, args, value), (value, args))
+
+    def test_subst_backslash_in_args(self):
+        lr = LogRetrieverPyAST()
+        reg = LogRetrieverPyAST.STRING_BINOP_VARABLE_REG
+        self.assertEqual(lr._subst(reg, ["C:\\\\"], "Path %s"), "Path C:\\")
+        with self.assertRaises(re.error):
+            lr._subst(reg, ["\\d"], "Path %s")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import os
+import subprocess
+import tempfile
+
+from log_quality.retrieve_logs.git_changes import GitError, get_changed_lines, in_ranges, overlaps_ranges, parse_diff
+from tests.helpers import *
+
+
+class TestGitChanges(unittest.TestCase):
+
+    def setUp(self):
+        configure_logging()
+
+    def test_parse_diff(self):
+        diff = (
+            b"diff --git a.py a.py\n"
+            b"--- a.py\n"
+            b"+++ a.py\n"
+            b"@@ -3 +3 @@ def f():\n"
+            b"-    old\n"
+            b"+    new\n"
+            b"@@ -10,0 +11,3 @@\n"
+            b"@@ -20,2 +22,0 @@\n"
+            b"--- /dev/null\n"
+            b"+++ \"dir/b \\303\\244.py\"\n"
+            b"@@ -0,0 +1,2 @@\n"
+        )
+        self.assertDictEqual(parse_diff(diff, "/top"), {
+            "/top/a.py": [(3, 3), (11, 13)],
+            "/top/dir/b ä.py": [(1, 2)],
+        })
+
+    def test_in_ranges(self):
+        ranges = [(3, 3), (11, 13)]
+        self.assertListEqual([l for l in range(1, 16) if in_ranges(l, ranges)], [3, 11, 12, 13])
+        self.assertFalse(in_ranges(1, []))
+
+    def test_overlaps_ranges(self):
+        ranges = [(3, 3), (11, 13)]
+        self.assertListEqual([(f, l) for f, l in [(1, 2), (1, 3), (3, 10), (4, 10), (9, 11), (12, 20), (14, 20)]
+                              if overlaps_ranges(f, l, ranges)], [(1, 3), (3, 10), (9, 11), (12, 20)])
+        self.assertFalse(overlaps_ranges(1, 5, []))
+
+    def test_get_changed_lines(self):
+        with tempfile.TemporaryDirectory() as repo:
+            def git(*args):
+                subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com"] + list(args),
+                               cwd=repo, check=True, stdout=subprocess.DEVNULL)
+            def write(name, lines):
+                with open(os.path.join(repo, name), "w") as f:
+                    f.write("".join(l + "\n" for l in lines))
+
+            git("init", "-q")
+            write("a.py", ["a", "b", "c"])
+            write("deleted.py", ["a"])
+            git("add", ".")
+            git("commit", "-q", "-m", "initial")
+
+            write("a.py", ["a", "B", "c", "d"])
+            os.remove(os.path.join(repo, "deleted.py"))
+            write("new.py", ["new"])
+            git("add", "new.py")
+            top = os.path.realpath(repo)
+            self.assertDictEqual(get_changed_lines("HEAD", cwd=repo), {
+                os.path.join(top, "a.py"): [(2, 2), (4, 4)],
+                os.path.join(top, "new.py"): [(1, 1)],
+            })
+            self.assertDictEqual(get_changed_lines(staged=True, cwd=repo), {os.path.join(top, "new.py"): [(1, 1)]})
+            with self.assertRaises(GitError):
+                get_changed_lines("no-such-revision", cwd=repo)
+
+            # The working tree of new.py is not what is staged.
+            write("new.py", ["new", "unstaged"])
+            with self.assertRaisesRegex(GitError, "new.py"):
+                get_changed_lines(staged=True, cwd=repo)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import random
+
+from log_quality.retrieve_logs.format_template import compile_binop_template, compile_format_template
+from log_quality.retrieve_logs.message_segments import (
+    Placeholder, get_placeholder_spans, join_segments, substitute_segments)
+from log_quality.retrieve_logs.retriever_py_ast import LogRetrieverPyAST
+from tests.helpers import *
+
+ALPHABET = "%%{{}}()\\\n sdx1"
+UNRESOLVED = Placeholder(Placeholder.UNRESOLVED)
+MISSING = Placeholder(Placeholder.MISSING)
+
+
+class TestMessageSegments(unittest.TestCase):
+
+    def setUp(self):
+        configure_logging()
+        self.random = random.Random(0)
+
+    def random_segments(self, max_length, alphabet):
+        segments = []
+        for _ in range(self.random.randint(0, max_length)):
+            if self.random.random() < 0.3:
+                segments.append(Placeholder(Placeholder.UNRESOLVED))
+            else:
+                segments.append("".join(self.random.choice(alphabet) for _ in range(self.random.randint(0, 4))))
+        return segments
+
+    def test_join_segments(self):
+        segments = ["Got ", UNRESOLVED, " of ", 5]
+        self.assertEqual(join_segments(segments, "*"), "Got * of 5")
+        self.assertEqual(join_segments(segments, "<*>"), "Got <*> of 5")
+        self.assertListEqual(get_placeholder_spans(segments, "<*>"), [(4, 7)])
+
+    def test_substitute_segments(self):
+        template = compile_binop_template("Got %s of %d %s")
+        segments = ["Got %", "s of ", UNRESOLVED, "d %s"]
+        result = substitute_segments(segments, template.spans, [["A"], ["B", UNRESOLVED]], "%")
+        self.assertListEqual(result, ["Got ", "A", " of ", "B", UNRESOLVED, " ", MISSING])
+
+    def test_substitute_segments_matches_regex(self):
+        lr = LogRetrieverPyAST()
+        test_cases = [
+            (LogRetrieverPyAST.STRING_BINOP_VARABLE_REG, compile_binop_template, "*"),
+            (LogRetrieverPyAST.STRING_FORMAT_VARABLE_REG, compile_format_template, "*"),
+            (LogRetrieverPyAST.STRING_BINOP_VARABLE_REG, compile_binop_template, "%d"),
+            (LogRetrieverPyAST.STRING_FORMAT_VARABLE_REG, compile_format_template, ""),
+        ]
+        for reg, compile_template, variable_token in test_cases:
+            lr.variable_token = variable_token
+            for _ in range(5000):
+                segments = self.random_segments(6, ALPHABET)
+                args = [self.random_segments(2, "sdx1 ") for _ in range(self.random.randint(0, 3))]
+                text = join_segments(segments, variable_token)
+                arg_texts = [join_segments(a, variable_token) for a in args]
+                template = compile_template(text)
+                if not all(template.is_opaque(a) for a in arg_texts):
+                    continue  # LogRetrieverPyAST substitutes with the regex.
+                result = substitute_segments(segments, template.spans, args, variable_token)
+
+                expected = lr._subst_regex(reg, arg_texts, text)
+                self.assertEqual(join_segments(result, variable_token), expected, (segments, args))
+                # Placeholders are kept where there is nothing to substitute.
+                if not template.spans:
+                    self.assertListEqual(
+                        get_placeholder_spans(result, variable_token), get_placeholder_spans(segments, variable_token))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+import astroid
+
+from log_quality.retrieve_logs.retriever_batch import (_filter_changed_lines, find_duplicates, order_largest_first,
+                                                        retrieve_files)
+from log_quality.retrieve_logs.retriever_py_ast import LogRetrieverPyAST
+from log_quality.retrieve_logs.scan_cache import ScanCache
+from log_quality.retrieve_logs.utils import get_cpu_limit, get_default_parallelism
+from tests.helpers import *
+
+base_path = os.path.dirname(__file__)
+test_file_path = os.path.join(base_path, "test_files")
+
+class TestLogRetrieverBatch(unittest.TestCase):
+
+    def setUp(self):
+        configure_logging()
+
+    def get_test_files(self):
+        return [
+            os.path.join(test_file_path, "py_simple.py"),
+            os.path.join(test_file_path, "py_hard.py"),
+        ]
+
+    def get_expected(self, file_path):
+        lr = LogRetrieverPyAST(file_path=file_path)
+        lr.walk(astroid.MANAGER.ast_from_file(file_path, source=True))
+        return file_path, lr.line_numbers, lr.log_levels, lr.log_messages, {}
+
+    def strip_walk_stats(self, results):
+        results = list(results)
+        for r in results:
+            if "nodes_visited" in r[4]:
+                self.assertGreater(r[4].pop("nodes_visited"), 0)
+                self.assertGreaterEqual(r[4].pop("walk_time"), 0)
+                self.assertIn(r[4].pop("tier"), ["ast", "tiered"])
+        return results
+
+    def test_retrieve_files(self):
+        files = self.get_test_files()
+        expected = [self.get_expected(f) for f in files]
+        for parallelism, queue_size in [(1, None), (2, None), (2, 1)]:
+            with self.subTest(parallelism=parallelism, queue_size=queue_size):
+                result = self.strip_walk_stats(retrieve_files(files, parallelism, queue_size))
+                self.assertListEqual(result, expected)
+
+    def test_retrieve_files_tiered(self):
+        files = self.get_test_files()
+        expected = [self.get_expected(f) for f in files]
+        result = self.strip_walk_stats(retrieve_files(files, tiered=True))
+        self.assertListEqual(result, expected)
+
+    def test_retrieve_files_budgets_exceeded(self):
+        files = self.get_test_files()
+        with tempfile.TemporaryDirectory() as cache_dir:
+            scan_cache = ScanCache(cache_dir)
+            options = {"file_timeout": 1e-9}
+            result = self.strip_walk_stats(retrieve_files(files, scan_cache=scan_cache, options=options))
+            self.assertListEqual([r[4] for r in result], [{}, {"budgets_exceeded": ["file_time"]}])
+
+            # Only the complete result is cached.
+            result = self.strip_walk_stats(retrieve_files(files, scan_cache=scan_cache, options=options))
+            self.assertListEqual([r[4] for r in result], [{"cached": True}, {"budgets_exceeded": ["file_time"]}])
+
+    def test_retrieve_files_missing_file(self):
+        missing = os.path.join(test_file_path, "does_not_exist.py")
+        result = list(retrieve_files([missing]))
+        self.assertListEqual(result, [(missing, [], [], [], {})])
+
+    def test_retrieve_files_scan_cache(self):
+        files = self.get_test_files()
+        expected = [self.get_expected(f) for f in files]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            scan_cache = ScanCache(cache_dir)
+            result = self.strip_walk_stats(retrieve_files(files, scan_cache=scan_cache))
+            self.assertListEqual(result, expected)
+
+            expected_cached = [e[:4] + ({"cached": True},) for e in expected]
+            result = list(retrieve_files(files, parallelism=2, scan_cache=scan_cache))
+            self.assertListEqual(result, expected_cached)
+
+    def test_retrieve_files_largest_first(self):
+        files = self.get_test_files()
+        missing = os.path.join(test_file_path, "does_not_exist.py")
+        self.assertListEqual(order_largest_first([missing] + files), [files[1], files[0], missing])
+
+        # The small file is submitted last, its result is still written first.
+        files = files + files[:1]
+        expected = [self.get_expected(f) for f in files]
+        for parallelism, queue_size in [(1, None), (2, None), (2, 1), (3, 2)]:
+            with self.subTest(parallelism=parallelism, queue_size=queue_size):
+                result = self.strip_walk_stats(retrieve_files(files, parallelism, queue_size, largest_first=True))
+                self.assertListEqual(result, expected)
+
+    def test_retrieve_files_dedupe(self):
+        simple, hard = self.get_test_files()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            copies = [os.path.join(tmp_dir, name) for name in ["a.py", "b.py"]]
+            for copy in copies:
+                shutil.copyfile(simple, copy)
+            files = [copies[0], hard, simple, copies[1]]
+            self.assertTupleEqual(find_duplicates(files), ([copies[0], hard], {copies[0]: [simple, copies[1]]}))
+
+            expected = self.get_expected(copies[0])
+            result = self.strip_walk_stats(retrieve_files(files, dedupe=True))
+            self.assertListEqual([r[0] for r in result], [copies[0], simple, copies[1], hard])
+            self.assertTupleEqual(result[0], expected)
+            for r in result[1:3]:
+                self.assertTupleEqual(r[1:], expected[1:4] + ({"duplicate_of": copies[0]},))
+
+    def test_find_duplicates_relative_imports(self):
+        content = "from . import settings\nimport logging\nlogging.info(settings.MESSAGE)\n"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            files = []
+            for package in ["a", "a", "b"]:
+                os.makedirs(os.path.join(tmp_dir, package), exist_ok=True)
+                files.append(os.path.join(tmp_dir, package, "m{}.py".format(len(files))))
+                with open(files[-1], "w") as f:
+                    f.write(content)
+            # The same package resolves the imports the same way, another one does not.
+            self.assertTupleEqual(find_duplicates(files), ([files[0], files[2]], {files[0]: [files[1]]}))
+
+    def test_retrieve_files_end_lines(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "end_lines.py")
+            with open(path, "w") as f:
+                f.write('import logging\nlogging.info("One line")\nlogging.warning(\n    "Two %s",\n    "lines")\n')
+            scan_cache = ScanCache(os.path.join(tmp_dir, "cache"))
+            for options in [{}, {"tiered": True}, {"large_file_size": 1}, {"scan_cache": scan_cache}]:
+                with self.subTest(options=options):
+                    (result,) = retrieve_files([path], end_lines=True, **options)
+                    self.assertListEqual(result[1], [2, 3])
+                    self.assertListEqual(result[4]["end_line_numbers"], [2, 5])
+
+            # Only the message on the line after logging.warning( changed.
+            changed_lines = {os.path.realpath(path): [(4, 4)]}
+            self.assertTupleEqual(_filter_changed_lines(path, *result[1:2], [2, 5], *result[2:4], changed_lines),
+                                  ([3], ["warning"], ["Two lines"]))
+            self.assertTupleEqual(_filter_changed_lines(path, *result[1:2], [2, 5], *result[2:4], {}),
+                                  ([], [], []))
+            # The changed lines are keyed by real path, also for a file reached through a link.
+            link = os.path.join(tmp_dir, "link")
+            os.symlink(tmp_dir, link)
+            self.assertTupleEqual(_filter_changed_lines(os.path.join(link, "end_lines.py"), *result[1:2], [2, 5],
+                                                        *result[2:4], changed_lines), ([3], ["warning"], ["Two lines"]))
+
+    def test_get_default_parallelism(self):
+        self.assertGreaterEqual(get_default_parallelism(512 * 1024 * 1024), 1)
+        self.assertLessEqual(get_default_parallelism(None), get_cpu_limit())
+        # Not even one worker fits, one is started anyway.
+        self.assertEqual(get_default_parallelism(1024 ** 5), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -58,7 +58,35 @@ class TestPyLogRetriver(unittest.TestCase):
             lines = self.read_file_content(file_path)
             result = plr.retrieve_log_lines(lines)
             self.assertListEqual(result, expected)
-        
+            self.assertListEqual(plr.retrieve_log_lines_regex(lines), expected)
+
+    def test_scan_log_lines(self):
+        text = "\n".join([
+            'log.info("in (string", a)  # log.error("in comment"',
+            's = "log.debug(x)"',
+            'self.error_count(3)',
+            'LOG.warning(\'a\\\' %s\', b,',
+            '    # )',
+            '    c)',
+            'log.error("""multi',
+            'line (""", d)',
+            'log.debug(e)) # more closing',
+            'log.critical(f(',
+            '1,', '2,', '3,', '4,', '5))',
+            'log.exception(g',
+        ])
+        expected = [
+            (1, 'log.info("in (string", a)'),
+            (4, 'LOG.warning(\'a\\\' %s\', b,c)'),
+            (7, 'log.error("""multiline (""", d)'),
+        ]
+        plr = LogRetrieverPy()
+        self.assertListEqual(plr.scan_log_lines(text), expected)
+        # Within the maximum number of lines and complete at the end.
+        plr.multiline_max = 6
+        self.assertListEqual(plr.scan_log_lines(text + ")")[-2:],
+                             [(10, 'log.critical(f(1,2,3,4,5))'), (16, 'log.exception(g)')])
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,9 +1,13 @@
 import unittest
 import logging as log
 import os
+import sys
+import tempfile
+import time
+from unittest import mock
 import astroid
 
-from log_quality.retrieve_logs.retriever_py_ast import LogRetrieverPyAST
+from log_quality.retrieve_logs.retriever_py_ast import LogRetrieverPyAST, Placeholder, may_contain_logs
 from tests.helpers import *
 
 base_path = os.path.dirname(__file__)
@@ -100,27 +104,41 @@ class TestLogRetriverPyAST(unittest.TestCase):
             self.fail("LogRetrieverPyAST._infer_log_level() raised an exception unexpectedly!")
         self.assertListEqual(levels, expected)
 
-    def test__clone_node(self):
-        node1 = astroid.extract_node(
-            """
-            print("Hello world")
-            """
-        )
-        node2 = astroid.extract_node(
+    def test_walk_segments(self):
+        node = astroid.parse(
             """
-            # Comment
-            print("Hello world")
+            import logging
+
+            class A: pass
+            items = [1, 2]
+            logging.info("Got %s of %s from %s", "", items)
+            logging.info("Got " + items + "!" % ())
+            logging.info("User {name} in {}".format(input()) + f" ({A()})")
+            logging.info(5)
+            logging.info(f"{5}")
+            logging.info(b"Raw %s" % 5)
             """
         )
         lr = LogRetrieverPyAST()
-        try:
-            node = lr._clone_node(node1, node2)
-        except Exception as e:
-            log.exception(e)
-            self.fail("LogRetrieverPyAST._clone_node() raised an exception unexpectedly!")
-        
-        self.assertEqual(node, node2)
-
+        lr.walk(node)
+        # An f-string is a string, even of a single number.
+        self.assertListEqual(lr.log_messages, ["Got * of * from *", "Got *!", "User * in * (*)", 5, "5"])
+        empty, missing, unresolved = (
+            Placeholder(Placeholder.EMPTY), Placeholder(Placeholder.MISSING), Placeholder(Placeholder.UNRESOLVED))
+        self.assertListEqual(lr.log_segments, [
+            ["Got ", empty, " of ", unresolved, " from ", missing],
+            ["Got ", unresolved, "!"],
+            ["User ", unresolved, " in ", missing, " (", unresolved, ")"],
+            [5],
+            [5],
+        ])
+        self.assertListEqual(lr.get_placeholder_spans(), [
+            [(4, 5), (9, 10), (16, 17)],
+            [(4, 5)],
+            [(5, 6), (10, 11), (13, 14)],
+            [],
+            [],
+        ])
 
     def _get_walk_test_cases(self):
         c1_msg = "Testing basic logging"
@@ -323,6 +341,157 @@ class TestLogRetriverPyAST(unittest.TestCase):
                 self.assertListEqual(lr.log_messages, expct_msg)
                 self.assertListEqual(lr.log_levels, expct_level)
         
+    def test_walk_deeply_nested(self):
+        # Deeper than the recursion limit allows for a recursive walk.
+        source = "import logging\nx = logging.info('Deep')" + " + 1" * 3000
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(100000)
+        try:
+            node = astroid.parse(source)
+        finally:
+            sys.setrecursionlimit(limit)
+
+        lr = LogRetrieverPyAST()
+        lr.walk(node)
+        self.assertListEqual(lr.log_messages, ["Deep"])
+        # Module, Import, Assign, AssignName, 3000 BinOp and Const nodes and
+        # the call with its Attribute, Name and Const.
+        self.assertEqual(lr.nodes_visited, 4 + 2 * 3000 + 4)
+
+    def test_walk_long_concatenation(self):
+        source = "import logging\nlogging.info('0'" + "".join(" + '{}'".format(i % 10) for i in range(1, 3000)) + ")"
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(100000)
+        try:
+            node = astroid.parse(source)
+        finally:
+            sys.setrecursionlimit(limit)
+
+        lr = LogRetrieverPyAST()
+        lr.walk(node)
+        self.assertListEqual(lr.log_messages, ["".join(str(i % 10) for i in range(3000))])
+
+    def get_budget_node(self):
+        return astroid.parse(
+            """
+            import logging
+
+            if input():
+                w = "A"
+            else:
+                w = "B"
+            logging.warning("Warning %s", w)
+            logging.warning("Warning %s", "C")
+            """
+        )
+
+    def test_walk_inference_budgets(self):
+        test_cases = {
+            "unlimited": ({}, ["Warning A", "Warning C"], set()),
+            "values": ({"max_inferred_values": 1}, ["Warning *", "Warning C"], {"values"}),
+            "file_time": ({"file_timeout": 1e-9}, ["Warning *", "Warning C"], {"file_time"}),
+        }
+        for msg, (budgets, expct_msg, expct_exceeded) in test_cases.items():
+            with self.subTest(msg=msg):
+                lr = LogRetrieverPyAST(**budgets)
+                lr.walk(self.get_budget_node())
+                self.assertListEqual(lr.log_messages, expct_msg)
+                self.assertSetEqual(lr.budgets_exceeded, expct_exceeded)
+
+    def test_walk_infer_timeout(self):
+        infer = astroid.Name.infer
+        def slow_infer(node, context=None, **kwargs):
+            time.sleep(5)
+            yield from infer(node, context, **kwargs)
+
+        lr = LogRetrieverPyAST(infer_timeout=0.05)
+        start = time.monotonic()
+        with mock.patch.object(astroid.Name, "infer", slow_infer):
+            lr.walk(self.get_budget_node())
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertListEqual(lr.log_messages, ["Warning *", "Warning C"])
+        self.assertSetEqual(lr.budgets_exceeded, {"call_time"})
+
+    def test_walk_logger_inference(self):
+        node = astroid.parse(
+            """
+            import logging
+
+            service = logging.Logger("service")
+            service.info("Info")
+            done = service.warning
+            done("Done")
+            service.handle(None)
+            print("Hello world")
+            """
+        )
+        test_cases = {
+            "all": (["Info", "Done"], 4),
+            "gated": (["Info", "Done"], 2),
+            "none": ([], 0),
+        }
+        infer = LogRetrieverPyAST._infer
+        for logger_inference, (expct_msg, expct_inferred) in test_cases.items():
+            with self.subTest(logger_inference=logger_inference):
+                lr = LogRetrieverPyAST(logger_inference=logger_inference)
+                with mock.patch.object(LogRetrieverPyAST, "_infer", autospec=True, side_effect=infer) as m:
+                    lr.walk(node)
+                self.assertListEqual(lr.log_messages, expct_msg)
+                self.assertEqual(m.call_count, expct_inferred)
+
+        lr = LogRetrieverPyAST(logger_name_patterns=["^serv"])
+        with mock.patch.object(LogRetrieverPyAST, "_infer", autospec=True, side_effect=infer) as m:
+            lr.walk(node)
+        self.assertEqual(m.call_count, 3)
+
+    def test_walk_bound_method_assigned_later(self):
+        node = astroid.parse(
+            """
+            import logging
+
+            class Service:
+                def run(self):
+                    self.report("Started")
+                    logging.info("Running")
+                    self.report("Done")
+                    self.render()
+
+                def __init__(self):
+                    self.report = logging.Logger("service").warning
+            """
+        )
+        lr = LogRetrieverPyAST()
+        lr.walk(node)
+        # The calls of self.report wait for the assignment, in the order of the file.
+        self.assertListEqual(lr.log_messages, ["Started", "Running", "Done"])
+        self.assertListEqual(lr.log_levels, ["warning", "info", "warning"])
+        self.assertListEqual(lr.line_numbers, [6, 7, 8])
+        self.assertListEqual(lr.end_line_numbers, [6, 7, 8])
+
+    def test_may_contain_logs(self):
+        test_cases = {
+            "import logging\n": True,
+            "LOG = getLogger(__name__)\n": True,
+            "self.log.warning('Warning')\n": True,
+            "LOG.\\\n    info('Info')\n": True,
+            "w = LOG.warn\n": True,
+            "debug ('Debug')\n": True,
+            "": False,
+            "import os\nprint('Hello world')\n": False,
+            "catalog('x')\ninformation = 1\n": False,
+        }
+        for content, expected in test_cases.items():
+            with self.subTest(content=content):
+                with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+                    f.write(content)
+                try:
+                    self.assertEqual(may_contain_logs(f.name), expected)
+                finally:
+                    os.remove(f.name)
+
+        for file_name in ["py_simple.py", "py_hard.py"]:
+            self.assertTrue(may_contain_logs(os.path.join(test_file_path, file_name)))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,154 @@
+import unittest
+import ast
+import os
+import textwrap
+
+import astroid
+
+from log_quality.retrieve_logs.retriever_py_ast import LogRetrieverPyAST
+from log_quality.retrieve_logs.retriever_py_tiered import LogRetrieverPyTiered, get_stdlib_ast
+from tests.helpers import *
+from tests import test_retriever_py_ast
+
+base_path = os.path.dirname(__file__)
+test_file_path = os.path.join(base_path, "test_files")
+
+class TestLogRetrieverPyTiered(unittest.TestCase):
+
+    def setUp(self):
+        configure_logging()
+
+    def retrieve(self, source):
+        lr = LogRetrieverPyTiered(source=source)
+        lr.walk(ast.parse(source))
+        return lr
+
+    def retrieve_astroid(self, source):
+        lr = LogRetrieverPyAST()
+        lr.walk(astroid.parse(source))
+        return lr
+
+    def assertSameResult(self, lr, expected):
+        self.assertListEqual(lr.log_messages, expected.log_messages)
+        self.assertListEqual(lr.log_levels, expected.log_levels)
+        self.assertListEqual(lr.line_numbers, expected.line_numbers)
+
+    def test_walk(self):
+        test_cases = test_retriever_py_ast.TestLogRetriverPyAST._get_walk_test_cases(self)
+        for node, (expct_msg, expct_level, msg) in test_cases.items():
+            source = node.as_string()
+            with self.subTest(msg=msg):
+                lr = self.retrieve(source)
+                self.assertListEqual(lr.log_messages, expct_msg)
+                self.assertListEqual(lr.log_levels, expct_level)
+                self.assertSameResult(lr, self.retrieve_astroid(source))
+
+    def test_walk_literal_messages_are_not_inferred(self):
+        source = textwrap.dedent(
+            '''
+            import logging
+            LOG = logging.getLogger(__name__)
+
+            LOG.info("Info %s", "A")
+            LOG.log(logging.ERROR, f"Error {'B'}")
+            LOG.warning("Warning {}".format(1) + "!", {"a": "C"})
+            '''
+        )
+        lr = self.retrieve(source)
+        self.assertListEqual(lr.log_messages, ["Info A", "Error B", "Warning 1!"])
+        self.assertListEqual(lr.log_levels, ["info", "error", "warning"])
+        self.assertEqual(lr.inferred_calls, 0)
+        self.assertSameResult(lr, self.retrieve_astroid(source))
+
+    def test_walk_assign_state(self):
+        # getLogger only defines an alias if it directly follows the name it
+        # is assigned to, in the order astroid visits the nodes.
+        source = textwrap.dedent(
+            '''
+            import logging
+
+            def f(a, *args, b=None, **kwargs):
+                return logging.getLogger()
+            try:
+                pass
+            except Exception as e:
+                logging.getLogger()
+            for x in items:
+                logging.getLogger()
+            y = print(), logging.getLogger()
+            d = {"k": logging.getLogger()}
+
+            a.info("A")
+            b.info("B")
+            e.info("E")
+            x.info("X")
+            y.info("Y")
+            d.info("D")
+            '''
+        )
+        lr = self.retrieve(source)
+        self.assertListEqual(lr.log_messages, ["B", "E", "X", "D"])
+        self.assertSameResult(lr, self.retrieve_astroid(source))
+
+    def test_walk_inferred_logger(self):
+        source = textwrap.dedent(
+            '''
+            import logging
+
+            class Service:
+                def __init__(self):
+                    self.logger = logging.Logger("service")
+
+                def run(self, name):
+                    self.logger.info("Running %s", name)
+                    done = self.logger.warning
+                    done("Done")
+                    self.logger.handle(None)
+                    self.render(name)
+            '''
+        )
+        lr = self.retrieve(source)
+        self.assertListEqual(lr.log_messages, ["Running *", "Done"])
+        self.assertListEqual(lr.log_levels, ["info", "warning"])
+        # self.render does not pass the inference gate.
+        self.assertEqual(lr.inferred_calls, 3)
+        self.assertSameResult(lr, self.retrieve_astroid(source))
+
+    def test_walk_bound_method_assigned_later(self):
+        source = textwrap.dedent(
+            '''
+            import logging
+
+            class Service:
+                def run(self):
+                    self.report("Started")
+                    logging.info("Running")
+                    self.report("Done")
+                    self.render()
+
+                def __init__(self):
+                    self.report = logging.Logger("service").warning
+            '''
+        )
+        lr = self.retrieve(source)
+        self.assertListEqual(lr.log_messages, ["Started", "Running", "Done"])
+        self.assertEqual(lr.inferred_calls, 2)
+        self.assertSameResult(lr, self.retrieve_astroid(source))
+
+    def test_walk_test_files(self):
+        for file_name in ["py_simple.py", "py_hard.py"]:
+            file_path = os.path.join(test_file_path, file_name)
+            with self.subTest(file_name=file_name):
+                lr = LogRetrieverPyTiered(file_path=file_path)
+                lr.walk(get_stdlib_ast(file_path))
+                expected = LogRetrieverPyAST(file_path=file_path)
+                expected.walk(astroid.MANAGER.ast_from_file(file_path, source=True))
+                self.assertTrue(expected.logs_found())
+                self.assertSameResult(lr, expected)
+
+    def test_get_stdlib_ast_missing_file(self):
+        self.assertIsNone(get_stdlib_ast(os.path.join(test_file_path, "does_not_exist.py")))
+
+
+if __name__ == '__main__':
+    unittest.main()
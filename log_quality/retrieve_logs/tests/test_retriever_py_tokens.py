@@ -0,0 +1,136 @@
+import unittest
+import ast
+import os
+import tempfile
+import textwrap
+
+from log_quality.retrieve_logs.retriever_batch import retrieve_files
+from log_quality.retrieve_logs.retriever_py_tiered import LogRetrieverPyTiered
+from log_quality.retrieve_logs.retriever_py_tokens import LogRetrieverPyTokens
+from tests.helpers import *
+
+base_path = os.path.dirname(__file__)
+test_file_path = os.path.join(base_path, "test_files")
+
+class TestLogRetrieverPyTokens(unittest.TestCase):
+
+    def setUp(self):
+        configure_logging()
+        self._tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def write(self, source):
+        path = os.path.join(self._tmp_dir.name, "large.py")
+        with open(path, "w") as f:
+            f.write(textwrap.dedent(source))
+        return path
+
+    def retrieve(self, source):
+        lr = LogRetrieverPyTokens(file_path=self.write(source))
+        self.assertTrue(lr.walk_file(lr.file_path))
+        return lr
+
+    def test_walk_file_literal_messages(self):
+        source = textwrap.dedent(
+            '''
+            import logging
+            LOG = logging.getLogger(__name__)
+
+            LOG.info("Info %s", "A")
+            LOG.log(logging.ERROR, f"Error {'B'}")
+            LOG.warning("Warning {}".format(1) + "!", {"a": "C"})
+            '''
+        )
+        lr = self.retrieve(source)
+        expected = LogRetrieverPyTiered(source=source)
+        expected.walk(ast.parse(source))
+        self.assertListEqual(lr.log_messages, expected.log_messages)
+        self.assertListEqual(lr.log_levels, expected.log_levels)
+        self.assertListEqual(lr.line_numbers, expected.line_numbers)
+
+    def test_walk_file_statements(self):
+        lr = self.retrieve(
+            '''
+            import logging as lg
+            from logging import warning as w
+            LOG = lg.getLogger(__name__)
+            s = "LOG.info('in a string')"  # LOG.info("in a comment")
+
+            def f(a, level):
+                LOG.info("Hello %s", a); LOG.debug("Name " + a)
+                lg.getLogger(__name__).warning(
+                    "Multi"
+                    " line {}".format(a))
+                self.logger.error(f"Attribute {a.b}")
+                w("Imported %(a)s", {"a": a})
+                other.info("Not a logger")
+                LOG.log(level, "Level needs inference")
+                LOG.info("Outer %s", LOG.debug("Inner"))
+            '''
+        )
+        self.assertListEqual(lr.log_messages, [
+            "Hello *", "Name *", "Multi line *", "Attribute *", "Imported *", "Outer *", "Inner"])
+        self.assertListEqual(lr.log_levels, ["info", "debug", "warning", "error", "warning", "info", "debug"])
+        self.assertListEqual(lr.line_numbers, [8, 8, 9, 12, 13, 16, 16])
+
+    def test_walk_file_definitions(self):
+        lr = self.retrieve(
+            '''
+            import logging
+            LOG = logging.getLogger(__name__)
+
+            class error(Exception):
+                pass
+
+            class Adapter:
+                def warning(self, msg):
+                    LOG.warning(msg)
+
+                async def info(self, msg, *args):
+                    pass
+
+                def debug(self, msg): LOG.debug("One line %s", msg)
+            '''
+        )
+        self.assertListEqual(lr.log_messages, ["*", "One line *"])
+        self.assertListEqual(lr.log_levels, ["warning", "debug"])
+        self.assertListEqual(lr.line_numbers, [10, 15])
+
+    def test_walk_file_bounded_statements(self):
+        lr = LogRetrieverPyTokens(file_path=self.write(
+            '''
+            import logging
+            LOG = logging.getLogger(__name__)
+            DATA = [LOG.info("In data"), 1, 2, 3, 4, 5]
+            LOG.info("After data")
+            '''
+        ))
+        lr.MAX_STATEMENT_TOKENS = 10
+        self.assertTrue(lr.walk_file(lr.file_path))
+        self.assertListEqual(lr.log_messages, ["After data"])
+
+    def test_walk_file_tokenize_error(self):
+        path = self.write(
+            '''
+            import logging
+            logging.info("Before")
+            s = """not terminated
+            '''
+        )
+        lr = LogRetrieverPyTokens(file_path=path)
+        self.assertFalse(lr.walk_file(path))
+        self.assertListEqual(lr.log_messages, ["Before"])
+
+    def test_retrieve_files_large_file(self):
+        files = [os.path.join(test_file_path, "py_simple.py")]
+        result = list(retrieve_files(files))
+        self.assertEqual(result[0][4]["tier"], "ast")
+        result_large = list(retrieve_files(files, large_file_size=1))
+        self.assertEqual(result_large[0][4]["tier"], "tokens")
+        self.assertTupleEqual(result_large[0][1:4], result[0][1:4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import os
+import tempfile
+
+from log_quality.retrieve_logs.retriever_batch import retrieve_files
+from log_quality.retrieve_logs.retriever_py_ast import LogRetrieverPyAST
+from log_quality.retrieve_logs.scan_cache import ScanCache
+from log_quality.retrieve_logs.symbol_index import SymbolIndex
+from tests.helpers import *
+
+class TestScanCache(unittest.TestCase):
+
+    def setUp(self):
+        configure_logging()
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = self._tmp_dir.name
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_get_put(self):
+        cache = ScanCache(self.cache_dir)
+        key = cache.key(b"import logging\nlogging.info('Info')\n")
+        self.assertIsNone(cache.get(key))
+
+        cache.put(key, [2], ["info"], ["Info"])
+        self.assertEqual(cache.get(key), ([2], ["info"], ["Info"], [2]))
+        cache.put(key, [2], ["info"], ["Info"], [4])
+        self.assertEqual(cache.get(key), ([2], ["info"], ["Info"], [4]))
+
+    def test_put_not_json(self):
+        cache = ScanCache(self.cache_dir)
+        for messages in [[b"raw"], [Ellipsis], [("a", "b")], ["Info", 1j]]:
+            with self.subTest(messages=messages):
+                key = cache.key(repr(messages).encode())
+                cache.put(key, [2] * len(messages), ["info"] * len(messages), messages)
+                self.assertIsNone(cache.get(key))
+        self.assertListEqual(os.listdir(self.cache_dir), [])
+
+    def test_retrieve_files_not_json(self):
+        input_file = os.path.join(self.cache_dir, "bytes.py")
+        with open(input_file, "w") as f:
+            f.write("import logging\nlogging.info(b'raw')\nlogging.info('text')\n")
+        scan_cache = ScanCache(os.path.join(self.cache_dir, "cache"))
+        for _ in range(2):
+            (result,) = retrieve_files([input_file], scan_cache=scan_cache)
+            self.assertTupleEqual(result[1:4], ([2, 3], ["info", "info"], [b"raw", "text"]))
+            self.assertNotIn("cached", result[4])
+
+    def test_key(self):
+        content = b"import logging\n"
+        cache_v1 = ScanCache(self.cache_dir, config={"retriever_version": 1})
+        cache_v2 = ScanCache(self.cache_dir, config={"retriever_version": 2})
+        self.assertEqual(cache_v1.key(content), cache_v1.key(content))
+        self.assertNotEqual(cache_v1.key(content), cache_v1.key(content + b"\n"))
+        self.assertNotEqual(cache_v1.key(content), cache_v2.key(content))
+        self.assertNotEqual(cache_v1.key(content), cache_v1.key(content, "context"))
+
+    def test_retrieve_files_relative_imports(self):
+        scan_cache = ScanCache(os.path.join(self.cache_dir, "cache"))
+        files = []
+        for package in ["a", "b"]:
+            os.makedirs(os.path.join(self.cache_dir, package))
+            with open(os.path.join(self.cache_dir, package, "__init__.py"), "w") as f:
+                f.write("MESSAGE = 'Message of {}'\n".format(package))
+            files.append(os.path.join(self.cache_dir, package, "m.py"))
+            with open(files[-1], "w") as f:
+                f.write("from . import MESSAGE\nimport logging\nlogging.info(MESSAGE)\n")
+        for input_file in files:
+            (result,) = retrieve_files([input_file], scan_cache=scan_cache)
+            self.assertNotIn("cached", result[4])
+        (result,) = retrieve_files(files[:1], scan_cache=scan_cache)
+        self.assertTrue(result[4]["cached"])
+
+    def test_retrieve_files_symbol_index(self):
+        scan_cache = ScanCache(os.path.join(self.cache_dir, "cache"))
+        paths = {name: os.path.join(self.cache_dir, name + ".py") for name in ["messages", "other", "app"]}
+
+        def retrieve(**sources):
+            for name, source in sources.items():
+                with open(paths[name], "w") as f:
+                    f.write(source)
+            symbol_index = SymbolIndex.build(paths.values(), LogRetrieverPyAST.DEFAULT_LOGGING_MODULES,
+                                             LogRetrieverPyAST.DEFAULT_GET_LOGGER_ATTR)
+            (result,) = retrieve_files([paths["app"]], scan_cache=scan_cache, symbol_index=symbol_index)
+            return result[3], result[4].get("cached", False)
+
+        retrieve(app="from messages import DB_ERR\nimport logging\nlogging.error(DB_ERR)\n")
+        self.assertTupleEqual(retrieve(messages="DB_ERR = 'Database error'\n", other="OTHER = 'Other'\n"),
+                              (["Database error"], False))
+        # Only the symbols the file imports are part of its key.
+        self.assertTupleEqual(retrieve(other="OTHER = 'Changed'\n"), (["Database error"], True))
+        self.assertTupleEqual(retrieve(messages="DB_ERR = 'Changed'\n"), (["Changed"], False))
+
+    def test_evict(self):
+        cache = ScanCache(self.cache_dir)
+        keys = [cache.key(str(i).encode()) for i in range(4)]
+        for i, key in enumerate(keys):
+            cache.put(key, [i], ["info"], ["x" * 100])
+            path = cache._get_path(key)
+            os.utime(path, (i, i))
+        entry_size = os.path.getsize(cache._get_path(keys[0]))
+
+        cache.max_size = 2 * entry_size
+        self.assertEqual(cache.evict(), 2)
+        self.assertIsNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[2]))
+        self.assertIsNotNone(cache.get(keys[3]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+import os
+import tempfile
+import textwrap
+
+import astroid
+
+from log_quality.retrieve_logs.retriever_batch import find_duplicates, retrieve_files
+from log_quality.retrieve_logs.retriever_py_ast import LogRetrieverPyAST
+from log_quality.retrieve_logs.retriever_py_tiered import LogRetrieverPyTiered, get_stdlib_ast
+from log_quality.retrieve_logs.symbol_index import SymbolIndex, get_module_name, resolve_import
+from tests.helpers import *
+
+PROJECT = {
+    "app/__init__.py": """
+        from .log import LOG
+        """,
+    "app/log.py": """
+        import logging
+        LOG = logging.getLogger(__name__)
+        """,
+    "app/messages.py": """
+        DB_ERR = "Database error: %s"
+        RETRY: str = "Retrying {}"
+        TWICE = "A"
+        TWICE = "B"
+        NUMBER = 5
+
+        def set_default(value):
+            global DEFAULT
+            DEFAULT = value
+        DEFAULT = "Default"
+        """,
+    "app/service.py": """
+        from app import LOG
+        from .messages import DB_ERR, RETRY, TWICE, NUMBER, DEFAULT as DEFAULT_MSG
+
+        def connect():
+            LOG.error(DB_ERR, "db")
+            LOG.warning(RETRY.format("db"))
+        """,
+    "script.py": """
+        from app.messages import *
+        from app.messages import DB_ERR
+        """,
+}
+
+
+class TestSymbolIndex(unittest.TestCase):
+
+    def setUp(self):
+        configure_logging()
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.files = {}
+        for name, source in PROJECT.items():
+            path = os.path.join(self._tmp_dir.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(textwrap.dedent(source))
+            self.files[name] = path
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def build(self):
+        return SymbolIndex.build(self.files.values(), LogRetrieverPyAST.DEFAULT_LOGGING_MODULES,
+                                 LogRetrieverPyAST.DEFAULT_GET_LOGGER_ATTR)
+
+    def test_get_module_name(self):
+        self.assertTupleEqual(get_module_name(self.files["app/service.py"]), ("app.service", False))
+        self.assertTupleEqual(get_module_name(self.files["app/__init__.py"]), ("app", True))
+        self.assertTupleEqual(get_module_name(self.files["script.py"]), ("script", False))
+
+    def test_resolve_import(self):
+        test_cases = [
+            (("app.service", False, "app.log", 0), "app.log"),
+            (("app.service", False, "log", 1), "app.log"),
+            (("app", True, "log", 1), "app.log"),
+            (("app.sub.service", False, None, 2), "app"),
+            (("app.service", False, None, 1), "app"),
+            (("script", False, "log", 1), None),
+            (("app.service", False, "log", 3), None),
+        ]
+        for args, expected in test_cases:
+            with self.subTest(args=args):
+                self.assertEqual(resolve_import(*args), expected)
+
+    def test_lookup(self):
+        index = self.build()
+        self.assertTupleEqual(index.lookup("app.log", "LOG"), (SymbolIndex.LOGGER, None))
+        # Re-exported by the package.
+        self.assertTupleEqual(index.lookup("app", "LOG"), (SymbolIndex.LOGGER, None))
+        self.assertTupleEqual(index.lookup("app.messages", "DB_ERR"), (SymbolIndex.CONSTANT, "Database error: %s"))
+        self.assertTupleEqual(index.lookup("app.messages", "RETRY"), (SymbolIndex.CONSTANT, "Retrying {}"))
+        # Bound more than once or not a string.
+        self.assertIsNone(index.lookup("app.messages", "TWICE"))
+        self.assertIsNone(index.lookup("app.messages", "DEFAULT"))
+        self.assertIsNone(index.lookup("app.messages", "NUMBER"))
+        self.assertIsNone(index.lookup("other", "LOG"))
+
+    def test_get_file_symbols(self):
+        index = self.build()
+        loggers, constants = index.get_file_symbols(self.files["app/service.py"])
+        self.assertSetEqual(loggers, {"LOG"})
+        self.assertDictEqual(constants, {"DB_ERR": "Database error: %s", "RETRY": "Retrying {}"})
+        # A star import may rebind anything.
+        self.assertTupleEqual(index.get_file_symbols(self.files["script.py"]), (set(), {}))
+        self.assertTupleEqual(index.get_file_symbols("not_indexed.py"), (set(), {}))
+
+    def test_copy_in_other_package(self):
+        for name, source in [("lib/__init__.py", ""), ("lib/messages.py", "DB_ERR = 'Other error'\n"),
+                             ("lib/service.py", PROJECT["app/service.py"])]:
+            path = os.path.join(self._tmp_dir.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(textwrap.dedent(source))
+            self.files[name] = path
+        index = self.build()
+        copies = [self.files["app/service.py"], self.files["lib/service.py"]]
+        self.assertTupleEqual(index.get_file_symbols(copies[1]), ({"LOG"}, {"DB_ERR": "Other error"}))
+        # The same content, but the results of one are not those of the other.
+        self.assertTupleEqual(find_duplicates(copies, index), (copies, {}))
+
+    def test_walk_with_symbol_index(self):
+        index = self.build()
+        file_path = self.files["app/service.py"]
+        expected = ["Database error: db", "Retrying db"]
+
+        lr = LogRetrieverPyAST(file_path=file_path, symbol_index=index)
+        lr.walk(astroid.MANAGER.ast_from_file(file_path, source=True))
+        self.assertListEqual(lr.log_messages, expected)
+
+        lr = LogRetrieverPyTiered(file_path=file_path, symbol_index=index)
+        lr.walk(get_stdlib_ast(file_path))
+        self.assertListEqual(lr.log_messages, expected)
+        self.assertEqual(lr.inferred_calls, 0)
+
+        # Without the index, LOG.error(...) and DB_ERR are handed to astroid.
+        lr = LogRetrieverPyTiered(file_path=file_path)
+        lr.walk(get_stdlib_ast(file_path))
+        self.assertEqual(lr.inferred_calls, 2)
+
+    def test_retrieve_files_with_symbol_index(self):
+        index = self.build()
+        file_path = self.files["app/service.py"]
+        for parallelism in [1, 2]:
+            with self.subTest(parallelism=parallelism):
+                result = list(retrieve_files([file_path], parallelism, tiered=True, symbol_index=index))
+                self.assertListEqual(result[0][3], ["Database error: db", "Retrying db"])
+
+
+if __name__ == '__main__':
+    unittest.main()
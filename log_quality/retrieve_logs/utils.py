@@ -1,8 +1,12 @@
 import argparse
+import contextlib
+import math
 import os
 import pathlib
 import csv
-import pandas as pd
+import sys
+
+RESULT_HEADER = ['line_number', 'log_level', 'log_message', 'file']
 
 
 def setup_command_line_arg():
@@ -15,6 +19,114 @@ def setup_command_line_arg():
     return parser.parse_args()
 
 
+def setup_batch_command_line_arg():
+    parser = argparse.ArgumentParser(description='Parse logs from a list of source code files.')
+
+    parser.add_argument('paths', nargs='*', help="directories to walk for python files, and python files; used instead of -i. The files are retrieved while the walk goes on only with --no_dedupe and without --largest_first and --symbol_index, these need the whole list first")
+    parser.add_argument('--name_filter', action='append', default=None, help="shell pattern the names of the walked files must match, like find -name (repeatable, any may match)")
+    parser.add_argument('--exclude', action='append', default=None, help="gitignore pattern of paths not to walk (repeatable)")
+    parser.add_argument('--max_file_mb', type=float, default=None, help="skip walked files larger than this many MB")
+    parser.add_argument('--no_ignore_files', action='store_true', help="walk also the paths excluded by .gitignore and .logqualityignore files")
+    parser.add_argument('--no_ignore_scm', action='store_true', help="walk also version control directories (.git, .svn, .hg, CVS)")
+    parser.add_argument('-i', '--input', type=str, default=None, help="file listing the input file paths, one per line ('-' for stdin); in git mode, only the changed ones are retrieved")
+    parser.add_argument('-0', '--null', action='store_true', help="the input file paths are separated by NUL characters instead of lines")
+    parser.add_argument('--changed_since', type=str, default=None, help="git mode: retrieve the python files changed in the working tree since this revision and report only the changed lines")
+    parser.add_argument('--staged', action='store_true', help="git mode: retrieve the python files changed in the git index and report only the changed lines; files that also have unstaged changes are refused, stash them first")
+    parser.add_argument('-o', '--output', type=str, required=True, help="output file path where the combined results are written to ('-' for stdout)")
+    parser.add_argument('-P', '--parallelism', type=int, default=None, help="number of worker processes (default: as many as the CPUs and memory of the cgroup allow)")
+    parser.add_argument('--worker_memory_mb', type=float, default=512, help="memory in MB to plan per worker process for the default --parallelism")
+    parser.add_argument('--largest_first', action='store_true', help="with several workers, retrieve the largest files first; the results are written in input order, the walk of the paths completes first")
+    parser.add_argument('--queue_size', type=int, default=None, help="maximum number of retrieved files waiting to be written (default: 4 per worker)")
+    parser.add_argument('--no_dedupe', action='store_true', help="retrieve every file, also copies of files with the same content; lets the walk of the paths stream, dedupe needs all files first")
+    parser.add_argument('--no_prefilter', action='store_true', help="parse every file, also those without any logging related token")
+    parser.add_argument('--tiered', action='store_true', help="parse with the stdlib ast and use astroid inference only for unresolved log calls")
+    parser.add_argument('--large_file_mb', type=float, default=1, help="retrieve files larger than this many MB from their tokens, with bounded memory and without inference (0: parse every file)")
+    parser.add_argument('--symbol_index', action='store_true', help="index the loggers and string constants defined at module level in the input files before the scan, and resolve imports of them without inference")
+    parser.add_argument('--logger_inference', choices=['all', 'gated', 'none'], default='gated', help="which calls that are not syntactically log calls are inferred to be logger methods (default: gated)")
+    parser.add_argument('--logger_name_pattern', action='append', default=None, help="regex of receiver names whose method calls pass the inference gate (repeatable)")
+    parser.add_argument('--max_inferred_values', type=int, default=None, help="maximum number of values a single inference may return")
+    parser.add_argument('--infer_timeout', type=float, default=None, help="maximum seconds a single inference may take")
+    parser.add_argument('--file_timeout', type=float, default=None, help="maximum seconds the retrieval of a single file may take")
+    parser.add_argument('--astroid_cache_max_modules', type=int, default=None, help="maximum number of modules in the astroid cache of a worker; the least recently used are evicted")
+    parser.add_argument('--astroid_cache_max_mb', type=float, default=None, help="maximum source size in MB of the modules in the astroid cache of a worker")
+    parser.add_argument('--recycle_files', type=int, default=None, help="replace a worker by a new process after this many files")
+    parser.add_argument('--recycle_rss_mb', type=float, default=None, help="replace a worker by a new process once its resident memory exceeds this many MB")
+    parser.add_argument('--warm_cache', action='store_true', help="build the astroid trees of --warm_module before the workers start; forked workers inherit them instead of parsing the modules themselves")
+    parser.add_argument('--warm_module', action='append', default=None, help="module whose astroid tree, and those of the modules it pulls in, --warm_cache builds (repeatable; default: logging and common stdlib modules)")
+    parser.add_argument('--cache_dir', type=str, default=None, help="directory of the scan cache; files with unchanged content are not parsed again")
+    parser.add_argument('--cache_max_size', type=int, default=512, help="maximum size of the scan cache in MB")
+    parser.add_argument('--output_format', choices=['csv', 'columnar'], default='csv', help="csv, or a columnar store directory that main.py memory-maps (see columnar_store.py; export with columnar_store.py -i DIR -o FILE.csv)")
+    parser.add_argument('--output_header', type=bool, default=False, help="add header line to output file (True / False)")
+
+    return parser.parse_args()
+
+
+def _read_cgroup_values(filename):
+    """Values of a cgroup file of this process, None if it is not found.
+
+    Version 2 and version 1 hierarchies are both looked up, at the path of
+    the cgroup of this process and at the root of the mount, which is what
+    containers usually see.
+    """
+    candidates = []
+    try:
+        with open("/proc/self/cgroup") as f:
+            for line in f:
+                _, controllers, path = line.rstrip("\n").split(":", 2)
+                if controllers == "":
+                    mount = "/sys/fs/cgroup"
+                else:
+                    mount = os.path.join("/sys/fs/cgroup", controllers)
+                candidates.extend([os.path.join(mount, path.lstrip("/"), filename), os.path.join(mount, filename)])
+    except (OSError, ValueError):
+        pass
+    for candidate in candidates:
+        try:
+            with open(candidate) as f:
+                return f.read().split()
+        except OSError:
+            continue
+    return None
+
+
+def get_cpu_limit():
+    """Number of CPUs this process may use, after affinity and the cgroup quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = _read_cgroup_values("cpu.max")
+    if quota is None:
+        quota = (_read_cgroup_values("cpu.cfs_quota_us") or []) + (_read_cgroup_values("cpu.cfs_period_us") or [])
+    try:
+        if len(quota) == 2 and quota[0] not in ("max", "-1"):
+            cpus = min(cpus, max(1, math.ceil(int(quota[0]) / int(quota[1]))))
+    except (ValueError, ZeroDivisionError):
+        pass
+    return cpus
+
+
+def get_memory_limit():
+    """Bytes of memory this process may use, after the cgroup limit."""
+    try:
+        memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        memory = None
+    limit = _read_cgroup_values("memory.max") or _read_cgroup_values("memory.limit_in_bytes")
+    if limit and limit[0].isdigit():
+        memory = min(memory, int(limit[0])) if memory else int(limit[0])
+    return memory
+
+
+def get_default_parallelism(worker_memory):
+    """One worker per CPU, as long as each gets worker_memory bytes."""
+    parallelism = get_cpu_limit()
+    memory = get_memory_limit()
+    if memory and worker_memory:
+        parallelism = min(parallelism, memory // int(worker_memory))
+    return max(1, parallelism)
+
+
 def file_exist(file_path):
     return os.path.isfile(file_path)
 
@@ -31,6 +143,10 @@ def creat_output_dirs(dir_path):
 
 
 def store_results(output_file, input_file, line_numbers, log_levels, log_messages, output_header):
+    # Only the single file scripts need pandas. The batch retriever does
+    # not pay for importing it, e.g. in a pre-commit hook.
+    import pandas as pd
+
     dir_path = os.path.dirname(os.path.realpath(output_file))
     creat_output_dirs(dir_path)
 
@@ -41,6 +157,44 @@ def store_results(output_file, input_file, line_numbers, log_levels, log_message
     df.to_csv(output_file, quoting=csv.QUOTE_NONNUMERIC, header=output_header, index=False)
 
 
+def read_file_list(input_file, null=False):
+    if input_file == "-":
+        content = sys.stdin.read()
+    else:
+        with open(input_file, "r") as f:
+            content = f.read()
+    lines = content.split("\0") if null else content.splitlines()
+    return [l for l in lines if l.strip()]
+
+
+@contextlib.contextmanager
+def open_results(output_file, output_header=False, output_format="csv"):
+    """Open a combined result file. Rows are written with write_results in the
+    same format store_results produces for a single file, or appended to the
+    columnar store directory output_file with output_format "columnar"."""
+    if output_format == "columnar":
+        from columnar_store import ColumnarWriter
+
+        with ColumnarWriter(output_file, append=False) as writer:
+            yield writer
+        return
+    if output_file == "-":
+        f = contextlib.nullcontext(sys.stdout)
+    else:
+        creat_output_dirs(os.path.dirname(os.path.realpath(output_file)))
+        f = open(output_file, "w", newline="")
+    with f as fh:
+        writer = csv.writer(fh, quoting=csv.QUOTE_NONNUMERIC, lineterminator="\n")
+        if output_header:
+            writer.writerow(RESULT_HEADER)
+        yield writer
+
+
+def write_results(writer, input_file, line_numbers, log_levels, log_messages):
+    file_path = os.path.abspath(input_file)
+    writer.writerows(zip(line_numbers, log_levels, log_messages, [file_path] * len(line_numbers)))
+
+
 def clone_repo(url):
     os.system("git clone {}".format(url))
     return url.split("/")[-1]